@@ -8,4 +8,7 @@ class CreateDeviceRequest(BaseModel):
     name: str
     description: Optional[str]
     device_type: DeviceType
-    data_types: List[DataType]
\ No newline at end of file
+    data_types: List[DataType]
+
+class CreateDeviceApiKeyRequest(BaseModel):
+    name: Optional[str] = None
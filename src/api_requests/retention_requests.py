@@ -0,0 +1,8 @@
+from typing import Optional
+from pydantic import BaseModel
+
+from database.models.retention_policy_model import RetentionPolicy
+
+class SetRetentionPolicyRequest(BaseModel):
+    # None falls back to the project's policy for devices and to the server default for projects
+    retention: Optional[RetentionPolicy] = None
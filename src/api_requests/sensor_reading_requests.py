@@ -1,10 +1,13 @@
-from typing import Any
+from typing import Any, List
 from beanie import PydanticObjectId
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from enums.data_type import DataType
 
 class CreateReadingRequest(BaseModel):
     device_id: PydanticObjectId
     data_type: DataType
-    value: Any
\ No newline at end of file
+    value: Any
+
+class CreateReadingBatchRequest(BaseModel):
+    readings: List[CreateReadingRequest] = Field(min_length=1, max_length=1000)
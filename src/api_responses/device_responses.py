@@ -1,11 +1,22 @@
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
 
 from database.models.device_model import DataType, DeviceType
+from database.models.retention_policy_model import RetentionPolicy
 
 class DeviceResponse(BaseModel):
     id: str
     name: str
     description: Optional[str]
     device_type: DeviceType
-    data_types: List[DataType]
\ No newline at end of file
+    data_types: List[DataType]
+    retention: Optional[RetentionPolicy] = None
+
+class DeviceApiKeyResponse(BaseModel):
+    id: str
+    device_id: str
+    name: Optional[str]
+    revoked: bool
+    created_at: datetime
+    api_key: Optional[str] = None
@@ -1,8 +1,11 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 
+from database.models.retention_policy_model import RetentionPolicy
+
 class ProjectResponse(BaseModel):
     id: str
     name: str
     description: str
     modules: Optional[List[str]] = Field(default_factory=list)
+    retention: Optional[RetentionPolicy] = None
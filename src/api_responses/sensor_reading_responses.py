@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, List, Optional
 from pydantic import BaseModel
 
 from enums.data_type import DataType
@@ -8,4 +8,70 @@ class SensorReadingResponse(BaseModel):
     id: str
     data_type: DataType
     value: Any
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class SensorReadingPageResponse(BaseModel):
+    items: List[SensorReadingResponse]
+    next_cursor: Optional[str] = None
+
+class DeviceReadingsResponse(BaseModel):
+    device_id: str
+    readings: List[SensorReadingResponse]
+
+class MultiDeviceReadingsResponse(BaseModel):
+    devices: List[DeviceReadingsResponse]
+    truncated: bool = False
+
+class ColumnarSeriesResponse(BaseModel):
+    data_type: DataType
+    timestamps: List[int]
+    values: List[Any]
+
+class ColumnarPageResponse(BaseModel):
+    series: List[ColumnarSeriesResponse]
+    next_cursor: Optional[str] = None
+
+class DeviceColumnarResponse(BaseModel):
+    device_id: str
+    series: List[ColumnarSeriesResponse]
+
+class MultiDeviceColumnarResponse(BaseModel):
+    devices: List[DeviceColumnarResponse]
+    truncated: bool = False
+
+class LatestReadingResponse(BaseModel):
+    data_type: DataType
+    value: Any
+    created_at: datetime
+
+class DeviceLatestReadingsResponse(BaseModel):
+    device_id: str
+    name: str
+    readings: List[LatestReadingResponse]
+
+class SensorReadingAggregateResponse(BaseModel):
+    data_type: DataType
+    bucket_start: datetime
+    count: int
+    min: float
+    max: float
+    mean: float
+    sum: float
+    first: float
+    last: float
+
+class BatchReadingResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchReadingResponse(BaseModel):
+    inserted: int
+    rejected: int
+    results: List[BatchReadingResult]
+
+class StreamReadingResponse(BaseModel):
+    received: int
+    inserted: int
+    rejected: int
+    errors: List[BatchReadingResult]
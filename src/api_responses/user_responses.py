@@ -6,6 +6,7 @@ class LoginUserResponse(BaseModel):
     username: str
     email: str
     password: str
+    token_version: int = 0
 
 class UserResponse(BaseModel):
     id: str
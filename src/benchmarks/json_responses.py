@@ -0,0 +1,116 @@
+"""
+Compares the stdlib JSONResponse against the app's default FastJSONResponse (orjson).
+
+Seeds a scratch database with one user owning many projects, modules, devices and
+readings, then times the project, module, device and reading list routes in
+process, once with every route rendered by JSONResponse and once by
+FastJSONResponse. Needs a running MongoDB:
+
+    python -m benchmarks.json_responses --rows 200 --readings 1000 --runs 20
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from beanie import init_beanie
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, request_response
+from httpx import ASGITransport, AsyncClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app_secrets import DATABASE_NAME, DATABASE_URL
+from database.config import DOCUMENT_MODELS
+from database.models.device_model import Device
+from database.models.module_model import Module
+from database.models.project_model import Project
+from database.models.sensor_reading_model import SensorReading
+from database.models.user_model import User
+from main import app
+from utils.responses import FastJSONResponse
+from utils.token import generate_user_token
+
+DATA_TYPE = {"measurement_type": "temperature", "measurement_unit": "celsius"}
+
+def use_response_class(response_class):
+    """Rebuilds every route handler so it renders with response_class."""
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            route.response_class = response_class
+            route.app = request_response(route.get_route_handler())
+
+async def seed(rows: int, readings: int) -> dict:
+    user = User(username="benchmark", email="benchmark@mail.com", password="x")
+    await user.insert()
+
+    projects = [Project(user_id=user.id, name=f"project {index}", description="benchmark project") for index in range(rows)]
+    await Project.insert_many(projects)
+    project = await Project.find_one(Project.user_id == user.id)
+
+    modules = [Module(user_id=user.id, project_id=project.id, name=f"module {index}", description="benchmark module") for index in range(rows)]
+    await Module.insert_many(modules)
+    module = await Module.find_one(Module.project_id == project.id)
+
+    devices = [
+        Device(user_id=user.id, module_id=module.id, name=f"device {index}", description="benchmark device", device_type="sensor", data_types=[DATA_TYPE])
+        for index in range(rows)
+    ]
+    await Device.insert_many(devices)
+    device = await Device.find_one(Device.module_id == module.id)
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    await SensorReading.get_motor_collection().insert_many([
+        {"user_id": user.id, "device_id": device.id, "value": index % 40 + 0.5, "data_type": DATA_TYPE, "created_at": start + timedelta(seconds=index)}
+        for index in range(readings)
+    ])
+
+    return {
+        "token": generate_user_token(user.id, user.email, user.token_version),
+        "routes": [
+            ("projects", "/projects/list", {}),
+            ("modules", f"/modules/list/{project.id}", {}),
+            ("devices", f"/devices/list/{module.id}", {}),
+            ("readings", f"/sensor-readings/list/{device.id}", {"limit": readings}),
+        ]
+    }
+
+async def route_latency(client: AsyncClient, path: str, params: dict, headers: dict, runs: int) -> float:
+    response = await client.get(path, params=params, headers=headers)
+    response.raise_for_status()
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await client.get(path, params=params, headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return median(latencies)
+
+async def main(rows: int, readings: int, runs: int):
+    client = AsyncIOMotorClient(DATABASE_URL)
+    database = client[f"{DATABASE_NAME}_benchmark"]
+
+    try:
+        await client.drop_database(database)
+        await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+        seeded = await seed(rows, readings)
+        headers = {"Authorization": f"Bearer {seeded['token']}"}
+
+        print(f"{'route':<12}{'JSONResponse ms':>18}{'FastJSONResponse ms':>22}")
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as http:
+            for name, path, params in seeded["routes"]:
+                latencies = []
+                for response_class in (JSONResponse, FastJSONResponse):
+                    use_response_class(response_class)
+                    latencies.append(await route_latency(http, path, params, headers, runs))
+                print(f"{name:<12}{latencies[0]:>18.2f}{latencies[1]:>22.2f}")
+    finally:
+        use_response_class(FastJSONResponse)
+        await client.drop_database(database)
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark JSON rendering of the list routes.")
+    parser.add_argument("--rows", type=int, default=200, help="projects, modules and devices to list")
+    parser.add_argument("--readings", type=int, default=1000, help="readings in the listed page")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.readings, args.runs))
@@ -0,0 +1,121 @@
+"""
+Compares the per row cost of the repository list read paths.
+
+For sensor readings and devices it times, in a scratch database:
+
+- beanie: Beanie documents validated as models, then copied into the response DTO
+  (the previous get_all implementation)
+- projection: a projected Motor cursor mapped straight into the response DTO
+  (the current get_all implementation)
+- fetch only: the projected Motor cursor without building any response, the floor
+  both paths share
+
+Needs a running MongoDB:
+
+    python -m benchmarks.read_paths --rows 10000 --runs 5
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from beanie import PydanticObjectId, init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from api_responses.device_responses import DeviceResponse
+from api_responses.sensor_reading_responses import SensorReadingResponse
+from app_secrets import DATABASE_NAME, DATABASE_URL
+from database.models.device_model import Device
+from database.models.sensor_reading_model import SensorReading
+from database.repositories.device_repository import DEVICE_RESPONSE_PROJECTION
+
+DATA_TYPE = {"measurement_type": "temperature", "measurement_unit": "celsius"}
+READING_PROJECTION = {"data_type": 1, "value": 1, "created_at": 1}
+
+async def readings_beanie(device_id, rows):
+    readings = await SensorReading.find(SensorReading.device_id == device_id).sort("+created_at").limit(rows).to_list()
+    return [
+        SensorReadingResponse(id=str(reading.id), data_type=reading.data_type, value=reading.value, created_at=reading.created_at)
+        for reading in readings
+    ]
+
+async def readings_projection(device_id, rows):
+    cursor = SensorReading.get_motor_collection().find({"device_id": device_id}, projection=READING_PROJECTION)
+    return [
+        SensorReadingResponse(id=str(reading["_id"]), data_type=reading["data_type"], value=reading["value"], created_at=reading["created_at"])
+        for reading in await cursor.sort("created_at", 1).limit(rows).to_list(None)
+    ]
+
+async def readings_fetch(device_id, rows):
+    cursor = SensorReading.get_motor_collection().find({"device_id": device_id}, projection=READING_PROJECTION)
+    return await cursor.sort("created_at", 1).limit(rows).to_list(None)
+
+async def devices_beanie(module_id, rows):
+    devices = await Device.find(Device.module_id == module_id).to_list()
+    return [
+        DeviceResponse(id=str(device.id), name=device.name, description=device.description, device_type=device.device_type, data_types=device.data_types, retention=device.retention)
+        for device in devices
+    ]
+
+async def devices_projection(module_id, rows):
+    cursor = Device.get_motor_collection().find({"module_id": module_id}, projection=DEVICE_RESPONSE_PROJECTION)
+    return [
+        DeviceResponse(id=str(device["_id"]), name=device["name"], description=device.get("description"), device_type=device["device_type"], data_types=device["data_types"], retention=device.get("retention"))
+        async for device in cursor
+    ]
+
+async def devices_fetch(module_id, rows):
+    return await Device.get_motor_collection().find({"module_id": module_id}, projection=DEVICE_RESPONSE_PROJECTION).to_list(None)
+
+async def time_path(path, parent_id, rows: int, runs: int) -> float:
+    await path(parent_id, rows)
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await path(parent_id, rows)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return median(latencies)
+
+async def main(rows: int, runs: int):
+    client = AsyncIOMotorClient(DATABASE_URL)
+    database = client[f"{DATABASE_NAME}_benchmark"]
+
+    try:
+        await init_beanie(database=database, document_models=[SensorReading, Device])
+        await SensorReading.get_motor_collection().delete_many({})
+        await Device.get_motor_collection().delete_many({})
+
+        user_id, device_id, module_id = PydanticObjectId(), PydanticObjectId(), PydanticObjectId()
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+        await SensorReading.get_motor_collection().insert_many([
+            {"user_id": user_id, "device_id": device_id, "value": index % 40, "data_type": DATA_TYPE, "created_at": start + timedelta(seconds=index)}
+            for index in range(rows)
+        ])
+        device_rows = max(rows // 10, 1)
+        await Device.get_motor_collection().insert_many([
+            {"user_id": user_id, "module_id": module_id, "name": f"device {index}", "description": None, "device_type": "sensor", "data_types": [DATA_TYPE]}
+            for index in range(device_rows)
+        ])
+
+        print(f"{'path':<24}{'rows':>8}{'median ms':>12}{'us/row':>10}")
+        for name, path, parent_id, count in (
+            ("readings beanie", readings_beanie, device_id, rows),
+            ("readings projection", readings_projection, device_id, rows),
+            ("readings fetch only", readings_fetch, device_id, rows),
+            ("devices beanie", devices_beanie, module_id, device_rows),
+            ("devices projection", devices_projection, module_id, device_rows),
+            ("devices fetch only", devices_fetch, module_id, device_rows),
+        ):
+            latency = await time_path(path, parent_id, count, runs)
+            print(f"{name:<24}{count:>8}{latency:>12.1f}{latency * 1000 / count:>10.1f}")
+    finally:
+        await client.drop_database(database)
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark repository list read paths.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.runs))
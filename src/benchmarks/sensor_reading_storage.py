@@ -0,0 +1,96 @@
+"""
+Compares a regular collection against a time-series collection for sensor readings.
+
+Loads the same synthetic readings into both layouts in a scratch database and
+reports storage size, index size and the latency of a one day range query for
+a single device. Needs a running MongoDB (5.0+):
+
+    python -m benchmarks.sensor_reading_storage --devices 20 --days 30 --interval 60
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from app_secrets import DATABASE_NAME, DATABASE_URL
+from database.models.sensor_reading_model import SENSOR_READINGS_TIMESERIES_CONFIG
+
+BATCH_SIZE = 10000
+DATA_TYPE = {"measurement_type": "temperature", "measurement_unit": "celsius"}
+
+def generate_readings(device_ids, start: datetime, days: int, interval: int):
+    user_id = ObjectId()
+    samples = days * 24 * 3600 // interval
+    for sample in range(samples):
+        created_at = start + timedelta(seconds=sample * interval)
+        for device_id in device_ids:
+            yield {
+                "user_id": user_id,
+                "device_id": device_id,
+                "value": round(random.uniform(15, 30), 2),
+                "data_type": DATA_TYPE,
+                "created_at": created_at
+            }
+
+async def load(database: AsyncIOMotorDatabase, name: str, readings) -> float:
+    collection = database[name]
+    started = time.perf_counter()
+    batch = []
+    for reading in readings:
+        batch.append(reading)
+        if len(batch) >= BATCH_SIZE:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    return time.perf_counter() - started
+
+async def range_query_latency(database: AsyncIOMotorDatabase, name: str, device_id, start: datetime, runs: int) -> float:
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await database[name].find({
+            "device_id": device_id,
+            "created_at": {"$gte": start, "$lt": start + timedelta(days=1)}
+        }).to_list(length=None)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return median(latencies)
+
+async def main(devices: int, days: int, interval: int, runs: int):
+    client = AsyncIOMotorClient(DATABASE_URL)
+    database = client[f"{DATABASE_NAME}_benchmark"]
+    device_ids = [ObjectId() for _ in range(devices)]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    try:
+        await database.drop_collection("readings_regular")
+        await database.drop_collection("readings_timeseries")
+        await database.create_collection("readings_regular")
+        await database["readings_regular"].create_index([("device_id", 1), ("created_at", 1)])
+        await database.create_collection(**SENSOR_READINGS_TIMESERIES_CONFIG.build_query("readings_timeseries"))
+
+        print(f"{'layout':<12}{'load s':>10}{'storage MB':>14}{'index MB':>12}{'range ms':>12}")
+        for name in ("readings_regular", "readings_timeseries"):
+            load_time = await load(database, name, generate_readings(device_ids, start, days, interval))
+            stats = await database.command("collStats", name)
+            latency = await range_query_latency(database, name, device_ids[0], start + timedelta(days=days // 2), runs)
+            print(
+                f"{name.split('_')[1]:<12}{load_time:>10.2f}"
+                f"{stats['storageSize'] / 2**20:>14.2f}{stats['totalIndexSize'] / 2**20:>12.2f}{latency:>12.2f}"
+            )
+    finally:
+        await client.drop_database(database.name)
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--interval", type=int, default=60, help="seconds between samples")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.devices, args.days, args.interval, args.runs))
@@ -1,11 +1,15 @@
 from fastapi import APIRouter, status, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
-from database.models.user_model import User
-from utils.token import generate_jwt_token
-from utils.hash import verify_password
-from database.repositories.user_repository import UserRepository
+from database.models.user_model import UserPrincipal
+from utils.token import generate_user_token
+from utils.auth import get_current_principal, get_ops_principal
+from utils.hash import password_hasher
+from database.ownership import ownership_index
+from database.repositories.device_api_key_repository import device_api_key_cache
+from database.repositories.user_repository import UserRepository, user_token_version_cache
 from api_responses.auth_responses import TokenResponse
+from exceptions.user_exceptions import PasswordHasherBusyException, UserNotFoundException
 
 user_repository = UserRepository()
 auth_router = APIRouter(tags=["auth"])
@@ -15,8 +19,43 @@ async def login(login_form_data: OAuth2PasswordRequestForm = Depends()):
     
     user_login = await user_repository.get_user_login(login_form_data.username)
 
-    if not verify_password(login_form_data.password, user_login.password):
+    try:
+        password_matches = await password_hasher.verify(login_form_data.password, user_login.password)
+    except PasswordHasherBusyException as err:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(err))
+
+    if not password_matches:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect user or password.")
     
-    jwt_token = generate_jwt_token({"sub": user_login.email})
-    return TokenResponse(access_token=jwt_token, token_type="bearer")
\ No newline at end of file
+    jwt_token = generate_user_token(user_login.id, user_login.email, user_login.token_version)
+    return TokenResponse(access_token=jwt_token, token_type="bearer")
+
+@auth_router.post('/token/revoke', status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_tokens(user: UserPrincipal = Depends(get_current_principal)):
+
+    try:
+        await user_repository.revoke_tokens(user.id)
+    except UserNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@auth_router.get('/auth-cache-metrics', status_code=status.HTTP_200_OK)
+async def get_auth_cache_metrics(user: UserPrincipal = Depends(get_ops_principal)):
+
+    return {
+        "user_token_versions": user_token_version_cache.metrics(),
+        "device_api_keys": device_api_key_cache.metrics(),
+        "ownership": ownership_index.metrics()
+    }
+
+@auth_router.get('/password-hasher-metrics', status_code=status.HTTP_200_OK)
+async def get_password_hasher_metrics(user: UserPrincipal = Depends(get_ops_principal)):
+
+    return password_hasher.metrics()
@@ -2,21 +2,24 @@ from typing import List
 from fastapi import APIRouter, Body, Depends, HTTPException
 from fastapi import status
 
-from api_requests.device_requests import CreateDeviceRequest
-from api_responses.device_responses import DeviceResponse
-from database.models.device_model import Device
-from database.models.user_model import User
+from api_requests.device_requests import CreateDeviceApiKeyRequest, CreateDeviceRequest
+from api_requests.retention_requests import SetRetentionPolicyRequest
+from api_responses.device_responses import DeviceApiKeyResponse, DeviceResponse
+from database.models.user_model import UserPrincipal
+from database.repositories.device_api_key_repository import DeviceApiKeyRepository
 from database.repositories.device_repository import DeviceRepository
+from exceptions.device_api_key_exceptions import DeviceApiKeyNotFoundException
 from exceptions.device_exceptions import DeviceNotFoundException
 from exceptions.module_exceptions import ModuleNotFoundException
-from utils.auth import get_current_user
+from utils.auth import get_current_principal
 from utils.helper_functions import validate_object_id
 
-device_repository = DeviceRepository(Device)
+device_repository = DeviceRepository()
+device_api_key_repository = DeviceApiKeyRepository()
 device_router = APIRouter(prefix="/devices", tags=["devices"])
 
 @device_router.post("/create/{module_id}", status_code=status.HTTP_201_CREATED, response_model=DeviceResponse)
-async def create_device(module_id: str, create_device_request: CreateDeviceRequest = Body(...), user: User = Depends(get_current_user)):
+async def create_device(module_id: str, create_device_request: CreateDeviceRequest = Body(...), user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         module_object_id = validate_object_id(module_id)
@@ -35,12 +38,12 @@ async def create_device(module_id: str, create_device_request: CreateDeviceReque
 
 
 @device_router.get("/get/{module_id}/{device_id}", status_code=status.HTTP_200_OK, response_model=DeviceResponse)
-async def get_device(module_id: str, device_id: str, user: User = Depends(get_current_user)):
+async def get_device(module_id: str, device_id: str, user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         module_object_id = validate_object_id(module_id)
         device_object_id = validate_object_id(device_id)
-        device = await device_repository.get_by_id(user.id, module_object_id, device_object_id)
+        device = await device_repository.get(user.id, module_object_id, device_object_id)
         return device
     except ModuleNotFoundException as err:
         raise HTTPException(
@@ -59,11 +62,11 @@ async def get_device(module_id: str, device_id: str, user: User = Depends(get_cu
         )
 
 @device_router.get("/list/{module_id}", status_code=status.HTTP_200_OK, response_model=List[DeviceResponse])
-async def list_devices(module_id: str, user: User = Depends(get_current_user)):
+async def list_devices(module_id: str, user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         module_object_id = validate_object_id(module_id)
-        devices = await device_repository.list(user.id, module_object_id)
+        devices = await device_repository.get_all(user.id, module_object_id)
         return devices
     except ModuleNotFoundException as err:
         raise HTTPException(
@@ -74,4 +77,71 @@ async def list_devices(module_id: str, user: User = Depends(get_current_user)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error."
-        )
\ No newline at end of file
+        )
+
+@device_router.post("/api-keys/create/{device_id}", status_code=status.HTTP_201_CREATED, response_model=DeviceApiKeyResponse)
+async def create_device_api_key(device_id: str, create_api_key_request: CreateDeviceApiKeyRequest = Body(...), user: UserPrincipal = Depends(get_current_principal)):
+
+    try:
+        device_object_id = validate_object_id(device_id)
+        api_key = await device_api_key_repository.create(user.id, device_object_id, create_api_key_request)
+        return api_key
+    except DeviceNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@device_router.get("/api-keys/list/{device_id}", status_code=status.HTTP_200_OK, response_model=List[DeviceApiKeyResponse])
+async def list_device_api_keys(device_id: str, user: UserPrincipal = Depends(get_current_principal)):
+
+    try:
+        device_object_id = validate_object_id(device_id)
+        api_keys = await device_api_key_repository.get_all(user.id, device_object_id)
+        return api_keys
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@device_router.delete("/api-keys/revoke/{device_id}/{key_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_device_api_key(device_id: str, key_id: str, user: UserPrincipal = Depends(get_current_principal)):
+
+    try:
+        device_object_id = validate_object_id(device_id)
+        key_object_id = validate_object_id(key_id)
+        await device_api_key_repository.delete(user.id, device_object_id, key_object_id)
+    except DeviceApiKeyNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@device_router.put("/retention/{device_id}", status_code=status.HTTP_200_OK, response_model=DeviceResponse)
+async def set_device_retention(device_id: str, set_retention_request: SetRetentionPolicyRequest = Body(...), user: UserPrincipal = Depends(get_current_principal)):
+
+    try:
+        device_object_id = validate_object_id(device_id)
+        device = await device_repository.set_retention(user.id, device_object_id, set_retention_request.retention)
+        return device
+    except DeviceNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
@@ -4,18 +4,18 @@ from fastapi import APIRouter, Body, Depends, Response, status, HTTPException
 from api_requests.module_requests import CreateModuleRequest, PatchModuleRequest
 from api_responses.module_responses import ModuleResponse
 from database.models.module_model import Module
-from database.models.user_model import User
+from database.models.user_model import UserPrincipal
 from database.repositories.module_repository import ModuleRepository
 from exceptions.module_exceptions import ModuleNotFoundException, BadUpdateDataException
 from exceptions.project_exceptions import ProjectNotFoundException
-from utils.auth import get_current_user
+from utils.auth import get_current_principal
 from utils.helper_functions import validate_object_id
 
 module_repository = ModuleRepository()
 module_router = APIRouter(prefix="/modules", tags=["modules"])
 
 @module_router.post("/create/{project_id}", status_code=status.HTTP_201_CREATED, response_model=ModuleResponse)
-async def create_module(project_id: str, create_module_request: CreateModuleRequest = Body(...), user: User = Depends(get_current_user)):
+async def create_module(project_id: str, create_module_request: CreateModuleRequest = Body(...), user: UserPrincipal = Depends(get_current_principal)):
     try:
         project_object_id = validate_object_id(project_id)
         module = await module_repository.create(user.id, project_object_id, create_module_request)
@@ -32,11 +32,11 @@ async def create_module(project_id: str, create_module_request: CreateModuleRequ
         )
 
 @module_router.get("/get/{module_id}", status_code=status.HTTP_200_OK, response_model=ModuleResponse)
-async def get_module(module_id: str, user: User = Depends(get_current_user)):
+async def get_module(module_id: str, user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         module_object_id = validate_object_id(module_id)
-        module = await module_repository.get_by_id(
+        module = await module_repository.get(
             user.id,
             module_object_id
         )
@@ -54,11 +54,11 @@ async def get_module(module_id: str, user: User = Depends(get_current_user)):
     
 
 @module_router.get("/list/{project_id}", status_code=status.HTTP_200_OK, response_model=List[ModuleResponse])
-async def list_modules(project_id: str, user: User = Depends(get_current_user)):
+async def list_modules(project_id: str, user: UserPrincipal = Depends(get_current_principal)):
     
     try:
         project_object_id = validate_object_id(project_id)
-        modules = await module_repository.list(user.id, project_object_id)
+        modules = await module_repository.get_all(user.id, project_object_id)
         return modules
     except ProjectNotFoundException as err:
         raise HTTPException(
@@ -73,7 +73,7 @@ async def list_modules(project_id: str, user: User = Depends(get_current_user)):
     
 
 @module_router.delete("/delete/{project_id}/{module_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_module(project_id: str, module_id: str, user: User = Depends(get_current_user)):
+async def delete_module(project_id: str, module_id: str, user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         module_object_id = validate_object_id(module_id)
@@ -105,7 +105,7 @@ async def delete_module(project_id: str, module_id: str, user: User = Depends(ge
 async def patch_module(
     module_id: str, 
     patch_module_request: PatchModuleRequest = Body(...), 
-    user: User = Depends(get_current_user)):
+    user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         module_object_id = validate_object_id(module_id)    
@@ -5,25 +5,26 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 
 from api_requests.project_requests import CreateProjectRequest, PatchProjectRequest
+from api_requests.retention_requests import SetRetentionPolicyRequest
 from api_responses.project_responses import ProjectResponse
 from database.models.project_model import Project
-from database.models.user_model import User
+from database.models.user_model import UserPrincipal
 from database.repositories.project_repository import ProjectRepository
 from exceptions.project_exceptions import ProjectNotFoundException, UpdateProjectException
-from utils.auth import get_current_user
+from utils.auth import get_current_principal
 from utils.helper_functions import validate_object_id
 
 project_repository = ProjectRepository()
 project_router = APIRouter(prefix="/projects", tags=["projects"])
 
 @project_router.post("/create", status_code=status.HTTP_201_CREATED, response_model=ProjectResponse)
-async def create_project(create_project_request: CreateProjectRequest, user: User = Depends(get_current_user)):
+async def create_project(create_project_request: CreateProjectRequest, user: UserPrincipal = Depends(get_current_principal)):
 
     new_project = await project_repository.create(user.id, create_project_request)
     return new_project
 
 @project_router.get("/get/{project_id}", status_code=status.HTTP_200_OK, response_model=ProjectResponse)
-async def get_project(project_id: str, user: User = Depends(get_current_user)):
+async def get_project(project_id: str, user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         project_object_id = validate_object_id(project_id)
@@ -43,11 +44,11 @@ async def get_project(project_id: str, user: User = Depends(get_current_user)):
 
 
 @project_router.get("/list", status_code=status.HTTP_200_OK, response_model=List[ProjectResponse])
-async def list_projects(user: User = Depends(get_current_user)):
+async def list_projects(user: UserPrincipal = Depends(get_current_principal)):
     return await project_repository.get_all(user.id)
 
 @project_router.delete("/delete/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete(project_id: str, user: User = Depends(get_current_user)):
+async def delete(project_id: str, user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         project_object_id = validate_object_id(project_id)
@@ -67,7 +68,7 @@ async def delete(project_id: str, user: User = Depends(get_current_user)):
 async def patch(
     project_id: str, 
     patch_project_request: PatchProjectRequest,
-    user: User = Depends(get_current_user)
+    user: UserPrincipal = Depends(get_current_principal)
 ):
     
     try:
@@ -94,3 +95,29 @@ async def patch(
             detail="Internal server error."
         )
     
+
+@project_router.put("/retention/{project_id}", status_code=status.HTTP_200_OK, response_model=ProjectResponse)
+async def set_retention(
+    project_id: str,
+    set_retention_request: SetRetentionPolicyRequest,
+    user: UserPrincipal = Depends(get_current_principal)
+):
+
+    try:
+        project_object_id = validate_object_id(project_id)
+        project = await project_repository.set_retention(
+            user.id,
+            project_object_id,
+            set_retention_request.retention
+        )
+        return project
+    except ProjectNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
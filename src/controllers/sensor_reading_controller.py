@@ -1,27 +1,50 @@
-from datetime import date
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import asyncio
+from datetime import date, datetime
+import json
+import logging
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from api_requests.sensor_reading_requests import CreateReadingRequest
-from api_responses.sensor_reading_responses import SensorReadingResponse
+from api_requests.sensor_reading_requests import CreateReadingBatchRequest, CreateReadingRequest
+from api_responses.sensor_reading_responses import BatchReadingResponse, ColumnarPageResponse, DeviceLatestReadingsResponse, MultiDeviceColumnarResponse, MultiDeviceReadingsResponse, SensorReadingAggregateResponse, SensorReadingPageResponse, SensorReadingResponse, StreamReadingResponse
+from database.ingestion_queue import sensor_reading_ingestion_queue
+from database.models.device_api_key_model import DevicePrincipal
 from database.models.sensor_reading_model import SensorReading
-from database.models.user_model import User
-from database.repositories.sensor_reading_repository import SensorReadingRepository
+from database.models.user_model import UserPrincipal
+from database.repositories.sensor_reading_repository import DEFAULT_PAGE_SIZE, MAX_AGGREGATE_BUCKETS, MAX_MULTI_DEVICE_READINGS, SensorReadingRepository
+from database.retention import retention_sweeper
+from enums.measurement_type import MeasurementType
+from enums.measurement_unit import MeasurementUnit
 from exceptions.device_exceptions import DeviceNotFoundException
-from utils.auth import get_current_user
-from utils.helper_functions import validate_object_id
+from exceptions.module_exceptions import ModuleNotFoundException
+from exceptions.project_exceptions import ProjectNotFoundException
+from exceptions.sensor_reading_exceptions import IngestionQueueFullException, InvalidReadingFrameException, InvalidReadingStreamException
+from utils.auth import get_current_device, get_current_principal, get_ops_principal, get_principal_from_token
+from utils.export import iter_csv, iter_ndjson
+from utils.helper_functions import data_type_filters, iter_ndjson_lines, validate_cursor, validate_interval, validate_object_id, validate_time_range
+from utils.responses import FastJSONResponse
 
-sensor_reading_repository = SensorReadingRepository(SensorReading)
+sensor_reading_repository = SensorReadingRepository(SensorReading, sensor_reading_ingestion_queue)
 sensor_reading_router = APIRouter(prefix="/sensor-readings", tags=["sensor-readings"])
 
+WEBSOCKET_BATCH_SIZE = 200
+WEBSOCKET_FLUSH_INTERVAL = 0.25
+MAX_BINARY_FRAME_SIZE = 1024 * 1024
+MAX_PAGE_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
 @sensor_reading_router.post(path="/create/{device_id}", status_code=status.HTTP_201_CREATED, response_model=SensorReadingResponse)
-async def create_sensor_reading(device_id: str, create_reading_request: CreateReadingRequest, user: User = Depends(get_current_user)):
+async def create_sensor_reading(device_id: str, create_reading_request: CreateReadingRequest, user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         device_object_id = validate_object_id(device_id)
         sensor_reading = await sensor_reading_repository.create(
             user_id=user.id,
-            device_id=device_object_id
+            device_id=device_object_id,
+            create_reading_request=create_reading_request
         )
         return sensor_reading
     except DeviceNotFoundException as err:
@@ -29,42 +52,295 @@ async def create_sensor_reading(device_id: str, create_reading_request: CreateRe
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(err)
         )
+    except IngestionQueueFullException as err:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@sensor_reading_router.post(path="/create-batch/{device_id}", status_code=status.HTTP_201_CREATED, response_model=BatchReadingResponse)
+async def create_sensor_readings_batch(device_id: str, create_reading_batch_request: CreateReadingBatchRequest, user: UserPrincipal = Depends(get_current_principal)):
+
+    try:
+        device_object_id = validate_object_id(device_id)
+        batch_response = await sensor_reading_repository.create_many(
+            user_id=user.id,
+            device_id=device_object_id,
+            create_reading_requests=create_reading_batch_request.readings
+        )
+        return batch_response
+    except DeviceNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@sensor_reading_router.post(path="/ingest", status_code=status.HTTP_201_CREATED, response_model=BatchReadingResponse)
+async def ingest_sensor_readings(create_reading_batch_request: CreateReadingBatchRequest, device: DevicePrincipal = Depends(get_current_device)):
+    """Write-only ingestion authenticated by an X-Device-Key header instead of a user token."""
+
+    try:
+        batch_response = await sensor_reading_repository.create_many_for_device(
+            user_id=device.user_id,
+            device=device.device,
+            create_reading_requests=create_reading_batch_request.readings
+        )
+        return batch_response
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@sensor_reading_router.post(path="/stream/{device_id}", status_code=status.HTTP_201_CREATED, response_model=StreamReadingResponse)
+async def stream_sensor_readings(device_id: str, request: Request, user: UserPrincipal = Depends(get_current_principal)):
+    """Ingests a chunked NDJSON body (one CreateReadingRequest per line) in bounded batches."""
+
+    try:
+        device_object_id = validate_object_id(device_id)
+        stream_response = await sensor_reading_repository.create_stream(
+            user_id=user.id,
+            device_id=device_object_id,
+            lines=iter_ndjson_lines(request.stream())
+        )
+        return stream_response
+    except DeviceNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except InvalidReadingStreamException as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(err)
+        )
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error."
         )
+
+@sensor_reading_router.post(path="/binary/{device_id}", status_code=status.HTTP_201_CREATED, response_model=StreamReadingResponse)
+async def create_sensor_readings_binary(device_id: str, request: Request, user: UserPrincipal = Depends(get_current_principal)):
+    """Ingests an application/octet-stream body of fixed width reading records (see utils.binary_frames)."""
+
+    try:
+        device_object_id = validate_object_id(device_id)
+
+        payload = bytearray()
+        async for chunk in request.stream():
+            payload += chunk
+            if len(payload) > MAX_BINARY_FRAME_SIZE:
+                raise InvalidReadingFrameException(f"Frame exceeds {MAX_BINARY_FRAME_SIZE} bytes.")
+
+        frame_response = await sensor_reading_repository.create_from_frame(
+            user_id=user.id,
+            device_id=device_object_id,
+            payload=bytes(payload)
+        )
+        return frame_response
+    except DeviceNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except InvalidReadingFrameException as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@sensor_reading_router.websocket("/ws/{device_id}")
+async def sensor_readings_websocket(websocket: WebSocket, device_id: str, token: str = Query(...)):
+    """
+    Persistent ingestion channel bound to one device.
+
+    The token and device ownership are checked once at connect time. Each text frame holds one
+    reading or a list of readings ({"data_type": ..., "value": ...}); readings are written in
+    micro-batches and every flush is acknowledged with the running totals.
+    """
+
+    await websocket.accept()
+
+    try:
+        user = await get_principal_from_token(token)
+        device = await sensor_reading_repository.get_owned_device(user.id, validate_object_id(device_id))
+    except Exception:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    loop = asyncio.get_running_loop()
+    batch = []
+    totals = {"received": 0, "inserted": 0, "rejected": 0}
+    deadline = None
+
+    async def flush():
+        errors = []
+        if batch:
+            batch_response = await sensor_reading_repository.create_many_for_device(user.id, device, batch)
+            totals["inserted"] += batch_response.inserted
+            totals["rejected"] += batch_response.rejected
+            errors = [result.model_dump() for result in batch_response.results if result.error]
+            batch.clear()
+        await websocket.send_json({"ack": totals, "errors": errors})
+
+    try:
+        while True:
+            timeout = None if deadline is None else max(deadline - loop.time(), 0)
+
+            try:
+                message = await asyncio.wait_for(websocket.receive_text(), timeout)
+            except asyncio.TimeoutError:
+                await flush()
+                deadline = None
+                continue
+
+            try:
+                frame = json.loads(message)
+                frames = frame if isinstance(frame, list) else [frame]
+                readings = [
+                    CreateReadingRequest.model_validate({"device_id": device.id, **reading})
+                    for reading in frames
+                ]
+            except (ValueError, TypeError, ValidationError):
+                totals["received"] += 1
+                totals["rejected"] += 1
+                await websocket.send_json({"ack": totals, "errors": [{"error": "Invalid reading frame."}]})
+                continue
+
+            totals["received"] += len(readings)
+            batch.extend(readings)
+
+            if deadline is None:
+                deadline = loop.time() + WEBSOCKET_FLUSH_INTERVAL
+
+            if len(batch) >= WEBSOCKET_BATCH_SIZE:
+                await flush()
+                deadline = None
+    except WebSocketDisconnect:
+        if batch:
+            await sensor_reading_repository.create_many_for_device(user.id, device, batch)
+    except Exception:
+        logger.exception("Closing reading channel of device %s after a failed write.", device_id)
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+
+@sensor_reading_router.get(path="/ingestion-metrics", status_code=status.HTTP_200_OK)
+async def get_ingestion_metrics(user: UserPrincipal = Depends(get_ops_principal)):
+
+    if not sensor_reading_ingestion_queue:
+        return {"enabled": False}
+
+    return {"enabled": True, **sensor_reading_ingestion_queue.metrics()}
+
+@sensor_reading_router.get(path="/retention-metrics", status_code=status.HTTP_200_OK)
+async def get_retention_metrics(user: UserPrincipal = Depends(get_ops_principal)):
+
+    if not retention_sweeper:
+        return {"enabled": False}
+
+    return {"enabled": True, **retention_sweeper.metrics()}
     
-@sensor_reading_repository.get(path="/list/{device_id}", status_code=status.HTTP_200_OK, response_model=SensorReadingResponse)
-async def list(
+@sensor_reading_router.get(path="/latest/module/{module_id}", status_code=status.HTTP_200_OK, response_model=List[DeviceLatestReadingsResponse])
+async def get_module_latest_readings(module_id: str, user: UserPrincipal = Depends(get_current_principal)):
+    """Last known value of every data type of every device in a module."""
+
+    try:
+        module_object_id = validate_object_id(module_id)
+        latest_readings = await sensor_reading_repository.get_latest_for_module(user.id, module_object_id)
+        return latest_readings
+    except ModuleNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@sensor_reading_router.get(path="/latest/project/{project_id}", status_code=status.HTTP_200_OK, response_model=List[DeviceLatestReadingsResponse])
+async def get_project_latest_readings(project_id: str, user: UserPrincipal = Depends(get_current_principal)):
+    """Last known value of every data type of every device in a project."""
+
+    try:
+        project_object_id = validate_object_id(project_id)
+        latest_readings = await sensor_reading_repository.get_latest_for_project(user.id, project_object_id)
+        return latest_readings
+    except ProjectNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@sensor_reading_router.get(path="/list/{device_id}", status_code=status.HTTP_200_OK, response_model=Union[SensorReadingPageResponse, ColumnarPageResponse])
+async def list_sensor_readings(
     device_id: str, 
     date: Optional[date] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    user: User = Depends(get_current_user)
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    tz: str = Query("UTC"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    order: Literal["asc", "desc"] = Query("asc"),
+    cursor: Optional[str] = Query(None),
+    format: Literal["json", "columnar"] = Query("json"),
+    user: UserPrincipal = Depends(get_current_principal)
 ):
+    """
+    One page of readings, as one object per reading or, with format=columnar, as one
+    series per data type holding parallel arrays of epoch millisecond timestamps and values.
+    """
+
+    range_start, range_end = validate_time_range(date, start_date, end_date, start, end, tz)
+    page_cursor = validate_cursor(cursor) if cursor else None
 
     try:
 
         device_object_id = validate_object_id(device_id)
 
-        if date:
-            readings = await sensor_reading_repository.list(
+        if format == "columnar":
+            columnar_page = await sensor_reading_repository.get_all_columnar(
                 user_id=user.id,
                 device_id=device_object_id,
-                date_filter={"date": date}
-            )
-        elif start_date and end_date:
-            readings = await sensor_reading_repository.list(
-                user_id=user.id,
-                device_id=device_object_id,
-                date_filter={"start_date": start_date, "end_date": end_date}
-            )
-        else:
-            readings = await sensor_reading_repository.list(
-                user_id=user.id,
-                device_id=device_object_id
+                start=range_start,
+                end=range_end,
+                limit=limit,
+                descending=order == "desc",
+                cursor=page_cursor
             )
+            return FastJSONResponse(content=columnar_page)
+
+        readings = await sensor_reading_repository.get_all(
+            user_id=user.id,
+            device_id=device_object_id,
+            start=range_start,
+            end=range_end,
+            limit=limit,
+            descending=order == "desc",
+            cursor=page_cursor
+        )
         return readings
     except DeviceNotFoundException as err:
         raise HTTPException(
@@ -75,4 +351,183 @@ async def list(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error."
-        )
\ No newline at end of file
+        )
+
+@sensor_reading_router.get(path="/list/module/{module_id}", status_code=status.HTTP_200_OK, response_model=Union[MultiDeviceReadingsResponse, MultiDeviceColumnarResponse])
+async def list_module_sensor_readings(
+    module_id: str,
+    date: Optional[date] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    measurement_type: Optional[MeasurementType] = Query(None),
+    measurement_unit: Optional[MeasurementUnit] = Query(None),
+    tz: str = Query("UTC"),
+    limit: int = Query(MAX_MULTI_DEVICE_READINGS, ge=1, le=MAX_MULTI_DEVICE_READINGS),
+    format: Literal["json", "columnar"] = Query("json"),
+    user: UserPrincipal = Depends(get_current_principal)
+):
+    """Readings of every device of a module in one query, grouped by device, optionally in columnar format."""
+
+    range_start, range_end = validate_time_range(date, start_date, end_date, start, end, tz)
+    data_types = data_type_filters(measurement_type, measurement_unit)
+
+    try:
+        module_object_id = validate_object_id(module_id)
+        device_ids = await sensor_reading_repository.get_module_device_ids(user.id, module_object_id)
+
+        if format == "columnar":
+            columnar_readings = await sensor_reading_repository.get_all_for_devices_columnar(device_ids, range_start, range_end, data_types, limit)
+            return FastJSONResponse(content=columnar_readings)
+
+        readings = await sensor_reading_repository.get_all_for_devices(device_ids, range_start, range_end, data_types, limit)
+        return readings
+    except ModuleNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@sensor_reading_router.get(path="/list/project/{project_id}", status_code=status.HTTP_200_OK, response_model=Union[MultiDeviceReadingsResponse, MultiDeviceColumnarResponse])
+async def list_project_sensor_readings(
+    project_id: str,
+    date: Optional[date] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    measurement_type: Optional[MeasurementType] = Query(None),
+    measurement_unit: Optional[MeasurementUnit] = Query(None),
+    tz: str = Query("UTC"),
+    limit: int = Query(MAX_MULTI_DEVICE_READINGS, ge=1, le=MAX_MULTI_DEVICE_READINGS),
+    format: Literal["json", "columnar"] = Query("json"),
+    user: UserPrincipal = Depends(get_current_principal)
+):
+    """Readings of every device of a project in one query, grouped by device, optionally in columnar format."""
+
+    range_start, range_end = validate_time_range(date, start_date, end_date, start, end, tz)
+    data_types = data_type_filters(measurement_type, measurement_unit)
+
+    try:
+        project_object_id = validate_object_id(project_id)
+        device_ids = await sensor_reading_repository.get_project_device_ids(user.id, project_object_id)
+
+        if format == "columnar":
+            columnar_readings = await sensor_reading_repository.get_all_for_devices_columnar(device_ids, range_start, range_end, data_types, limit)
+            return FastJSONResponse(content=columnar_readings)
+
+        readings = await sensor_reading_repository.get_all_for_devices(device_ids, range_start, range_end, data_types, limit)
+        return readings
+    except ProjectNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@sensor_reading_router.get(path="/aggregate/{device_id}", status_code=status.HTTP_200_OK, response_model=List[SensorReadingAggregateResponse])
+async def aggregate_sensor_readings(
+    device_id: str,
+    interval: str = Query(..., description="Bucket size such as 1m, 15m, 1h or 1d"),
+    date: Optional[date] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    measurement_type: Optional[MeasurementType] = Query(None),
+    measurement_unit: Optional[MeasurementUnit] = Query(None),
+    tz: str = Query("UTC"),
+    user: UserPrincipal = Depends(get_current_principal)
+):
+    """Per interval count, min, max, mean, sum, first and last of the numeric readings, computed by MongoDB."""
+
+    range_start, range_end = validate_time_range(date, start_date, end_date, start, end, tz)
+    unit, bin_size, interval_seconds = validate_interval(interval)
+
+    if range_start and range_end and (range_end - range_start).total_seconds() / interval_seconds > MAX_AGGREGATE_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range and interval would produce more than {MAX_AGGREGATE_BUCKETS} buckets."
+        )
+    
+    data_types = data_type_filters(measurement_type, measurement_unit)
+
+    try:
+        device_object_id = validate_object_id(device_id)
+        aggregates = await sensor_reading_repository.aggregate(
+            user_id=user.id,
+            device_id=device_object_id,
+            unit=unit,
+            bin_size=bin_size,
+            interval_seconds=interval_seconds,
+            start=range_start,
+            end=range_end,
+            data_types=data_types,
+            tz=tz
+        )
+        return aggregates
+    except DeviceNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+
+@sensor_reading_router.get(path="/export/{device_id}", status_code=status.HTTP_200_OK)
+async def export_sensor_readings(
+    device_id: str,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    date: Optional[date] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    tz: str = Query("UTC"),
+    user: UserPrincipal = Depends(get_current_principal)
+):
+    """Streams every reading of the range as CSV or NDJSON without loading it in memory."""
+
+    range_start, range_end = validate_time_range(date, start_date, end_date, start, end, tz)
+
+    try:
+        device_object_id = validate_object_id(device_id)
+        await sensor_reading_repository.get_owned_device(user.id, device_object_id)
+    except DeviceNotFoundException as err:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(err)
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error."
+        )
+    
+    documents = sensor_reading_repository.iter_readings(device_object_id, range_start, range_end)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(documents),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="{device_id}.ndjson"'}
+        )
+    
+    return StreamingResponse(
+        iter_csv(documents),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{device_id}.csv"'}
+    )
\ No newline at end of file
@@ -2,11 +2,11 @@ from fastapi import APIRouter, Body, Depends, HTTPException, status
 
 from api_requests.user_requests import CreateUserRequest
 from api_responses.user_responses import UserResponse
-from database.models.user_model import User
+from database.models.user_model import UserPrincipal
 from database.repositories.user_repository import UserRepository
-from exceptions.user_exceptions import UserConflictException, UserNotFoundException
-from utils.auth import get_current_user
-from utils.hash import hash_password
+from exceptions.user_exceptions import PasswordHasherBusyException, UserConflictException, UserNotFoundException
+from utils.auth import get_current_principal
+from utils.hash import password_hasher
 
 user_repository = UserRepository()
 user_router = APIRouter(prefix="/users", tags=["users"])
@@ -15,7 +15,7 @@ user_router = APIRouter(prefix="/users", tags=["users"])
 async def create_user(create_user_request: CreateUserRequest = Body(...)):
     
     try: 
-        create_user_request.password = hash_password(create_user_request.password)
+        create_user_request.password = await password_hasher.hash(create_user_request.password)
         user = await user_repository.create(create_user_request)
         return user
     except UserConflictException as error:
@@ -23,6 +23,11 @@ async def create_user(create_user_request: CreateUserRequest = Body(...)):
             status_code=status.HTTP_409_CONFLICT,
             detail=error
         )
+    except PasswordHasherBusyException as err:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(err)
+        )
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -30,7 +35,7 @@ async def create_user(create_user_request: CreateUserRequest = Body(...)):
         )
 
 @user_router.delete('/delete', status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(user: User = Depends(get_current_user)):
+async def delete_user(user: UserPrincipal = Depends(get_current_principal)):
 
     try:
         await user_repository.delete(user.id)
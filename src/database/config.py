@@ -2,17 +2,26 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 
 from app_secrets import DATABASE_NAME, DATABASE_URL
+from database.models.device_api_key_model import DeviceApiKey
 from database.models.device_model import Device
+from database.models.latest_sensor_reading_model import LatestSensorReading
 from database.models.module_model import Module
+from database.models.sensor_reading_bucket_model import SensorReadingBucket
 from database.models.sensor_reading_model import SensorReading
+from database.models.sensor_reading_rollup_model import SensorReadingRollup
 from database.models.user_model import User
 from database.models.project_model import Project
+from database.indexes import verify_indexes
+
+DOCUMENT_MODELS = [User, Project, Module, Device, SensorReading, SensorReadingBucket, SensorReadingRollup, LatestSensorReading, DeviceApiKey]
 
 async def connect_to_db(connection_string: str = DATABASE_URL, db_name: str = DATABASE_NAME):
 
     client = AsyncIOMotorClient(connection_string)
     database = client[db_name]
+    # init_beanie creates the indexes declared in each model's Settings
     await init_beanie(
         database=database,
-        document_models=[User, Project, Module, Device, SensorReading]
-    )
\ No newline at end of file
+        document_models=DOCUMENT_MODELS
+    )
+    await verify_indexes(DOCUMENT_MODELS)
\ No newline at end of file
@@ -0,0 +1,21 @@
+from typing import List, Tuple
+
+from database.latest_readings import update_latest_readings
+from database.reading_rollups import rollups_enabled, update_rollups
+
+async def update_derived_readings(readings: List[dict], failed: List[Tuple[int, str]]):
+    """
+    Keeps the rollups and latest values in step with a written batch of encoded readings.
+
+    failed holds the (position, error) of the readings of the batch that were not stored.
+    """
+    failed_positions = {position for position, _ in failed}
+    written = [reading for position, reading in enumerate(readings) if position not in failed_positions]
+
+    if not written:
+        return
+
+    if rollups_enabled():
+        await update_rollups(written)
+
+    await update_latest_readings(written)
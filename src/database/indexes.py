@@ -0,0 +1,112 @@
+"""
+Index verification and query coverage report for the Beanie models.
+
+Indexes are declared in each model's Settings.indexes and created by
+init_beanie. verify_indexes() double checks that they exist after startup, and
+running this module prints which of the repositories' query shapes are still
+answered by a collection scan:
+
+    python -m database.indexes
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Type
+from beanie import Document, PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app_secrets import DATABASE_NAME, DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+def index_keys(keys) -> tuple:
+    return tuple((field, int(direction)) for field, direction in keys)
+
+async def verify_indexes(document_models: List[Type[Document]]) -> List[str]:
+    """Returns "<Model>: <keys>" for every declared index missing from the database."""
+    missing = []
+
+    for model in document_models:
+        declared = getattr(model.get_settings(), "indexes", None) or []
+        existing = await model.get_motor_collection().index_information()
+        existing_keys = {index_keys(index["key"]) for index in existing.values()}
+
+        for index in declared:
+            # Beanie wraps the declared IndexModel objects in IndexModelField
+            keys = index_keys(getattr(index, "index", index).document["key"].items())
+            if keys not in existing_keys:
+                missing.append(f"{model.__name__}: {keys}")
+
+    for entry in missing:
+        logger.warning("Missing index %s", entry)
+
+    return missing
+
+def query_shapes() -> list:
+    """Representative filters issued by the repositories, per collection."""
+    object_id = PydanticObjectId()
+    now = datetime.now(timezone.utc)
+
+    return [
+        ("User", "login by email or username", {"$or": [{"email": "a"}, {"username": "a"}]}, None),
+        ("User", "token version check", {"_id": object_id}, None),
+        ("Project", "list projects", {"user_id": object_id}, None),
+        ("Project", "project ownership", {"user_id": object_id, "_id": object_id}, None),
+        ("Module", "module ownership", {"user_id": object_id, "_id": object_id}, None),
+        ("Module", "modules of project", {"user_id": object_id, "project_id": object_id}, None),
+        ("Device", "device ownership", {"user_id": object_id, "_id": object_id}, None),
+        ("Device", "devices of module", {"user_id": object_id, "module_id": object_id}, None),
+        ("Device", "devices of modules", {"module_id": {"$in": [object_id]}}, None),
+        ("SensorReading", "readings of device", {"device_id": object_id}, None),
+        (
+            "SensorReading",
+            "readings of device in range",
+            {"device_id": object_id, "created_at": {"$gte": now - timedelta(days=1), "$lt": now}},
+            [("created_at", 1), ("_id", 1)]
+        ),
+        ("SensorReading", "readings of user", {"user_id": object_id}, None),
+        ("SensorReadingBucket", "buckets of device in range", {"device_id": object_id, "bucket_start": {"$gt": now - timedelta(days=1), "$lt": now}}, [("bucket_start", 1)]),
+        ("SensorReadingRollup", "rollups of device in range", {"tier": "hour", "device_id": object_id, "bucket_start": {"$gte": now - timedelta(days=1), "$lt": now}}, None),
+        ("LatestSensorReading", "latest values of devices", {"device_id": {"$in": [object_id]}}, None),
+        ("DeviceApiKey", "resolve key", {"key_hash": "a", "revoked": False}, None),
+        ("DeviceApiKey", "keys of device", {"user_id": object_id, "device_id": object_id}, None),
+    ]
+
+def plan_stages(plan: dict) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages += plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+async def coverage_report(database) -> List[dict]:
+    report = []
+
+    for collection_name, description, query, sort in query_shapes():
+        cursor = database[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        report.append({
+            "collection": collection_name,
+            "query": description,
+            "covered": "COLLSCAN" not in stages,
+            "plan": " <- ".join(stage for stage in stages if stage)
+        })
+
+    return report
+
+async def main():
+    client = AsyncIOMotorClient(DATABASE_URL)
+    try:
+        for row in await coverage_report(client[DATABASE_NAME]):
+            status = "ok" if row["covered"] else "NOT COVERED"
+            print(f"{status:<12}{row['collection']:<20}{row['query']:<32}{row['plan']}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
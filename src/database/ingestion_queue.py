@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional, Type
+
+from database.models.sensor_reading_model import SensorReading
+from database.reading_buckets import encode_reading
+from database.reading_writes import write_readings
+from exceptions.sensor_reading_exceptions import IngestionQueueFullException
+
+INGESTION_QUEUE_ENABLED = os.getenv("INGESTION_QUEUE_ENABLED", "false").lower() == "true"
+INGESTION_QUEUE_MAX_SIZE = int(os.getenv("INGESTION_QUEUE_MAX_SIZE", "10000"))
+INGESTION_QUEUE_BATCH_SIZE = int(os.getenv("INGESTION_QUEUE_BATCH_SIZE", "500"))
+INGESTION_QUEUE_FLUSH_INTERVAL = float(os.getenv("INGESTION_QUEUE_FLUSH_INTERVAL", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+class SensorReadingIngestionQueue:
+    """Write-behind buffer that group commits sensor readings with bulk inserts."""
+
+    def __init__(
+            self,
+            model: Type[SensorReading] = SensorReading,
+            max_size: int = INGESTION_QUEUE_MAX_SIZE,
+            batch_size: int = INGESTION_QUEUE_BATCH_SIZE,
+            flush_interval: float = INGESTION_QUEUE_FLUSH_INTERVAL
+    ):
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.worker: Optional[asyncio.Task] = None
+        self.flushing: Optional[asyncio.Future] = None
+        self.pending: List[SensorReading] = []
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flush_count = 0
+        self.last_flush_latency_ms = 0.0
+        self.total_flush_latency_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.worker is not None and not self.worker.done()
+
+    def start(self):
+        if not self.running:
+            self.worker = asyncio.create_task(self._run())
+
+    def submit(self, sensor_reading: SensorReading):
+        """Accepts a reading into the buffer or raises when the buffer is full."""
+        try:
+            self.queue.put_nowait(sensor_reading)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise IngestionQueueFullException()
+        self.accepted += 1
+
+    async def drain(self):
+        """Stops the background worker and flushes every reading still buffered."""
+        if self.worker:
+            # wait_for() swallows a cancellation that races with queue.get() completing,
+            # so keep cancelling until the worker has actually stopped
+            while not self.worker.done():
+                self.worker.cancel()
+                await asyncio.wait({self.worker}, timeout=0.01)
+            self.worker = None
+
+        if self.flushing:
+            await self.flushing
+
+        pending, self.pending = self.pending, []
+        await self._flush(pending)
+
+        while not self.queue.empty():
+            await self._flush(self._take_batch())
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flush_count": self.flush_count,
+            "last_flush_latency_ms": self.last_flush_latency_ms,
+            "avg_flush_latency_ms": self.total_flush_latency_ms / self.flush_count if self.flush_count else 0.0
+        }
+
+    def _take_batch(self) -> List[SensorReading]:
+        batch = []
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = []
+
+            try:
+                batch.append(await self.queue.get())
+                deadline = loop.time() + self.flush_interval
+
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # hand the partially collected batch over to drain()
+                self.pending.extend(batch)
+                raise
+
+            # shield the write so a shutdown in the middle of a flush doesn't lose the batch
+            self.flushing = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self.flushing)
+
+    async def _flush(self, batch: List[SensorReading]):
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        failed = 0
+
+        try:
+            failures = await write_readings(self.model.get_motor_collection(), [encode_reading(reading) for reading in batch])
+            failed = len(failures)
+            if failed:
+                logger.error("Failed writing %d of %d buffered readings.", failed, len(batch))
+        except Exception:
+            failed = len(batch)
+            logger.exception("Failed flushing %d buffered readings.", len(batch))
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.flush_count += 1
+        self.flushed += len(batch) - failed
+        self.failed += failed
+        self.last_flush_latency_ms = latency_ms
+        self.total_flush_latency_ms += latency_ms
+
+sensor_reading_ingestion_queue = SensorReadingIngestionQueue() if INGESTION_QUEUE_ENABLED else None
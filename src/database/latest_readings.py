@@ -0,0 +1,96 @@
+"""
+Last known value per device and data type, kept in a small side collection.
+
+Every write upserts {at, value} with $max, which keeps the newest sample no matter
+in which order batches land. Fill the collection from existing readings with:
+
+    python -m database.latest_readings
+"""
+import asyncio
+from collections import defaultdict
+from typing import Dict, List
+from beanie import PydanticObjectId, init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from database.models.latest_sensor_reading_model import LatestSensorReading
+
+async def update_latest_readings(readings: List[dict]):
+    """Folds written readings into the latest values with one unordered bulk upsert."""
+    latest = {}
+
+    for reading in readings:
+        data_type = reading["data_type"]
+        key = (reading["device_id"], data_type["measurement_type"], data_type["measurement_unit"])
+        if key not in latest or reading["created_at"] > latest[key]["created_at"]:
+            latest[key] = reading
+
+    if not latest:
+        return
+
+    await LatestSensorReading.get_motor_collection().bulk_write(
+        [
+            UpdateOne(
+                {
+                    "device_id": device_id,
+                    "data_type.measurement_type": measurement_type,
+                    "data_type.measurement_unit": measurement_unit
+                },
+                {
+                    "$setOnInsert": {"user_id": reading["user_id"], "data_type": reading["data_type"]},
+                    "$max": {"latest": {"at": reading["created_at"], "value": reading["value"]}}
+                },
+                upsert=True
+            )
+            for (device_id, measurement_type, measurement_unit), reading in latest.items()
+        ],
+        ordered=False
+    )
+
+async def find_latest_readings(device_ids: List[PydanticObjectId]) -> Dict[PydanticObjectId, List[LatestSensorReading]]:
+    """Latest values of the devices, one indexed lookup for all of them."""
+    latest = defaultdict(list)
+
+    async for latest_reading in LatestSensorReading.find({"device_id": {"$in": device_ids}}):
+        latest[latest_reading.device_id].append(latest_reading)
+
+    return latest
+
+async def delete_device_latest_readings(device_ids: List[PydanticObjectId]):
+    await LatestSensorReading.find({"device_id": {"$in": device_ids}}).delete()
+
+async def delete_user_latest_readings(user_id: PydanticObjectId):
+    await LatestSensorReading.find({"user_id": user_id}).delete()
+
+async def backfill_latest_readings():
+    """Sets the latest value of every device from its newest reading of each declared data type."""
+    from database.models.device_model import Device
+    from database.models.sensor_reading_model import SensorReading
+    from database.repositories.sensor_reading_repository import SensorReadingRepository
+
+    repository = SensorReadingRepository(SensorReading)
+
+    async for device in Device.find_all():
+        readings = []
+
+        for data_type in device.data_types:
+            reading = await repository.find_newest_reading(device.id, data_type.model_dump())
+            if reading:
+                readings.append({**reading, "user_id": device.user_id, "device_id": device.id})
+
+        await update_latest_readings(readings)
+        print(f"Backfilled {len(readings)} latest values of device {device.id}.")
+
+async def main():
+    from app_secrets import DATABASE_NAME, DATABASE_URL
+    from database.config import DOCUMENT_MODELS
+
+    client = AsyncIOMotorClient(DATABASE_URL)
+    try:
+        await init_beanie(database=client[DATABASE_NAME], document_models=DOCUMENT_MODELS)
+        await backfill_latest_readings()
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Moves the existing SensorReading collection into a MongoDB time-series collection.
+
+The old collection is renamed to <name>_backup, a time-series collection is
+created under the original name and the readings are copied over in batches.
+The backup can be dropped once the migration has been checked. Run it once,
+with ingestion stopped, before enabling SENSOR_READINGS_TIMESERIES:
+
+    python -m database.migrations.sensor_readings_timeseries
+
+Needs MongoDB 7.0 or newer. Before 7.0, time-series collections only accept
+deletes that filter on the meta field (device_id). The user deletion cascade and
+the retention sweeper both delete by other fields.
+"""
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from app_secrets import DATABASE_NAME, DATABASE_URL
+from database.models.sensor_reading_model import SENSOR_READINGS_TIMESERIES_CONFIG, SensorReading
+
+BATCH_SIZE = 5000
+
+async def migrate(database: AsyncIOMotorDatabase, collection_name: str = SensorReading.__name__):
+
+    backup_name = f"{collection_name}_backup"
+    collection_names = await database.list_collection_names()
+
+    if collection_name in collection_names:
+        options = await database[collection_name].options()
+
+        if "timeseries" in options:
+            interrupted = (
+                backup_name in collection_names
+                and await database[collection_name].count_documents({}) < await database[backup_name].count_documents({})
+            )
+
+            if not interrupted:
+                print(f"{collection_name} is already a time-series collection.")
+                return
+            
+            # a previous run stopped while copying, start the copy over
+            await database.drop_collection(collection_name)
+        else:
+            # time-series collections can't be renamed, so the old collection moves aside instead
+            await database[collection_name].rename(backup_name)
+
+    await database.create_collection(**SENSOR_READINGS_TIMESERIES_CONFIG.build_query(collection_name))
+
+    if backup_name not in await database.list_collection_names():
+        print(f"Created time-series collection {collection_name}.")
+        return
+
+    source = database[backup_name]
+    target = database[collection_name]
+    copied = 0
+    batch = []
+
+    async for document in source.find({}, batch_size=BATCH_SIZE):
+        batch.append(document)
+        if len(batch) >= BATCH_SIZE:
+            await target.insert_many(batch, ordered=False)
+            copied += len(batch)
+            batch = []
+            print(f"Copied {copied} readings...")
+
+    if batch:
+        await target.insert_many(batch, ordered=False)
+        copied += len(batch)
+
+    source_count = await source.count_documents({})
+
+    if source_count != copied:
+        raise RuntimeError(f"Copied {copied} readings but {backup_name} has {source_count}, run the migration again.")
+
+    print(f"Migrated {copied} readings, previous collection kept as {backup_name}.")
+
+async def main():
+    client = AsyncIOMotorClient(DATABASE_URL)
+    try:
+        await migrate(client[DATABASE_NAME])
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from typing import Optional
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, ConfigDict, Field
+from pymongo import ASCENDING, IndexModel
+
+from database.models.device_model import Device
+
+class DeviceApiKey(Document):
+    user_id: PydanticObjectId
+    device_id: PydanticObjectId
+    key_hash: str
+    name: Optional[str] = Field(default=None, max_length=50)
+    revoked: bool = False
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    class Settings:
+        indexes = [
+            IndexModel([("key_hash", ASCENDING)], unique=True),
+            IndexModel([("user_id", ASCENDING), ("device_id", ASCENDING)])
+        ]
+
+class DevicePrincipal(BaseModel):
+    """Identity resolved from a device API key: the owning user and the bound device."""
+    key_id: PydanticObjectId
+    user_id: PydanticObjectId
+    device: Device
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -3,7 +3,9 @@ from enum import Enum
 from typing import List, Optional
 from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, ConfigDict, Field
+from pymongo import ASCENDING, IndexModel
 
+from database.models.retention_policy_model import RetentionPolicy
 from enums.data_type import DataType
 from enums.device_type import DeviceType
 
@@ -15,7 +17,13 @@ class Device(Document):
     description: Optional[str] = Field(max_length=200)
     device_type: DeviceType
     data_types: List[DataType]
+    retention: Optional[RetentionPolicy] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    class Settings:
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("module_id", ASCENDING)])
+        ]
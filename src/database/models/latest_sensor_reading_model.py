@@ -0,0 +1,28 @@
+from beanie import Document, PydanticObjectId
+from pydantic import ConfigDict
+from pymongo import ASCENDING, IndexModel
+
+from database.models.sensor_reading_rollup_model import TimedValue
+from enums.data_type import DataType
+
+class LatestSensorReading(Document):
+    """Last known value of one device and data type."""
+    user_id: PydanticObjectId
+    device_id: PydanticObjectId
+    data_type: DataType
+    latest: TimedValue
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [
+                    ("device_id", ASCENDING),
+                    ("data_type.measurement_type", ASCENDING),
+                    ("data_type.measurement_unit", ASCENDING)
+                ],
+                unique=True
+            ),
+            IndexModel([("user_id", ASCENDING)])
+        ]
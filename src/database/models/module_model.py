@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from typing import List, Optional
 from beanie import Document, PydanticObjectId, Replace, before_event
 from pydantic import ConfigDict, Field
+from pymongo import ASCENDING, IndexModel
 
 class Module(Document):
     user_id: PydanticObjectId
@@ -14,6 +15,11 @@ class Module(Document):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    class Settings:
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("project_id", ASCENDING)])
+        ]
+
     @before_event(Replace)
     def update_timestamp(self):
         """Updates the updated_at timestamp before saving"""
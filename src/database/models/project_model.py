@@ -1,18 +1,27 @@
 from beanie import Document, PydanticObjectId, before_event, Replace
 from pydantic import ConfigDict, Field
+from pymongo import ASCENDING, IndexModel
 from typing import Optional, List
 from datetime import datetime, timezone
 
+from database.models.retention_policy_model import RetentionPolicy
+
 class Project(Document):
     user_id: PydanticObjectId
     name: str = Field(max_length=50)
     description: Optional[str] = Field(max_length=200)
     modules: List[PydanticObjectId] = Field(default_factory=list)
+    retention: Optional[RetentionPolicy] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    class Settings:
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)])
+        ]
+
     @before_event(Replace)
     def update_timestamp(self):
         """Updates the updated_at timestamp before saving"""
@@ -0,0 +1,30 @@
+from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+
+class RetentionPolicy(BaseModel):
+    """
+    How many days each resolution of a device's readings is kept, None keeps it forever.
+
+    Rollup tiers can't expire before the raw readings they summarize, so long range
+    charts keep working after the raw data is gone.
+    """
+    raw_days: Optional[int] = Field(default=None, gt=0)
+    minute_days: Optional[int] = Field(default=None, gt=0)
+    hour_days: Optional[int] = Field(default=None, gt=0)
+    day_days: Optional[int] = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def validate_tiers(self):
+        if self.raw_days is None:
+            if any(days is not None for days in (self.minute_days, self.hour_days, self.day_days)):
+                raise ValueError("Rollups can't expire while raw readings are kept forever.")
+            return self
+
+        for tier, days in (("minute", self.minute_days), ("hour", self.hour_days), ("day", self.day_days)):
+            if days is not None and days < self.raw_days:
+                raise ValueError(f"The {tier} rollups must be kept at least as long as the raw readings.")
+
+        return self
+
+    def tier_days(self, tier: str) -> Optional[int]:
+        return getattr(self, f"{tier}_days")
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from beanie import Document, PydanticObjectId
+from pydantic import ConfigDict, Field
+from pymongo import ASCENDING, IndexModel
+
+from enums.data_type import DataType
+
+class SensorReadingBucket(Document):
+    """Readings of one device and data type inside a fixed time window."""
+    user_id: PydanticObjectId
+    device_id: PydanticObjectId
+    data_type: DataType
+    bucket_start: datetime
+    timestamps: List[datetime] = Field(default_factory=list)
+    values: List[Any] = Field(default_factory=list)
+    reading_count: int = 0
+    numeric_count: int = 0
+    sum: float = 0
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [
+                    ("device_id", ASCENDING),
+                    ("bucket_start", ASCENDING),
+                    ("data_type.measurement_type", ASCENDING),
+                    ("data_type.measurement_unit", ASCENDING)
+                ],
+                unique=True
+            ),
+            IndexModel([("user_id", ASCENDING)])
+        ]
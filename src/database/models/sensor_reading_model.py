@@ -1,10 +1,25 @@
+import os
 from datetime import datetime, timezone
 from typing import Any
-from beanie import Document, PydanticObjectId
+from beanie import Document, Granularity, PydanticObjectId, TimeSeriesConfig
 from pydantic import ConfigDict, Field
+from pymongo import ASCENDING, IndexModel
 
 from enums.data_type import DataType
 
+# Opt-in because the collection layout is fixed when MongoDB creates it; existing
+# deployments have to run database/migrations/sensor_readings_timeseries.py first.
+# Requires MongoDB 7.0 or newer: only device_id is the meta field, and user deletion
+# (filters on user_id) and the retention sweeper (_id batches) delete by other
+# fields, which earlier versions reject on time-series collections.
+SENSOR_READINGS_TIMESERIES = os.getenv("SENSOR_READINGS_TIMESERIES", "false").lower() == "true"
+
+SENSOR_READINGS_TIMESERIES_CONFIG = TimeSeriesConfig(
+    time_field="created_at",
+    meta_field="device_id",
+    granularity=Granularity.seconds
+)
+
 class SensorReading(Document):
     user_id: PydanticObjectId
     device_id: PydanticObjectId
@@ -12,4 +27,11 @@ class SensorReading(Document):
     data_type: DataType
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
\ No newline at end of file
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    class Settings:
+        timeseries = SENSOR_READINGS_TIMESERIES_CONFIG if SENSOR_READINGS_TIMESERIES else None
+        indexes = [
+            IndexModel([("device_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("user_id", ASCENDING)])
+        ]
@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Any, Optional
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, ConfigDict
+from pymongo import ASCENDING, IndexModel
+
+from enums.data_type import DataType
+
+class TimedValue(BaseModel):
+    at: datetime
+    value: Any
+
+class SensorReadingRollup(Document):
+    """Numeric statistics of one device and data type over a minute, hour or day."""
+    tier: str
+    user_id: PydanticObjectId
+    device_id: PydanticObjectId
+    data_type: DataType
+    bucket_start: datetime
+    reading_count: int = 0
+    sum: float = 0
+    min: Optional[float] = None
+    max: Optional[float] = None
+    first: Optional[TimedValue] = None
+    last: Optional[TimedValue] = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [
+                    ("tier", ASCENDING),
+                    ("device_id", ASCENDING),
+                    ("bucket_start", ASCENDING),
+                    ("data_type.measurement_type", ASCENDING),
+                    ("data_type.measurement_unit", ASCENDING)
+                ],
+                unique=True
+            ),
+            IndexModel([("user_id", ASCENDING)])
+        ]
@@ -1,19 +1,35 @@
 from datetime import datetime, timezone
-from beanie import Document, before_event, Replace
-from pydantic import ConfigDict, Field, EmailStr
+from beanie import Document, PydanticObjectId, before_event, Replace
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
+from pymongo import ASCENDING, IndexModel
 from typing import List
 
 class User(Document):
-    username: str = Field(max_length=30, json_schema_extra={"unique": True})
-    email: EmailStr = Field(json_schema_extra={"unique": True})
+    username: str = Field(max_length=30)
+    email: EmailStr
     password: str = Field(max_length=256)  
     projects: List[str] = Field(default_factory=list)  
+    token_version: int = 0
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    class Settings:
+        indexes = [
+            IndexModel([("username", ASCENDING)], unique=True),
+            IndexModel([("email", ASCENDING)], unique=True)
+        ]
+
     @before_event(Replace)
     def update_timestamp(self):
         """Updates the updated_at timestamp before saving"""
         self.updated_at = datetime.now(timezone.utc)
+
+class UserPrincipal(BaseModel):
+    """Identity carried by a user token's signed claims, resolved without loading the user."""
+    id: PydanticObjectId
+    email: str
+    token_version: int = 0
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
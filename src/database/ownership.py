@@ -0,0 +1,168 @@
+from typing import List, Optional
+from beanie import PydanticObjectId
+from pydantic import BaseModel, ConfigDict
+
+from database.models.device_model import Device
+from database.models.module_model import Module
+from database.models.project_model import Project
+from utils.cache import TTLCache
+
+# Ownership never changes after creation, so entries only go stale when an entity is
+# deleted. Deletes are applied to this process's index immediately; other processes
+# keep authorizing a deleted device, module or project until its entry expires.
+OWNERSHIP_CACHE_TTL = 300.0
+OWNERSHIP_CACHE_SIZE = 50000
+
+class ModuleOwnership(BaseModel):
+    user_id: PydanticObjectId
+    project_id: PydanticObjectId
+
+class DeviceOwnership(BaseModel):
+    """Ownership chain of a device, with the device itself for the reading write paths."""
+    user_id: PydanticObjectId
+    module_id: PydanticObjectId
+    project_id: PydanticObjectId
+    device: Device
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+class OwnershipIndex:
+    """
+    In-process index of project -> user, module -> (user, project) and
+    device -> (user, module, project), filled lazily on the first authorization
+    check of each entity and primed by the create paths.
+    """
+
+    def __init__(self, max_size: int = OWNERSHIP_CACHE_SIZE, ttl: float = OWNERSHIP_CACHE_TTL):
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def project_owner(self, project_id: PydanticObjectId) -> Optional[PydanticObjectId]:
+
+        user_id = self.cache.get(("project", project_id))
+
+        if user_id:
+            return user_id
+
+        project = await Project.get_motor_collection().find_one({"_id": project_id}, projection={"user_id": 1})
+
+        if not project:
+            return None
+
+        self.add_project(project_id, project["user_id"])
+        return project["user_id"]
+
+    async def module(self, module_id: PydanticObjectId) -> Optional[ModuleOwnership]:
+
+        ownership = self.cache.get(("module", module_id))
+
+        if ownership:
+            return ownership
+
+        module = await Module.get_motor_collection().find_one({"_id": module_id}, projection={"user_id": 1, "project_id": 1})
+
+        if not module:
+            return None
+
+        ownership = ModuleOwnership(user_id=module["user_id"], project_id=module["project_id"])
+        self.cache.set(("module", module_id), ownership)
+        return ownership
+
+    async def device(self, device_id: PydanticObjectId) -> Optional[DeviceOwnership]:
+
+        ownership = self.cache.get(("device", device_id))
+
+        if ownership:
+            return ownership
+
+        device = await Device.find_one(Device.id == device_id)
+
+        if not device:
+            return None
+
+        module = await self.module(device.module_id)
+
+        if not module:
+            return None
+
+        return self.add_device(device, module.project_id)
+
+    async def owns_project(self, user_id: PydanticObjectId, project_id: PydanticObjectId) -> bool:
+        return await self.project_owner(project_id) == user_id
+
+    async def owned_module(
+            self,
+            user_id: PydanticObjectId,
+            module_id: PydanticObjectId,
+            project_id: Optional[PydanticObjectId] = None
+    ) -> Optional[ModuleOwnership]:
+        """The module's ownership when it belongs to the user (and to project_id, when given)."""
+
+        ownership = await self.module(module_id)
+
+        if not ownership or ownership.user_id != user_id:
+            return None
+
+        if project_id is not None and ownership.project_id != project_id:
+            return None
+
+        return ownership
+
+    async def owned_device(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId,
+            module_id: Optional[PydanticObjectId] = None
+    ) -> Optional[DeviceOwnership]:
+        """The device's ownership when it belongs to the user (and to module_id, when given)."""
+
+        ownership = await self.device(device_id)
+
+        if not ownership or ownership.user_id != user_id:
+            return None
+
+        if module_id is not None and ownership.module_id != module_id:
+            return None
+
+        return ownership
+
+    def add_project(self, project_id: PydanticObjectId, user_id: PydanticObjectId):
+        self.cache.set(("project", project_id), user_id)
+
+    def add_module(self, module: Module):
+        self.cache.set(("module", module.id), ModuleOwnership(user_id=module.user_id, project_id=module.project_id))
+
+    def add_device(self, device: Device, project_id: PydanticObjectId) -> DeviceOwnership:
+        ownership = DeviceOwnership(user_id=device.user_id, module_id=device.module_id, project_id=project_id, device=device)
+        self.cache.set(("device", device.id), ownership)
+        return ownership
+
+    def forget_projects(self, project_ids: List[PydanticObjectId]):
+        """Drops the projects and every module and device indexed under them."""
+        self.cache.delete_where(
+            lambda key, value: (key[0] == "project" and key[1] in project_ids)
+            or (key[0] != "project" and value.project_id in project_ids)
+        )
+
+    def forget_modules(self, module_ids: List[PydanticObjectId]):
+        """Drops the modules and every device indexed under them."""
+        self.cache.delete_where(
+            lambda key, value: (key[0] == "module" and key[1] in module_ids)
+            or (key[0] == "device" and value.module_id in module_ids)
+        )
+
+    def forget_devices(self, device_ids: List[PydanticObjectId]):
+        for device_id in device_ids:
+            self.cache.delete(("device", device_id))
+
+    def forget_user(self, user_id: PydanticObjectId):
+        self.cache.delete_where(
+            lambda key, value: (value if key[0] == "project" else value.user_id) == user_id
+        )
+
+    def clear(self):
+        self.cache.clear()
+
+    def metrics(self) -> dict:
+        return self.cache.metrics()
+
+ownership_index = OwnershipIndex()
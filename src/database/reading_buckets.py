@@ -0,0 +1,189 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+from beanie import PydanticObjectId
+from beanie.odm.queries.find import FindMany
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from database.models.sensor_reading_bucket_model import SensorReadingBucket
+from database.models.sensor_reading_model import SensorReading
+
+# "documents" stores one SensorReading per sample, "buckets" appends samples to
+# SensorReadingBucket documents covering READING_BUCKET_SECONDS each.
+SENSOR_READINGS_STORAGE = os.getenv("SENSOR_READINGS_STORAGE", "documents")
+READING_BUCKET_SECONDS = int(os.getenv("READING_BUCKET_SECONDS", "3600"))
+
+def buckets_enabled() -> bool:
+    return SENSOR_READINGS_STORAGE == "buckets"
+
+def is_numeric(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def bucket_start(created_at: datetime, bucket_seconds: int = READING_BUCKET_SECONDS) -> datetime:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    epoch_seconds = int(created_at.timestamp())
+    return datetime.fromtimestamp(epoch_seconds - epoch_seconds % bucket_seconds, tz=timezone.utc)
+
+def encode_reading(sensor_reading: SensorReading) -> dict:
+    document = {
+        "user_id": sensor_reading.user_id,
+        "device_id": sensor_reading.device_id,
+        "value": sensor_reading.value,
+        "data_type": sensor_reading.data_type.model_dump(),
+        "created_at": sensor_reading.created_at
+    }
+    # readings given an id up front keep it when stored as documents
+    if sensor_reading.id:
+        document["_id"] = sensor_reading.id
+    return document
+
+def data_type_key(data_type: dict) -> Tuple[str, str]:
+    return data_type["measurement_type"], data_type["measurement_unit"]
+
+async def append_readings(readings: List[dict], bucket_seconds: int = READING_BUCKET_SECONDS) -> List[Tuple[int, str]]:
+    """
+    Appends encoded readings to their buckets with one $push/$inc upsert per bucket.
+
+    Returns the (position, error) of every reading whose bucket update failed.
+    """
+    if not readings:
+        return []
+
+    groups = defaultdict(list)
+    for position, reading in enumerate(readings):
+        key = (reading["device_id"], data_type_key(reading["data_type"]), bucket_start(reading["created_at"], bucket_seconds))
+        groups[key].append(position)
+
+    operations = []
+    operation_positions = []
+
+    for (device_id, _, start), positions in groups.items():
+        group = [readings[position] for position in positions]
+        numeric_values = [reading["value"] for reading in group if is_numeric(reading["value"])]
+
+        update = {
+            "$setOnInsert": {
+                "user_id": group[0]["user_id"],
+                "data_type": group[0]["data_type"]
+            },
+            "$push": {
+                "timestamps": {"$each": [reading["created_at"] for reading in group]},
+                "values": {"$each": [reading["value"] for reading in group]}
+            },
+            "$inc": {
+                "reading_count": len(group),
+                "numeric_count": len(numeric_values),
+                "sum": sum(numeric_values)
+            }
+        }
+
+        if numeric_values:
+            update["$min"] = {"min": min(numeric_values)}
+            update["$max"] = {"max": max(numeric_values)}
+
+        operations.append(
+            UpdateOne(
+                {
+                    "device_id": device_id,
+                    "data_type.measurement_type": group[0]["data_type"]["measurement_type"],
+                    "data_type.measurement_unit": group[0]["data_type"]["measurement_unit"],
+                    "bucket_start": start
+                },
+                update,
+                upsert=True
+            )
+        )
+        operation_positions.append(positions)
+
+    try:
+        await SensorReadingBucket.get_motor_collection().bulk_write(operations, ordered=False)
+    except BulkWriteError as err:
+        return [
+            (position, write_error.get("errmsg", "Write failed."))
+            for write_error in err.details.get("writeErrors", [])
+            for position in operation_positions[write_error["index"]]
+        ]
+    
+    return []
+
+def bucket_range_query(
+        device_id: PydanticObjectId,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        bucket_seconds: int = READING_BUCKET_SECONDS
+) -> dict:
+    """Filter for the buckets of a device overlapping the half-open [start, end) range."""
+    query = {"device_id": device_id}
+    bucket_range = {}
+
+    if start:
+        bucket_range["$gt"] = start - timedelta(seconds=bucket_seconds)
+    if end:
+        bucket_range["$lt"] = end
+    if bucket_range:
+        query["bucket_start"] = bucket_range
+
+    return query
+
+def find_buckets(
+        device_id: PydanticObjectId,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        descending: bool = False,
+        bucket_seconds: int = READING_BUCKET_SECONDS
+) -> FindMany[SensorReadingBucket]:
+    """Query for the buckets of a device overlapping the half-open [start, end) range, in time order."""
+    return SensorReadingBucket.find(
+        bucket_range_query(device_id, start, end, bucket_seconds)
+    ).sort("-bucket_start" if descending else "+bucket_start")
+
+async def iter_bucket_windows(
+        device_id: PydanticObjectId,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        descending: bool = False,
+        bucket_seconds: int = READING_BUCKET_SECONDS
+) -> AsyncIterator[List[SensorReadingBucket]]:
+    """
+    Yields the device's buckets overlapping [start, end) grouped by bucket_start, in time order.
+
+    A device has one bucket per data type and window, so readings are only in time
+    order once every bucket of a window has been merged.
+    """
+    window = []
+
+    async for bucket in find_buckets(device_id, start, end, descending, bucket_seconds):
+        if window and bucket.bucket_start != window[0].bucket_start:
+            yield window
+            window = []
+        window.append(bucket)
+
+    if window:
+        yield window
+
+async def delete_device_buckets(device_ids: List[PydanticObjectId]):
+    await SensorReadingBucket.find({"device_id": {"$in": device_ids}}).delete()
+
+async def delete_user_buckets(user_id: PydanticObjectId):
+    await SensorReadingBucket.find({"user_id": user_id}).delete()
+
+async def delete_device_buckets_before(
+        device_id: PydanticObjectId,
+        cutoff: datetime,
+        batch_size: int,
+        bucket_seconds: int = READING_BUCKET_SECONDS
+) -> int:
+    """Deletes, batch_size at a time, the buckets of a device that end at or before cutoff."""
+    collection = SensorReadingBucket.get_motor_collection()
+    query = {"device_id": device_id, "bucket_start": {"$lte": cutoff - timedelta(seconds=bucket_seconds)}}
+    deleted = 0
+
+    while True:
+        ids = [bucket["_id"] async for bucket in collection.find(query, projection={"_id": 1}).limit(batch_size)]
+        if not ids:
+            return deleted
+        result = await collection.delete_many({"_id": {"$in": ids}})
+        deleted += result.deleted_count
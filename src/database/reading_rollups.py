@@ -0,0 +1,258 @@
+"""
+Minute, hour and day rollups of numeric sensor readings.
+
+Rollups are upserted with $inc/$min/$max on every write so they never need a
+read-modify-write. first and last are stored as {at, value} documents: BSON
+compares embedded documents field by field, so $min/$max on them keep the
+earliest and the latest sample. Backfill rollups from raw readings with:
+
+    python -m database.reading_rollups [--device DEVICE_ID]
+
+The backfill only replaces rollups from the day of each device's oldest stored
+reading up to the start of the current UTC day, so rollups that outlived their raw
+readings under retention survive it and it leaves the day still being ingested alone.
+"""
+import argparse
+import asyncio
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from beanie import PydanticObjectId, init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from database.models.sensor_reading_rollup_model import SensorReadingRollup
+from database.reading_buckets import bucket_start, is_numeric
+
+READING_ROLLUPS_ENABLED = os.getenv("READING_ROLLUPS_ENABLED", "true").lower() == "true"
+
+# coarsest first, so queries can pick the first tier that divides their interval
+ROLLUP_TIERS = {"day": 86400, "hour": 3600, "minute": 60}
+
+REBUILD_BATCH_SIZE = 10000
+
+def rollups_enabled() -> bool:
+    return READING_ROLLUPS_ENABLED
+
+def rollup_segments(
+        interval_seconds: int,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        tz: str = "UTC"
+) -> List[Tuple[Optional[str], Optional[datetime], Optional[datetime]]]:
+    """
+    Splits [start, end) into time ordered (tier, start, end) segments, each served by the
+    coarsest tier whose buckets fit inside it and tile the interval. Unaligned edges fall
+    through to finer tiers, and what no tier covers (e.g. 30s bins) to the raw readings
+    as a None tier, so ranges that don't start on a day still read day rollups.
+    """
+    # rollup buckets are aligned in UTC, only minute buckets line up with every time zone offset
+    tiers = [
+        tier for tier, tier_seconds in ROLLUP_TIERS.items()
+        if not interval_seconds % tier_seconds and (tz == "UTC" or tier == "minute")
+    ]
+
+    def split(tiers: List[str], start: Optional[datetime], end: Optional[datetime]):
+        if not tiers:
+            return [(None, start, end)]
+
+        tier, finer_tiers = tiers[0], tiers[1:]
+        tier_seconds = ROLLUP_TIERS[tier]
+        inner_start = start and bucket_start(start, tier_seconds)
+        if inner_start and inner_start < start:
+            inner_start += timedelta(seconds=tier_seconds)
+        inner_end = end and bucket_start(end, tier_seconds)
+
+        if inner_start and inner_end and inner_start >= inner_end:
+            return split(finer_tiers, start, end)
+
+        segments = []
+        if inner_start and inner_start > start:
+            segments += split(finer_tiers, start, inner_start)
+        segments.append((tier, inner_start, inner_end))
+        if inner_end and inner_end < end:
+            segments += split(finer_tiers, inner_end, end)
+        return segments
+
+    return split(tiers, start, end)
+
+async def update_rollups(readings: List[dict]):
+    """Folds written readings into every rollup tier with one unordered bulk upsert."""
+    groups = defaultdict(list)
+
+    for reading in readings:
+        if not is_numeric(reading["value"]):
+            continue
+        data_type = reading["data_type"]
+        for tier, tier_seconds in ROLLUP_TIERS.items():
+            key = (
+                tier,
+                reading["device_id"],
+                data_type["measurement_type"],
+                data_type["measurement_unit"],
+                bucket_start(reading["created_at"], tier_seconds)
+            )
+            groups[key].append(reading)
+
+    if not groups:
+        return
+
+    operations = []
+
+    for (tier, device_id, measurement_type, measurement_unit, start), group in groups.items():
+        values = [reading["value"] for reading in group]
+        first = min(group, key=lambda reading: reading["created_at"])
+        last = max(group, key=lambda reading: reading["created_at"])
+
+        operations.append(
+            UpdateOne(
+                {
+                    "tier": tier,
+                    "device_id": device_id,
+                    "bucket_start": start,
+                    "data_type.measurement_type": measurement_type,
+                    "data_type.measurement_unit": measurement_unit
+                },
+                {
+                    "$setOnInsert": {"user_id": group[0]["user_id"], "data_type": group[0]["data_type"]},
+                    "$inc": {"reading_count": len(values), "sum": sum(values)},
+                    "$min": {"min": min(values), "first": {"at": first["created_at"], "value": first["value"]}},
+                    "$max": {"max": max(values), "last": {"at": last["created_at"], "value": last["value"]}}
+                },
+                upsert=True
+            )
+        )
+
+    await SensorReadingRollup.get_motor_collection().bulk_write(operations, ordered=False)
+
+def rollup_pipeline(
+        tier: str,
+        device_id: PydanticObjectId,
+        unit: str,
+        bin_size: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        data_type_match: Optional[dict] = None,
+        tz: str = "UTC",
+        max_buckets: int = 10000
+) -> List[dict]:
+    """Re-groups rollups of a tier into the requested interval, with the same output as a raw aggregation."""
+    match = {"tier": tier, "device_id": device_id, **(data_type_match or {})}
+    bucket_range = {}
+    if start:
+        bucket_range["$gte"] = start
+    if end:
+        bucket_range["$lt"] = end
+    if bucket_range:
+        match["bucket_start"] = bucket_range
+
+    return [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": {
+                    "bucket_start": {
+                        "$dateTrunc": {"date": "$bucket_start", "unit": unit, "binSize": bin_size, "timezone": tz}
+                    },
+                    "measurement_type": "$data_type.measurement_type",
+                    "measurement_unit": "$data_type.measurement_unit"
+                },
+                "count": {"$sum": "$reading_count"},
+                "min": {"$min": "$min"},
+                "max": {"$max": "$max"},
+                "sum": {"$sum": "$sum"},
+                "first": {"$min": "$first"},
+                "last": {"$max": "$last"}
+            }
+        },
+        {
+            "$set": {
+                "mean": {"$divide": ["$sum", "$count"]},
+                "first": "$first.value",
+                "last": "$last.value"
+            }
+        },
+        {"$sort": {"_id.bucket_start": 1, "_id.measurement_type": 1, "_id.measurement_unit": 1}},
+        {"$limit": max_buckets}
+    ]
+
+async def delete_device_rollups(device_ids: List[PydanticObjectId]):
+    await SensorReadingRollup.find({"device_id": {"$in": device_ids}}).delete()
+
+async def delete_user_rollups(user_id: PydanticObjectId):
+    await SensorReadingRollup.find({"user_id": user_id}).delete()
+
+async def rebuild_device_rollups(device, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    """
+    Recomputes every tier of a device's rollups in [start, end) from its stored readings.
+
+    start and end must be day aligned so no rollup bucket straddles them. Without start
+    the rebuild begins at the day of the oldest stored reading, so the rollups of days
+    whose readings retention already expired are kept. Without end it stops before the
+    current UTC day: readings written between the delete and the re-fold would be
+    counted twice, so only rebuild a range still receiving readings with ingestion
+    stopped. Returns the number of readings folded in.
+    """
+    from database.models.sensor_reading_model import SensorReading
+    from database.repositories.sensor_reading_repository import SensorReadingRepository
+
+    repository = SensorReadingRepository(SensorReading)
+
+    if not end:
+        end = bucket_start(datetime.now(timezone.utc), ROLLUP_TIERS["day"])
+
+    if not start:
+        oldest = None
+        async for reading in repository.iter_readings(device.id, None, end):
+            oldest = reading["created_at"]
+            break
+        if not oldest:
+            return 0
+        start = bucket_start(oldest, ROLLUP_TIERS["day"])
+
+    if start >= end:
+        return 0
+
+    await SensorReadingRollup.get_motor_collection().delete_many({"device_id": device.id, "bucket_start": {"$gte": start, "$lt": end}})
+
+    rebuilt = 0
+    batch = []
+
+    async for reading in repository.iter_readings(device.id, start, end):
+        batch.append({**reading, "user_id": device.user_id, "device_id": device.id})
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            await update_rollups(batch)
+            rebuilt += len(batch)
+            batch = []
+
+    await update_rollups(batch)
+
+    return rebuilt + len(batch)
+
+async def rebuild_rollups(device_id: Optional[PydanticObjectId] = None):
+    """Recomputes the rollups of one or every device over the span of its stored readings."""
+    from database.models.device_model import Device
+
+    devices = Device.find({"_id": device_id}) if device_id else Device.find_all()
+
+    async for device in devices:
+        rebuilt = await rebuild_device_rollups(device)
+        print(f"Rebuilt rollups of device {device.id} from {rebuilt} readings.")
+
+async def main(device_id: Optional[str]):
+    from app_secrets import DATABASE_NAME, DATABASE_URL
+    from database.config import DOCUMENT_MODELS
+
+    client = AsyncIOMotorClient(DATABASE_URL)
+    try:
+        await init_beanie(database=client[DATABASE_NAME], document_models=DOCUMENT_MODELS)
+        await rebuild_rollups(PydanticObjectId(device_id) if device_id else None)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild sensor reading rollups from raw readings.")
+    parser.add_argument("--device", help="only rebuild the rollups of this device id")
+    args = parser.parse_args()
+    asyncio.run(main(args.device))
@@ -0,0 +1,48 @@
+import logging
+from typing import List, Tuple
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+
+from database.derived_readings import update_derived_readings
+from database.reading_buckets import append_readings, buckets_enabled
+
+logger = logging.getLogger(__name__)
+
+def failed_writes(err: BulkWriteError) -> List[Tuple[int, str]]:
+    return [
+        (write_error["index"], write_error.get("errmsg", "Write failed."))
+        for write_error in err.details.get("writeErrors", [])
+    ]
+
+async def write_readings(collection: AsyncIOMotorCollection, documents: List[dict]) -> List[Tuple[int, str]]:
+    """
+    Stores encoded readings with one unordered bulk write, as documents of collection or
+    appended to their buckets, then updates the derived stores.
+
+    Returns the (position, error) of every reading that was not stored.
+    """
+    if not documents:
+        return []
+
+    if buckets_enabled():
+        failed = await append_readings(documents)
+    else:
+        failed = []
+        try:
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as err:
+            failed = failed_writes(err)
+
+    await apply_derived_updates(documents, failed)
+
+    return failed
+
+async def apply_derived_updates(documents: List[dict], failed: List[Tuple[int, str]]):
+    """
+    Best effort update of the rollups and latest values of a written batch. The readings
+    are already stored, and the retention sweeper rebuilds short rollups before expiring them.
+    """
+    try:
+        await update_derived_readings(documents, failed)
+    except Exception:
+        logger.exception("Failed updating rollups and latest values of %d readings.", len(documents))
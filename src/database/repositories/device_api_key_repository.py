@@ -0,0 +1,170 @@
+import hashlib
+import secrets
+from typing import List
+from beanie import PydanticObjectId
+from beanie.operators import In
+
+from api_requests.device_requests import CreateDeviceApiKeyRequest
+from api_responses.device_responses import DeviceApiKeyResponse
+from database.models.device_api_key_model import DeviceApiKey, DevicePrincipal
+from database.models.device_model import Device
+from database.ownership import ownership_index
+from database.repositories.base_repository import BaseRepository
+from exceptions.device_api_key_exceptions import DeviceApiKeyNotFoundException, InvalidDeviceApiKeyException
+from exceptions.device_exceptions import DeviceNotFoundException
+from utils.cache import TTLCache
+
+# Revocations are applied to this process's cache immediately; other processes
+# stop accepting a revoked key once its cached entry expires.
+DEVICE_API_KEY_CACHE_TTL = 300.0
+DEVICE_API_KEY_CACHE_SIZE = 10000
+
+device_api_key_cache = TTLCache(max_size=DEVICE_API_KEY_CACHE_SIZE, ttl=DEVICE_API_KEY_CACHE_TTL)
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+class DeviceApiKeyRepository(
+    BaseRepository[
+        DeviceApiKey,
+        DeviceApiKeyResponse,
+        CreateDeviceApiKeyRequest,
+        None
+    ]):
+    "Repository for device scoped ingestion credentials."
+
+    def __init__(self):
+        super().__init__(DeviceApiKey)
+
+    async def get(self, user_id, obj_id):
+        raise NotImplementedError("get() method not implemented for device API keys.")
+
+    async def get_all(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId
+    ) -> List[DeviceApiKeyResponse]:
+        
+        api_keys = await self.model.find(
+            self.model.user_id == user_id,
+            self.model.device_id == device_id
+        ).to_list()
+
+        return [
+            DeviceApiKeyResponse(
+                id=str(api_key.id),
+                device_id=str(api_key.device_id),
+                name=api_key.name,
+                revoked=api_key.revoked,
+                created_at=api_key.created_at
+            )
+            for api_key in api_keys
+        ]
+
+    async def create(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId,
+            create_api_key_request: CreateDeviceApiKeyRequest
+    ) -> DeviceApiKeyResponse:
+        """Issues a new key for the device. The plain key is only returned here."""
+        
+        if not await ownership_index.owned_device(user_id, device_id):
+            raise DeviceNotFoundException("Device not found or unauthorized.")
+        
+        plain_api_key = secrets.token_urlsafe(32)
+
+        api_key = self.model(
+            user_id=user_id,
+            device_id=device_id,
+            key_hash=hash_api_key(plain_api_key),
+            name=create_api_key_request.name
+        )
+        await api_key.insert()
+
+        return DeviceApiKeyResponse(
+            id=str(api_key.id),
+            device_id=str(api_key.device_id),
+            name=api_key.name,
+            revoked=api_key.revoked,
+            created_at=api_key.created_at,
+            api_key=plain_api_key
+        )
+
+    async def update(self, user_id, obj_id, update_data):
+        raise NotImplementedError("update() method not implemented for device API keys.")
+
+    async def delete(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId,
+            key_id: PydanticObjectId
+    ):
+        """Revokes a key and drops it from the principal cache."""
+        
+        api_key = await self.model.find_one(
+            self.model.user_id == user_id,
+            self.model.device_id == device_id,
+            self.model.id == key_id
+        )
+
+        if not api_key:
+            raise DeviceApiKeyNotFoundException()
+        
+        await api_key.set({self.model.revoked: True})
+        device_api_key_cache.delete(api_key.key_hash)
+
+    async def exists(self, key_id: PydanticObjectId) -> bool:
+        
+        api_key = await self.model.find_one(
+            self.model.id == key_id
+        )
+
+        if api_key:
+            return True
+        
+        return False
+
+    async def resolve(self, plain_api_key: str) -> DevicePrincipal:
+        """Maps a key to its (user, device) principal, served from the cache on the hot path."""
+
+        key_hash = hash_api_key(plain_api_key)
+        principal = device_api_key_cache.get(key_hash)
+
+        if principal:
+            return principal
+        
+        api_key = await self.model.find_one(
+            self.model.key_hash == key_hash,
+            self.model.revoked == False
+        )
+
+        if not api_key:
+            raise InvalidDeviceApiKeyException()
+        
+        device = await Device.find_one(
+            Device.user_id == api_key.user_id,
+            Device.id == api_key.device_id
+        )
+
+        if not device:
+            raise InvalidDeviceApiKeyException()
+        
+        principal = DevicePrincipal(
+            key_id=api_key.id,
+            user_id=api_key.user_id,
+            device=device
+        )
+        device_api_key_cache.set(key_hash, principal)
+
+        return principal
+
+    async def delete_device_keys(self, device_ids: List[PydanticObjectId]):
+        
+        await self.model.find(In(self.model.device_id, device_ids)).delete()
+        device_api_key_cache.delete_where(lambda key_hash, principal: principal.device.id in device_ids)
+
+    async def delete_user_keys(self, user_id: PydanticObjectId):
+        
+        await self.model.find(self.model.user_id == user_id).delete()
+        device_api_key_cache.delete_where(lambda key_hash, principal: principal.user_id == user_id)
@@ -1,15 +1,23 @@
-from typing import List
+from typing import List, Optional
 from beanie import PydanticObjectId
 
 from api_requests.device_requests import CreateDeviceRequest
 from api_responses.device_responses import DeviceResponse
 from database.models.device_model import Device
 from database.models.module_model import Module
+from database.models.retention_policy_model import RetentionPolicy
 from database.models.sensor_reading_model import SensorReading
+from database.latest_readings import delete_device_latest_readings
+from database.ownership import ownership_index
+from database.reading_buckets import delete_device_buckets
+from database.reading_rollups import delete_device_rollups
 from database.repositories.base_repository import BaseRepository
+from database.repositories.device_api_key_repository import DeviceApiKeyRepository
 from exceptions.device_exceptions import DeviceNotFoundException
 from exceptions.module_exceptions import ModuleNotFoundException
 
+DEVICE_RESPONSE_PROJECTION = {"name": 1, "description": 1, "device_type": 1, "data_types": 1, "retention": 1}
+
 class DeviceRepository(
     BaseRepository[
         Device,
@@ -28,10 +36,7 @@ class DeviceRepository(
             create_device_request: CreateDeviceRequest
     ) -> DeviceResponse:
         
-        module = await Module.find_one(
-            Module.user_id == user_id,
-            Module.id == module_id
-        )
+        module = await ownership_index.owned_module(user_id, module_id)
 
         if not module:
             raise ModuleNotFoundException("Module not found or unauthorized")
@@ -46,15 +51,17 @@ class DeviceRepository(
         )
         
         await device.insert()
-        module.devices.append(device.id)
-        await module.save()
+        # $push instead of saving the whole module, so concurrent creates can't drop each other's links
+        await Module.find_one(Module.id == module_id).update({"$push": {Module.devices: device.id}})
+        ownership_index.add_device(device, module.project_id)
 
         return DeviceResponse(
             id=str(device.id),
             name=device.name,
             description=device.description,
             device_type=device.device_type,
-            data_types=device.data_types
+            data_types=device.data_types,
+            retention=device.retention
         )
 
     async def get(
@@ -64,28 +71,23 @@ class DeviceRepository(
             device_id: PydanticObjectId
     ) -> DeviceResponse:
         
-        module = await Module.find_one(
-            Module.user_id == user_id,
-            Module.id == module_id
-        )
-
-        if not module:
+        if not await ownership_index.owned_module(user_id, module_id):
             raise ModuleNotFoundException("Module not found or unauthorized")
         
-        device = await self.model.find_one(
-            self.model.user_id == user_id,
-            self.model.id == device_id
-        )
+        ownership = await ownership_index.owned_device(user_id, device_id, module_id)
 
-        if not device or device.id not in module.devices:
+        if not ownership:
             raise DeviceNotFoundException("Device not found or unauthorized.")
         
+        device = ownership.device
+
         return DeviceResponse(
             id=str(device.id),
             name=device.name,
             description=device.description,
             device_type=device.device_type,
-            data_types=device.data_types
+            data_types=device.data_types,
+            retention=device.retention
         )
     
     async def get_all(
@@ -94,34 +96,58 @@ class DeviceRepository(
         module_id: PydanticObjectId
     ) -> List[DeviceResponse]:
 
-        module = await Module.find_one(
-            Module.user_id == user_id,
-            Module.id == module_id
-        )
-
-        if not module:
+        if not await ownership_index.owned_module(user_id, module_id):
             raise ModuleNotFoundException("Module not found or unauthorized")
         
-        devices = await self.model.find(
-            self.model.user_id == user_id,
-            self.model.module_id == module_id
-        ).to_list()
+        # projected raw documents, validated once as DeviceResponse instead of as Device first
+        devices = self.model.get_motor_collection().find(
+            {"user_id": user_id, "module_id": module_id},
+            projection=DEVICE_RESPONSE_PROJECTION
+        )
 
         devices_response = [
             DeviceResponse(
-                id=str(device.id),
-                name=device.name,
-                description=device.description,
-                device_type=device.device_type,
-                data_types=device.data_types
+                id=str(device["_id"]),
+                name=device["name"],
+                description=device.get("description"),
+                device_type=device["device_type"],
+                data_types=device["data_types"],
+                retention=device.get("retention")
             )
-            for device in devices
+            async for device in devices
         ]
 
         return devices_response
     
     async def update(self, user_id, obj_id, update_data):
         raise NotImplementedError("Update method not implemented for device class.")
+
+    async def set_retention(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId,
+            retention: Optional[RetentionPolicy]
+    ) -> DeviceResponse:
+
+        device = await self.model.find_one(
+            self.model.user_id == user_id,
+            self.model.id == device_id
+        )
+
+        if not device:
+            raise DeviceNotFoundException("Device not found or unauthorized.")
+
+        await device.set({self.model.retention: retention})
+        ownership_index.forget_devices([device_id])
+
+        return DeviceResponse(
+            id=str(device.id),
+            name=device.name,
+            description=device.description,
+            device_type=device.device_type,
+            data_types=device.data_types,
+            retention=device.retention
+        )
     
     async def delete(
             self, 
@@ -131,27 +157,27 @@ class DeviceRepository(
     ):
     
         
-        module = await Module.find_one(
-            Module.user_id == user_id,
-            Module.id == module_id
-        )
-
-        if not module:
+        if not await ownership_index.owned_module(user_id, module_id):
             raise ModuleNotFoundException("Module not found or unauthorized.")
 
-        if device_id not in module.devices:
-            raise DeviceNotFoundException("Device belongs to a different module.")
-        
-        device = await self.model.find_one(
-            self.model.user_id == user_id,
-            self.model.id == device_id
-        )
+        ownership = await ownership_index.owned_device(user_id, device_id)
 
-        if not device:
+        if not ownership:
             raise DeviceNotFoundException()
+
+        if ownership.module_id != module_id:
+            raise DeviceNotFoundException("Device belongs to a different module.")
         
-        await SensorReading.delete_many(SensorReading.device_id == device_id)
+        device = ownership.device
+
+        await SensorReading.find(SensorReading.device_id == device_id).delete()
+        await delete_device_buckets([device_id])
+        await delete_device_rollups([device_id])
+        await delete_device_latest_readings([device_id])
+        await DeviceApiKeyRepository().delete_device_keys([device_id])
         await device.delete()
+        await Module.find_one(Module.id == module_id).update({"$pull": {Module.devices: device_id}})
+        ownership_index.forget_devices([device_id])
 
     async def exists(self, device_id: PydanticObjectId) -> bool:
         
@@ -166,9 +192,10 @@ class DeviceRepository(
     
     async def delete_module_devices(self, module_id: PydanticObjectId):
 
-        await self.model.delete_many(
+        await self.model.find(
             self.model.module_id == module_id
-        )
+        ).delete()
+        ownership_index.forget_modules([module_id])
 
     async def get_by_id(self, device_id: PydanticObjectId) -> DeviceResponse:
         
@@ -181,5 +208,6 @@ class DeviceRepository(
             name=device.name,
             description=device.description,
             device_type=device.device_type,
-            data_types=device.data_types
+            data_types=device.data_types,
+            retention=device.retention
         )
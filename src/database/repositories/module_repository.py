@@ -1,14 +1,19 @@
 from typing import List
 from beanie import Document, PydanticObjectId
+from beanie.operators import In
 from api_requests.module_requests import CreateModuleRequest, PatchModuleRequest
 from api_responses.module_responses import ModuleResponse
 from database.models.device_model import Device
 from database.models.module_model import Module
 from database.models.project_model import Project
 from database.models.sensor_reading_model import SensorReading
+from database.latest_readings import delete_device_latest_readings
+from database.ownership import ownership_index
+from database.reading_buckets import delete_device_buckets
+from database.reading_rollups import delete_device_rollups
 from database.repositories.base_repository import BaseRepository
+from database.repositories.device_api_key_repository import DeviceApiKeyRepository
 from database.repositories.device_repository import DeviceRepository
-from database.repositories.project_repository import ProjectRepository
 from exceptions.module_exceptions import ModuleNotFoundException, BadUpdateDataException
 from exceptions.project_exceptions import ProjectNotFoundException
 
@@ -51,19 +56,13 @@ class ModuleRepository(
         project_id: PydanticObjectId
     ) -> List[ModuleResponse]:
         
-        project_repository = ProjectRepository()
-        
-        project = await project_repository.get(
-            user_id,
-            project_id
-        )
-
-        if not project:
+        if not await ownership_index.owns_project(user_id, project_id):
             raise ProjectNotFoundException()
         
         modules = await self.model.find(
-            {"_id": {"$in": project.modules}}
-        ).to_list(length=len(project.modules))
+            self.model.user_id == user_id,
+            self.model.project_id == project_id
+        ).to_list()
 
         modules_response = [
             ModuleResponse(
@@ -83,14 +82,7 @@ class ModuleRepository(
             project_id: PydanticObjectId, 
             create_module_request: CreateModuleRequest):
 
-        project_repository = ProjectRepository()
-
-        project = await project_repository.get(
-            user_id,
-            project_id
-        )
-
-        if not project:
+        if not await ownership_index.owns_project(user_id, project_id):
             raise ProjectNotFoundException()
         
         module = self.model(
@@ -101,9 +93,9 @@ class ModuleRepository(
         )
 
         await module.insert()
-
-        project.modules.append(module.id)
-        await project.save()
+        # $push instead of saving the whole project, so concurrent creates can't drop each other's links
+        await Project.find_one(Project.id == project_id).update({"$push": {Project.modules: module.id}})
+        ownership_index.add_module(module)
         
         return ModuleResponse(
             id=str(module.id),
@@ -145,15 +137,10 @@ class ModuleRepository(
             module_id: PydanticObjectId
     ):
     
-        project = await Project.find_one(
-            Project.user_id == user_id,
-            Project.id == project_id
-        )
-
-        if not project:
+        if not await ownership_index.owns_project(user_id, project_id):
             raise ProjectNotFoundException()
         
-        if module_id not in project.modules:
+        if not await ownership_index.owned_module(user_id, module_id, project_id):
             raise ModuleNotFoundException("Module does not belong to informed project.")
         
         module = await self.model.find_one(
@@ -164,11 +151,17 @@ class ModuleRepository(
         if not module:
             raise ModuleNotFoundException()
         
-        device_ids = module.devices
+        device_ids = await Device.get_motor_collection().distinct("_id", {"module_id": module_id})
 
-        await SensorReading.delete_many(SensorReading.device_id.in_(device_ids))
-        await Device.delete_many(Device.module_id == module_id)
+        await SensorReading.find(In(SensorReading.device_id, device_ids)).delete()
+        await delete_device_buckets(device_ids)
+        await delete_device_rollups(device_ids)
+        await delete_device_latest_readings(device_ids)
+        await DeviceApiKeyRepository().delete_device_keys(device_ids)
+        await Device.find(Device.module_id == module_id).delete()
         await module.delete()
+        await Project.find_one(Project.id == project_id).update({"$pull": {Project.modules: module_id}})
+        ownership_index.forget_modules([module_id])
 
     async def exists(self, module_id: PydanticObjectId):
         
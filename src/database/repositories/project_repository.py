@@ -1,14 +1,23 @@
-from ast import Module
-from typing import List
+from typing import List, Optional
 from beanie import PydanticObjectId
+from beanie.operators import In
 from api_requests.project_requests import CreateProjectRequest, PatchProjectRequest
 from api_responses.project_responses import ProjectResponse
 from database.models.device_model import Device
+from database.models.module_model import Module
 from database.models.project_model import Project
+from database.models.retention_policy_model import RetentionPolicy
 from database.models.sensor_reading_model import SensorReading
+from database.latest_readings import delete_device_latest_readings
+from database.ownership import ownership_index
+from database.reading_buckets import delete_device_buckets
+from database.reading_rollups import delete_device_rollups
 from database.repositories.base_repository import BaseRepository
+from database.repositories.device_api_key_repository import DeviceApiKeyRepository
 from exceptions.project_exceptions import ProjectNotFoundException, UpdateProjectException
 
+PROJECT_RESPONSE_PROJECTION = {"name": 1, "description": 1, "modules": 1, "retention": 1}
+
 class ProjectRepository(
     BaseRepository[
         Project,
@@ -37,23 +46,27 @@ class ProjectRepository(
             id=str(project.id),
             name=project.name,
             description=project.description,
-            modules=modules
+            modules=modules,
+            retention=project.retention
         )
     
     async def get_all(self, user_id: PydanticObjectId) -> List[ProjectResponse]:
 
-        projects = await self.model.find(
-            self.model.user_id == user_id
-        ).to_list()
+        # projected raw documents, validated once as ProjectResponse instead of as Project first
+        projects = self.model.get_motor_collection().find(
+            {"user_id": user_id},
+            projection=PROJECT_RESPONSE_PROJECTION
+        )
 
         return [
             ProjectResponse(
-                id=str(project.id),
-                name=project.name,
-                description=project.description,
-                modules=list(map(str, project.modules)),
+                id=str(project["_id"]),
+                name=project["name"],
+                description=project.get("description"),
+                modules=list(map(str, project.get("modules", []))),
+                retention=project.get("retention")
             )
-            for project in projects
+            async for project in projects
         ]
     
     async def create(self, user_id: PydanticObjectId, create_project_request: CreateProjectRequest) -> ProjectResponse:
@@ -66,6 +79,7 @@ class ProjectRepository(
         )
 
         await project.insert()
+        ownership_index.add_project(project.id, user_id)
         
         modules = list(map(str, project.modules))
 
@@ -73,7 +87,8 @@ class ProjectRepository(
             id=str(project.id),
             name=project.name,
             description=project.description,
-            modules=modules
+            modules=modules,
+            retention=project.retention
         )
     
     async def update(
@@ -99,11 +114,37 @@ class ProjectRepository(
                 id=str(project.id),
                 name=project.name,
                 description=project.description,
-                modules=list(map(str, project.modules))
+                modules=list(map(str, project.modules)),
+                retention=project.retention
             )
         else:
             raise UpdateProjectException("Error while parsing update data.")
     
+    async def set_retention(
+            self,
+            user_id: PydanticObjectId,
+            project_id: PydanticObjectId,
+            retention: Optional[RetentionPolicy]
+        ) -> ProjectResponse:
+
+        project = await self.model.find_one(
+            self.model.user_id == user_id,
+            self.model.id == project_id
+        )
+
+        if not project:
+            raise ProjectNotFoundException()
+
+        await project.set({self.model.retention: retention})
+
+        return ProjectResponse(
+            id=str(project.id),
+            name=project.name,
+            description=project.description,
+            modules=list(map(str, project.modules)),
+            retention=project.retention
+        )
+
     async def delete(self, user_id: PydanticObjectId, project_id: PydanticObjectId):
 
         project = await self.model.find_one(
@@ -114,20 +155,24 @@ class ProjectRepository(
         if not project:
             raise ProjectNotFoundException("Project not found.")
 
-        if not project.modules:
-            return
+        # children are found by their own project_id/module_id, which stay right even if a parent link was lost
+        module_ids = await Module.get_motor_collection().distinct("_id", {"project_id": project_id})
+        device_ids = await Device.get_motor_collection().distinct("_id", {"module_id": {"$in": module_ids}})
 
-        module_ids = project.modules
+        await SensorReading.find(In(SensorReading.device_id, device_ids)).delete()
 
-        device_ids = await Device.find(Device.module_id.in_(module_ids)).distinct(Device.id)
+        await delete_device_buckets(device_ids)
+        await delete_device_rollups(device_ids)
+        await delete_device_latest_readings(device_ids)
 
-        await SensorReading.delete_many(SensorReading.device_id.in_(device_ids))
+        await DeviceApiKeyRepository().delete_device_keys(device_ids)
 
-        await Device.delete_many(Device.module_id.in_(module_ids))
+        await Device.find(In(Device.module_id, module_ids)).delete()
 
-        await Module.delete_many(Module.id.in_(module_ids))
+        await Module.find(In(Module.id, module_ids)).delete()
 
         await project.delete()
+        ownership_index.forget_projects([project_id])
 
     async def exists(self, project_id: PydanticObjectId) -> bool:
 
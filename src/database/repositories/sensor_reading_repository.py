@@ -1,12 +1,39 @@
-from typing import List
+import math
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Tuple
 from beanie import PydanticObjectId
+from beanie.operators import In
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import ValidationError
 from api_requests.sensor_reading_requests import CreateReadingRequest
-from api_responses.sensor_reading_responses import SensorReadingResponse
+from api_responses.sensor_reading_responses import BatchReadingResponse, BatchReadingResult, DeviceLatestReadingsResponse, DeviceReadingsResponse, LatestReadingResponse, MultiDeviceReadingsResponse, SensorReadingAggregateResponse, SensorReadingPageResponse, SensorReadingResponse, StreamReadingResponse
+from database.ingestion_queue import SensorReadingIngestionQueue
+from database.latest_readings import find_latest_readings
 from database.models.device_model import Device
+from database.models.module_model import Module
+from database.models.project_model import Project
+from database.models.sensor_reading_bucket_model import SensorReadingBucket
 from database.models.sensor_reading_model import SensorReading
+from database.models.sensor_reading_rollup_model import SensorReadingRollup
+from database.ownership import ownership_index
+from database.reading_buckets import bucket_range_query, buckets_enabled, encode_reading, iter_bucket_windows
+from database.reading_rollups import rollup_pipeline, rollup_segments, rollups_enabled
+from database.reading_writes import write_readings
 from database.repositories.base_repository import BaseRepository
-from database.repositories.device_repository import DeviceRepository
+from enums.data_type import DataType
 from exceptions.device_exceptions import DeviceNotFoundException
+from exceptions.module_exceptions import ModuleNotFoundException
+from exceptions.project_exceptions import ProjectNotFoundException
+from utils.binary_frames import decode_reading_frame
+from utils.columnar import columnar_series
+from utils.helper_functions import encode_cursor
+
+STREAM_BATCH_SIZE = 1000
+STREAM_MAX_REPORTED_ERRORS = 100
+DEFAULT_PAGE_SIZE = 100
+EXPORT_BATCH_SIZE = 5000
+MAX_AGGREGATE_BUCKETS = 10000
+MAX_MULTI_DEVICE_READINGS = 10000
 
 class SensorReadingRepository(
     BaseRepository[
@@ -16,56 +43,651 @@ class SensorReadingRepository(
         None
     ]):
 
-    def __init__(self, sensor_reading_model: SensorReading):
+    def __init__(self, sensor_reading_model: SensorReading, ingestion_queue: Optional[SensorReadingIngestionQueue] = None):
+        super().__init__(sensor_reading_model)
         self.sensor_reading_model = sensor_reading_model
+        self.ingestion_queue = ingestion_queue
     
     async def get(self, user_id, obj_id):
         pass
 
+    async def get_owned_device(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId
+    ) -> Device:
+        
+        ownership = await ownership_index.owned_device(user_id, device_id)
+
+        if not ownership:
+            raise DeviceNotFoundException("Device not found or unauthorized.")
+        
+        return ownership.device
+
+    def range_query(
+            self,
+            device_id: PydanticObjectId,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            cursor: Optional[Tuple[datetime, str]] = None,
+            descending: bool = False
+    ) -> dict:
+        """
+        Filter on (device_id, created_at) that MongoDB can answer with an index range scan.
+
+        A cursor narrows the range to the readings after (created_at, id) in the
+        requested order, so every page is a bounded scan of the same index.
+        """
+
+        query = {"device_id": device_id}
+        created_at_range = {}
+
+        if start:
+            created_at_range["$gte"] = start
+        if end:
+            created_at_range["$lt"] = end
+
+        if cursor:
+            cursor_created_at, cursor_id = cursor
+            if descending:
+                created_at_range["$lte"] = cursor_created_at
+                query["$nor"] = [{"created_at": cursor_created_at, "_id": {"$gte": PydanticObjectId(cursor_id)}}]
+            else:
+                created_at_range["$gte"] = max(start, cursor_created_at) if start else cursor_created_at
+                query["$nor"] = [{"created_at": cursor_created_at, "_id": {"$lte": PydanticObjectId(cursor_id)}}]
+
+        if created_at_range:
+            query["created_at"] = created_at_range
+
+        return query
+
     async def get_all(
             self,
             user_id: PydanticObjectId,
             device_id: PydanticObjectId,
-            date_filter: dict = None
-    ) -> List[SensorReadingResponse]:
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            limit: int = DEFAULT_PAGE_SIZE,
+            descending: bool = False,
+            cursor: Optional[Tuple[datetime, str]] = None
+    ) -> SensorReadingPageResponse:
+        """Returns one page of readings ordered by (created_at, id) and the cursor of the next page."""
         
-        device = await Device.find_one(
-            Device.user_id == user_id,
-            Device.id == device_id
+        await self.get_owned_device(user_id, device_id)
+
+        documents, next_cursor = await self.find_page_documents(device_id, start, end, limit, descending, cursor)
+
+        readings_response = [
+            SensorReadingResponse(
+                id=str(document["_id"]),
+                data_type=document["data_type"],
+                value=document["value"],
+                created_at=document["created_at"]
+            )
+            for document in documents
+        ]
+
+        return SensorReadingPageResponse(items=readings_response, next_cursor=next_cursor)
+
+    async def get_all_columnar(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            limit: int = DEFAULT_PAGE_SIZE,
+            descending: bool = False,
+            cursor: Optional[Tuple[datetime, str]] = None
+    ) -> dict:
+        """
+        Same page as get_all in the ColumnarPageResponse layout, built from raw documents.
+
+        Skips the per reading models entirely, which is what makes large series cheap
+        to serialize.
+        """
+
+        await self.get_owned_device(user_id, device_id)
+
+        documents, next_cursor = await self.find_page_documents(device_id, start, end, limit, descending, cursor)
+
+        return {"series": columnar_series(documents), "next_cursor": next_cursor}
+
+    async def find_page_documents(
+            self,
+            device_id: PydanticObjectId,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            limit: int = DEFAULT_PAGE_SIZE,
+            descending: bool = False,
+            cursor: Optional[Tuple[datetime, str]] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Raw {_id, data_type, value, created_at} documents of one page and the cursor of the next.
+
+        Reads a projected Motor cursor instead of Beanie documents, so each reading is
+        validated once, by whatever response shape the caller builds.
+        """
+
+        if buckets_enabled():
+            documents = await self.get_all_from_buckets(device_id, start, end, limit + 1, descending, cursor)
+        else:
+            direction = -1 if descending else 1
+            documents = await self.sensor_reading_model.get_motor_collection().find(
+                self.range_query(device_id, start, end, cursor, descending),
+                projection={"data_type": 1, "value": 1, "created_at": 1}
+            ).sort([("created_at", direction), ("_id", direction)]).limit(limit + 1).to_list(None)
+
+        next_cursor = None
+
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = encode_cursor(documents[-1]["created_at"], str(documents[-1]["_id"]))
+
+        return documents, next_cursor
+
+    async def get_all_from_buckets(
+            self,
+            device_id: PydanticObjectId,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            limit: Optional[int] = None,
+            descending: bool = False,
+            cursor: Optional[Tuple[datetime, str]] = None
+    ) -> List[dict]:
+        """Flattens the device's buckets overlapping the [start, end) range into ordered raw readings."""
+
+        def utc(value: datetime) -> datetime:
+            return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+        start = utc(start) if start else None
+        end = utc(end) if end else None
+        cursor_key = (utc(cursor[0]), cursor[1]) if cursor else None
+
+        if cursor_key and descending:
+            end = min(end, cursor_key[0] + timedelta(milliseconds=1)) if end else cursor_key[0] + timedelta(milliseconds=1)
+        elif cursor_key:
+            start = max(start, cursor_key[0]) if start else cursor_key[0]
+
+        documents = []
+
+        async for window in iter_bucket_windows(device_id, start, end, descending):
+            window_readings = sorted(
+                (
+                    (utc(created_at), f"{bucket.id}:{index}", value, bucket.data_type.model_dump(mode="json"))
+                    for bucket in window
+                    for index, (created_at, value) in enumerate(zip(bucket.timestamps, bucket.values))
+                ),
+                key=lambda reading: reading[:2],
+                reverse=descending
+            )
+
+            for created_at, reading_id, value, data_type in window_readings:
+                if (start and created_at < start) or (end and created_at >= end):
+                    continue
+                if cursor_key and ((created_at, reading_id) >= cursor_key if descending else (created_at, reading_id) <= cursor_key):
+                    continue
+                documents.append({"_id": reading_id, "data_type": data_type, "value": value, "created_at": created_at})
+
+            # windows don't overlap, so a full page can only end once a whole window was merged
+            if limit and len(documents) >= limit:
+                break
+
+        return documents[:limit] if limit else documents
+    
+    def data_type_match(self, data_types: Optional[List[dict]] = None) -> dict:
+        """Filter for readings of any of the (possibly partial) data types."""
+
+        if not data_types:
+            return {}
+
+        return {"$or": [
+            {f"data_type.{field}": value for field, value in data_type.items()}
+            for data_type in data_types
+        ]}
+
+    async def get_module_device_ids(
+            self,
+            user_id: PydanticObjectId,
+            module_id: PydanticObjectId
+    ) -> List[PydanticObjectId]:
+
+        module = await Module.find_one(
+            Module.user_id == user_id,
+            Module.id == module_id
         )
 
-        if not device:
-            raise DeviceNotFoundException("Device not found or unauthorized.")
-        
-        if date_filter:
+        if not module:
+            raise ModuleNotFoundException("Module not found or unauthorized.")
+
+        return module.devices
+
+    async def get_project_device_ids(
+            self,
+            user_id: PydanticObjectId,
+            project_id: PydanticObjectId
+    ) -> List[PydanticObjectId]:
+
+        project = await Project.find_one(
+            Project.user_id == user_id,
+            Project.id == project_id
+        )
+
+        if not project:
+            raise ProjectNotFoundException()
+
+        modules = await Module.find(
+            Module.user_id == user_id,
+            In(Module.id, project.modules)
+        ).to_list()
+
+        return [device_id for module in modules for device_id in module.devices]
+
+    async def get_all_for_devices(
+            self,
+            device_ids: List[PydanticObjectId],
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            data_types: Optional[List[dict]] = None,
+            limit: int = MAX_MULTI_DEVICE_READINGS
+    ) -> MultiDeviceReadingsResponse:
+        """
+        Readings of several devices in one $in query, grouped by device.
+
+        Readings are taken in (created_at, id) order across all devices, so when
+        limit cuts the result every series covers the same time span. Device
+        ownership must be checked beforehand.
+        """
 
-            if "date" in date_filter:
-                readings = await self.sensor_reading_model.find(
-                    self.sensor_reading_model.device_id == device_id,
-                    self.sensor_reading_model.created_at.date() == date_filter["date"]
+        series = {device_id: [] for device_id in device_ids}
+        documents = await self.find_device_documents(device_ids, start, end, data_types, limit + 1)
+
+        for document in documents[:limit]:
+            series[document["device_id"]].append(
+                SensorReadingResponse(
+                    id=str(document["_id"]),
+                    data_type=document["data_type"],
+                    value=document["value"],
+                    created_at=document["created_at"]
                 )
-            elif "start_date" in date_filter and "end_date" in date_filter:
-                readings = await self.sensor_reading_model.find(
-                    self.sensor_reading_model.device_id == device_id,
-                    self.sensor_reading_model.created_at.date() >= date_filter["start_date"],
-                    self.sensor_reading_model.created_at.date() <= date_filter["end_date"]
+            )
+
+        return MultiDeviceReadingsResponse(
+            devices=[
+                DeviceReadingsResponse(device_id=str(device_id), readings=device_readings)
+                for device_id, device_readings in series.items()
+            ],
+            truncated=len(documents) > limit
+        )
+
+    async def get_all_for_devices_columnar(
+            self,
+            device_ids: List[PydanticObjectId],
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            data_types: Optional[List[dict]] = None,
+            limit: int = MAX_MULTI_DEVICE_READINGS
+    ) -> dict:
+        """Same as get_all_for_devices in the MultiDeviceColumnarResponse layout, built from raw documents."""
+
+        series = {device_id: [] for device_id in device_ids}
+        documents = await self.find_device_documents(device_ids, start, end, data_types, limit + 1)
+
+        for document in documents[:limit]:
+            series[document["device_id"]].append(document)
+
+        return {
+            "devices": [
+                {"device_id": str(device_id), "series": columnar_series(device_documents)}
+                for device_id, device_documents in series.items()
+            ],
+            "truncated": len(documents) > limit
+        }
+
+    async def find_device_documents(
+            self,
+            device_ids: List[PydanticObjectId],
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            data_types: Optional[List[dict]] = None,
+            limit: Optional[int] = None
+    ) -> List[dict]:
+        """Raw {_id, device_id, data_type, value, created_at} readings of several devices in (created_at, id) order."""
+
+        data_type_match = self.data_type_match(data_types)
+
+        if buckets_enabled():
+            return await self.get_all_from_device_buckets(device_ids, start, end, data_type_match, limit)
+
+        documents = self.sensor_reading_model.get_motor_collection().find(
+            {**self.range_query({"$in": device_ids}, start, end), **data_type_match},
+            projection={"device_id": 1, "data_type": 1, "value": 1, "created_at": 1}
+        ).sort([("created_at", 1), ("_id", 1)])
+
+        if limit:
+            documents = documents.limit(limit)
+
+        return await documents.to_list(None)
+
+    async def get_all_from_device_buckets(
+            self,
+            device_ids: List[PydanticObjectId],
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            data_type_match: Optional[dict] = None,
+            limit: Optional[int] = None
+    ) -> List[dict]:
+        """Flattens the buckets of several devices into raw readings in time order."""
+
+        def utc(value: datetime) -> datetime:
+            return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+        query = {**bucket_range_query({"$in": device_ids}, start, end), **(data_type_match or {})}
+
+        readings = []
+        current_bucket_start = None
+
+        async for bucket in SensorReadingBucket.find(query).sort("+bucket_start"):
+            # buckets are aligned, so every reading collected so far is older than a new bucket_start
+            if limit and len(readings) >= limit and bucket.bucket_start != current_bucket_start:
+                break
+            current_bucket_start = bucket.bucket_start
+
+            data_type = bucket.data_type.model_dump(mode="json")
+
+            for index, (created_at, value) in enumerate(zip(bucket.timestamps, bucket.values)):
+                created_at = utc(created_at)
+                if (start and created_at < start) or (end and created_at >= end):
+                    continue
+                readings.append({
+                    "_id": f"{bucket.id}:{index}",
+                    "device_id": bucket.device_id,
+                    "data_type": data_type,
+                    "value": value,
+                    "created_at": created_at
+                })
+
+        readings.sort(key=lambda reading: (reading["created_at"], reading["_id"]))
+
+        return readings[:limit] if limit else readings
+
+    async def iter_readings(
+            self,
+            device_id: PydanticObjectId,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            batch_size: int = EXPORT_BATCH_SIZE
+    ) -> AsyncIterator[dict]:
+        """
+        Yields raw {created_at, data_type, value} documents of a device in time order.
+
+        Reads straight from the Motor cursor in batches without building models, so
+        memory stays flat for any range. Device ownership must be checked beforehand.
+        """
+
+        if buckets_enabled():
+            async for window in iter_bucket_windows(device_id, start, end):
+                window_readings = sorted(
+                    (
+                        (created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc), value, bucket.data_type.model_dump())
+                        for bucket in window
+                        for created_at, value in zip(bucket.timestamps, bucket.values)
+                    ),
+                    key=lambda reading: reading[0]
                 )
-        else:
-            readings = await self.sensor_reading_model.find(
-                self.sensor_reading_model.device_id == device_id
+                for created_at, value, data_type in window_readings:
+                    if (start and created_at < start) or (end and created_at >= end):
+                        continue
+                    yield {"created_at": created_at, "data_type": data_type, "value": value}
+            return
+
+        cursor = self.sensor_reading_model.get_motor_collection().find(
+            self.range_query(device_id, start, end),
+            projection={"_id": 0, "created_at": 1, "data_type": 1, "value": 1},
+            batch_size=batch_size
+        ).sort([("created_at", 1), ("_id", 1)])
+
+        async for document in cursor:
+            yield document
+
+    async def find_newest_reading(self, device_id: PydanticObjectId, data_type: dict) -> Optional[dict]:
+        """Raw {created_at, data_type, value} of the newest reading of one data type of a device."""
+
+        data_type_match = {f"data_type.{field}": value for field, value in data_type.items()}
+
+        if buckets_enabled():
+            bucket = await SensorReadingBucket.find({"device_id": device_id, **data_type_match}).sort("-bucket_start").first_or_none()
+            if not bucket:
+                return None
+            created_at, value = max(zip(bucket.timestamps, bucket.values), key=lambda reading: reading[0])
+            return {"created_at": created_at, "data_type": data_type, "value": value}
+
+        return await self.sensor_reading_model.get_motor_collection().find_one(
+            {"device_id": device_id, **data_type_match},
+            projection={"_id": 0, "created_at": 1, "data_type": 1, "value": 1},
+            sort=[("created_at", -1), ("_id", -1)]
+        )
+
+    async def get_latest_for_modules(
+            self,
+            user_id: PydanticObjectId,
+            module_ids: List[PydanticObjectId]
+    ) -> List[DeviceLatestReadingsResponse]:
+        """Last known value of every data type of every device in the modules, without touching the readings."""
+
+        devices = await Device.find(
+            Device.user_id == user_id,
+            In(Device.module_id, module_ids)
+        ).to_list()
+
+        latest_readings = await find_latest_readings([device.id for device in devices])
+
+        return [
+            DeviceLatestReadingsResponse(
+                device_id=str(device.id),
+                name=device.name,
+                readings=[
+                    LatestReadingResponse(
+                        data_type=latest_reading.data_type,
+                        value=latest_reading.latest.value,
+                        created_at=latest_reading.latest.at
+                    )
+                    for latest_reading in latest_readings.get(device.id, [])
+                ]
             )
-        readings_response = [
-            SensorReadingResponse(
-                id=str(reading.id),
-                data_type=reading.data_type,
-                value=reading.value,
-                created_at=reading.created_at
+            for device in devices
+        ]
+
+    async def get_latest_for_module(
+            self,
+            user_id: PydanticObjectId,
+            module_id: PydanticObjectId
+    ) -> List[DeviceLatestReadingsResponse]:
+
+        if not await ownership_index.owned_module(user_id, module_id):
+            raise ModuleNotFoundException("Module not found or unauthorized.")
+
+        return await self.get_latest_for_modules(user_id, [module_id])
+
+    async def get_latest_for_project(
+            self,
+            user_id: PydanticObjectId,
+            project_id: PydanticObjectId
+    ) -> List[DeviceLatestReadingsResponse]:
+
+        project = await Project.find_one(
+            Project.user_id == user_id,
+            Project.id == project_id
+        )
+
+        if not project:
+            raise ProjectNotFoundException()
+
+        return await self.get_latest_for_modules(user_id, project.modules)
+
+    def aggregate_pipeline(
+            self,
+            match: dict,
+            unit: str,
+            bin_size: int,
+            tz: str = "UTC",
+            max_buckets: int = MAX_AGGREGATE_BUCKETS
+    ) -> List[dict]:
+        """Groups numeric readings matched by match into (data type, time bucket) statistics."""
+
+        return [
+            {"$match": {**match, "value": {"$type": "number"}}},
+            {"$sort": {"created_at": 1}},
+            {
+                "$group": {
+                    "_id": {
+                        "bucket_start": {
+                            "$dateTrunc": {"date": "$created_at", "unit": unit, "binSize": bin_size, "timezone": tz}
+                        },
+                        "measurement_type": "$data_type.measurement_type",
+                        "measurement_unit": "$data_type.measurement_unit"
+                    },
+                    "count": {"$sum": 1},
+                    "min": {"$min": "$value"},
+                    "max": {"$max": "$value"},
+                    "mean": {"$avg": "$value"},
+                    "sum": {"$sum": "$value"},
+                    "first": {"$first": "$value"},
+                    "last": {"$last": "$value"}
+                }
+            },
+            {"$sort": {"_id.bucket_start": 1, "_id.measurement_type": 1, "_id.measurement_unit": 1}},
+            {"$limit": max_buckets}
+        ]
+
+    async def aggregate(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId,
+            unit: str,
+            bin_size: int,
+            interval_seconds: int,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            data_types: Optional[List[dict]] = None,
+            tz: str = "UTC"
+    ) -> List[SensorReadingAggregateResponse]:
+        """
+        Computes count, min, max, mean, sum, first and last per time bucket in the database.
+
+        Reads the range from the coarsest rollup tiers whose buckets tile the interval and
+        fit inside it, and only the edges no tier covers (e.g. 30s bins) from the raw
+        readings. Rows of the same bucket from several segments are merged.
+        """
+
+        await self.get_owned_device(user_id, device_id)
+
+        data_type_match = self.data_type_match(data_types)
+
+        segments = rollup_segments(interval_seconds, start, end, tz) if rollups_enabled() else [(None, start, end)]
+
+        segment_rows = []
+
+        for tier, segment_start, segment_end in segments:
+            collection, pipeline = self.aggregate_segment_pipeline(tier, device_id, unit, bin_size, segment_start, segment_end, data_type_match, tz)
+            segment_rows.append([row async for row in collection.aggregate(pipeline)])
+
+        return [
+            SensorReadingAggregateResponse(
+                data_type=DataType(
+                    measurement_type=row["_id"]["measurement_type"],
+                    measurement_unit=row["_id"]["measurement_unit"]
+                ),
+                bucket_start=row["_id"]["bucket_start"],
+                count=row["count"],
+                min=row["min"],
+                max=row["max"],
+                mean=row["mean"],
+                sum=row["sum"],
+                first=row["first"],
+                last=row["last"]
             )
-            for reading in readings
+            for row in self.merge_aggregate_rows(segment_rows)
         ]
 
-        return readings_response
-    
+    def aggregate_segment_pipeline(
+            self,
+            tier: Optional[str],
+            device_id: PydanticObjectId,
+            unit: str,
+            bin_size: int,
+            start: Optional[datetime],
+            end: Optional[datetime],
+            data_type_match: dict,
+            tz: str
+    ) -> Tuple[AsyncIOMotorCollection, List[dict]]:
+        """Collection and aggregation pipeline of one segment, read from a rollup tier or, without one, the raw readings."""
+
+        if tier:
+            return (
+                SensorReadingRollup.get_motor_collection(),
+                rollup_pipeline(tier, device_id, unit, bin_size, start, end, data_type_match, tz, MAX_AGGREGATE_BUCKETS)
+            )
+
+        if buckets_enabled():
+            reading_range = {}
+            if start:
+                reading_range["$gte"] = start
+            if end:
+                reading_range["$lt"] = end
+
+            return SensorReadingBucket.get_motor_collection(), [
+                {"$match": bucket_range_query(device_id, start, end)},
+                {"$project": {"data_type": 1, "readings": {"$zip": {"inputs": ["$timestamps", "$values"]}}}},
+                {"$unwind": "$readings"},
+                {
+                    "$project": {
+                        "data_type": 1,
+                        "created_at": {"$arrayElemAt": ["$readings", 0]},
+                        "value": {"$arrayElemAt": ["$readings", 1]}
+                    }
+                },
+                *self.aggregate_pipeline(
+                    {**data_type_match, **({"created_at": reading_range} if reading_range else {})},
+                    unit,
+                    bin_size,
+                    tz
+                )
+            ]
+
+        return self.sensor_reading_model.get_motor_collection(), self.aggregate_pipeline(
+            {**self.range_query(device_id, start, end), **data_type_match},
+            unit,
+            bin_size,
+            tz
+        )
+
+    def merge_aggregate_rows(self, segment_rows: List[List[dict]], max_buckets: int = MAX_AGGREGATE_BUCKETS) -> List[dict]:
+        """
+        Combines the rows of time ordered segments. A bucket split across segments sums its
+        counts and sums, keeps the extremes, the first value of its earliest and the last
+        value of its latest segment.
+        """
+
+        merged = {}
+
+        for rows in segment_rows:
+            for row in rows:
+                key = (row["_id"]["bucket_start"], row["_id"]["measurement_type"], row["_id"]["measurement_unit"])
+                current = merged.get(key)
+
+                if not current:
+                    merged[key] = dict(row)
+                    continue
+
+                current["count"] += row["count"]
+                current["sum"] += row["sum"]
+                current["min"] = min(current["min"], row["min"])
+                current["max"] = max(current["max"], row["max"])
+                current["mean"] = current["sum"] / current["count"]
+                current["last"] = row["last"]
+
+        return [merged[key] for key in sorted(merged)][:max_buckets]
+
     async def create(
             self, 
             user_id: PydanticObjectId, 
@@ -73,15 +695,7 @@ class SensorReadingRepository(
             create_reading_request: CreateReadingRequest
     ) -> SensorReadingResponse:
         
-        device_repository = DeviceRepository()
-
-        device = await device_repository.get(
-            user_id,
-            device_id
-        )
-
-        if not device:
-            raise DeviceNotFoundException("Device not found or unauthorized.")
+        await self.get_owned_device(user_id, device_id)
         
         sensor_reading = self.sensor_reading_model(
             user_id=user_id,
@@ -89,7 +703,15 @@ class SensorReadingRepository(
             data_type=create_reading_request.data_type,
             value=create_reading_request.value
         )
-        await sensor_reading.insert()
+
+        sensor_reading.id = PydanticObjectId()
+
+        if self.ingestion_queue:
+            self.ingestion_queue.submit(sensor_reading)
+        else:
+            failed = await self.insert_batch([sensor_reading])
+            if failed:
+                raise Exception(failed[0][1])
 
         return SensorReadingResponse(
             id=str(sensor_reading.id),
@@ -98,6 +720,212 @@ class SensorReadingRepository(
             created_at=sensor_reading.created_at
         )
 
+    def validate_reading(
+            self,
+            device: Device,
+            create_reading_request: CreateReadingRequest
+    ) -> Optional[str]:
+        """Returns why a reading can't be stored for the device, or None when it is valid."""
+
+        if create_reading_request.device_id != device.id:
+            return "Reading belongs to a different device."
+
+        if create_reading_request.data_type not in device.data_types:
+            return "Data type not declared for device."
+        
+        return None
+
+    async def insert_batch(self, sensor_readings: List[SensorReading]) -> List[Tuple[int, str]]:
+        """Writes readings with one unordered bulk insert and returns the (position, error) of failed writes."""
+
+        return await write_readings(
+            self.sensor_reading_model.get_motor_collection(),
+            [encode_reading(sensor_reading) for sensor_reading in sensor_readings]
+        )
+
+    async def insert_raw_batch(self, documents: List[dict]) -> List[Tuple[int, str]]:
+        """Same as insert_batch for already encoded documents, skipping model validation."""
+
+        return await write_readings(self.sensor_reading_model.get_motor_collection(), documents)
+
+    async def create_many(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId,
+            create_reading_requests: List[CreateReadingRequest]
+    ) -> BatchReadingResponse:
+        """Validates a batch of readings for one device and writes the valid ones with a single unordered bulk insert."""
+        
+        device = await self.get_owned_device(user_id, device_id)
+
+        return await self.create_many_for_device(user_id, device, create_reading_requests)
+
+    async def create_many_for_device(
+            self,
+            user_id: PydanticObjectId,
+            device: Device,
+            create_reading_requests: List[CreateReadingRequest]
+    ) -> BatchReadingResponse:
+        """Same as create_many for a device whose ownership was already checked."""
+
+        results = [BatchReadingResult(index=index) for index in range(len(create_reading_requests))]
+        sensor_readings = []
+        batch_indexes = []
+
+        for index, create_reading_request in enumerate(create_reading_requests):
+
+            error = self.validate_reading(device, create_reading_request)
+
+            if error:
+                results[index].error = error
+                continue
+
+            sensor_reading = self.sensor_reading_model(
+                id=PydanticObjectId(),
+                user_id=user_id,
+                device_id=device.id,
+                data_type=create_reading_request.data_type,
+                value=create_reading_request.value
+            )
+            sensor_readings.append(sensor_reading)
+            batch_indexes.append(index)
+            results[index].id = str(sensor_reading.id)
+
+        for position, error in await self.insert_batch(sensor_readings):
+            result = results[batch_indexes[position]]
+            result.id = None
+            result.error = error
+
+        inserted = sum(1 for result in results if result.error is None)
+
+        return BatchReadingResponse(
+            inserted=inserted,
+            rejected=len(results) - inserted,
+            results=results
+        )
+
+    async def create_stream(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId,
+            lines: AsyncIterator[bytes],
+            batch_size: int = STREAM_BATCH_SIZE
+    ) -> StreamReadingResponse:
+        """Validates NDJSON readings as they arrive and writes them in bounded batches while the upload is streaming."""
+
+        device = await self.get_owned_device(user_id, device_id)
+
+        response = StreamReadingResponse(received=0, inserted=0, rejected=0, errors=[])
+        sensor_readings = []
+        batch_indexes = []
+
+        def reject(index: int, error: str):
+            response.rejected += 1
+            if len(response.errors) < STREAM_MAX_REPORTED_ERRORS:
+                response.errors.append(BatchReadingResult(index=index, error=error))
+
+        async def flush():
+            failed = await self.insert_batch(sensor_readings)
+            for position, error in failed:
+                reject(batch_indexes[position], error)
+            response.inserted += len(sensor_readings) - len(failed)
+            sensor_readings.clear()
+            batch_indexes.clear()
+
+        async for line in lines:
+            index = response.received
+            response.received += 1
+
+            try:
+                create_reading_request = CreateReadingRequest.model_validate_json(line)
+            except ValidationError as err:
+                reject(index, f"Invalid reading: {err.errors()[0]['msg']}")
+                continue
+
+            error = self.validate_reading(device, create_reading_request)
+
+            if error:
+                reject(index, error)
+                continue
+
+            sensor_readings.append(
+                self.sensor_reading_model(
+                    user_id=user_id,
+                    device_id=device_id,
+                    data_type=create_reading_request.data_type,
+                    value=create_reading_request.value
+                )
+            )
+            batch_indexes.append(index)
+
+            if len(sensor_readings) >= batch_size:
+                await flush()
+
+        await flush()
+
+        return response
+
+    async def create_from_frame(
+            self,
+            user_id: PydanticObjectId,
+            device_id: PydanticObjectId,
+            payload: bytes,
+            batch_size: int = STREAM_BATCH_SIZE
+    ) -> StreamReadingResponse:
+        """Decodes a binary reading frame (see utils.binary_frames) and bulk inserts it in bounded batches."""
+
+        device = await self.get_owned_device(user_id, device_id)
+        data_types = [data_type.model_dump() for data_type in device.data_types]
+
+        response = StreamReadingResponse(received=0, inserted=0, rejected=0, errors=[])
+        documents = []
+        batch_indexes = []
+
+        def reject(index: int, error: str):
+            response.rejected += 1
+            if len(response.errors) < STREAM_MAX_REPORTED_ERRORS:
+                response.errors.append(BatchReadingResult(index=index, error=error))
+
+        async def flush():
+            failed = await self.insert_raw_batch(documents)
+            for position, error in failed:
+                reject(batch_indexes[position], error)
+            response.inserted += len(documents) - len(failed)
+            documents.clear()
+            batch_indexes.clear()
+
+        for index, (data_type_index, created_at, value) in enumerate(decode_reading_frame(payload)):
+            response.received += 1
+
+            if data_type_index >= len(data_types):
+                reject(index, "Data type not declared for device.")
+                continue
+
+            if created_at is None:
+                reject(index, "Timestamp out of range.")
+                continue
+
+            # NaN and infinities would poison the sums, minimums and maximums of the rollups
+            if not math.isfinite(value):
+                reject(index, "Value must be a finite number.")
+                continue
+
+            documents.append({
+                "user_id": user_id,
+                "device_id": device_id,
+                "value": value,
+                "data_type": data_types[data_type_index],
+                "created_at": created_at
+            })
+            batch_indexes.append(index)
+
+            if len(documents) >= batch_size:
+                await flush()
+
+        await flush()
+
+        return response
+
     async def update(self, user_id, obj_id, update_data):
         raise NotImplementedError("update() method not implemented for sensor readings.")
 
@@ -111,6 +939,6 @@ class SensorReadingRepository(
             self,
             device_id: PydanticObjectId
     ):    
-        await self.model.delete_many(
+        await self.model.find(
             self.model.device_id == device_id
-        )
+        ).delete()
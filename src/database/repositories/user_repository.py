@@ -1,4 +1,5 @@
 from beanie import PydanticObjectId
+from pymongo import ReturnDocument
 from api_requests.user_requests import CreateUserRequest
 from api_responses.user_responses import LoginUserResponse, UserResponse
 from database.models.device_model import Device
@@ -6,8 +7,23 @@ from database.models.module_model import Module
 from database.models.project_model import Project
 from database.models.sensor_reading_model import SensorReading
 from database.models.user_model import User
+from database.latest_readings import delete_user_latest_readings
+from database.ownership import ownership_index
+from database.reading_buckets import delete_user_buckets
+from database.reading_rollups import delete_user_rollups
 from database.repositories.base_repository import BaseRepository
-from exceptions.user_exceptions import UserConflictException, UserNotFoundException
+from database.repositories.device_api_key_repository import DeviceApiKeyRepository
+from exceptions.user_exceptions import InvalidTokenException, UserConflictException, UserNotFoundException
+from utils.cache import TTLCache
+
+# Tokens carry the user's id and token version, so authenticating a request only needs
+# the user's current token version. Deletions and token revocations are applied to this
+# process's cache immediately; other processes keep accepting the affected tokens until
+# their cached entry expires.
+USER_TOKEN_VERSION_CACHE_TTL = 60.0
+USER_TOKEN_VERSION_CACHE_SIZE = 10000
+
+user_token_version_cache = TTLCache(max_size=USER_TOKEN_VERSION_CACHE_SIZE, ttl=USER_TOKEN_VERSION_CACHE_TTL)
 
 class UserRepository(
     BaseRepository[
@@ -64,7 +80,8 @@ class UserRepository(
             id=str(user.id),
             username=user.username,
             email=user.email,
-            password=user.password
+            password=user.password,
+            token_version=user.token_version
         )
 
     
@@ -103,6 +120,45 @@ class UserRepository(
             email=new_user.email
         )
     
+    async def verify_token_version(self, user_id: PydanticObjectId, token_version: int):
+        """
+        Checks a token's version claim against the user's current token version. The
+        cached version is trusted when it matches; otherwise the user is re-read, so
+        only cache misses and failed checks reach the database.
+        """
+
+        if user_token_version_cache.get(user_id) == token_version:
+            return
+
+        user = await self.model.get_motor_collection().find_one({"_id": user_id}, projection={"token_version": 1})
+
+        if not user:
+            user_token_version_cache.delete(user_id)
+            raise InvalidTokenException()
+
+        current_version = user.get("token_version", 0)
+        user_token_version_cache.set(user_id, current_version)
+
+        if current_version != token_version:
+            raise InvalidTokenException()
+
+    async def revoke_tokens(self, user_id: PydanticObjectId) -> int:
+        """Bumps the user's token version, invalidating every token issued before. Returns the new version."""
+
+        user = await self.model.get_motor_collection().find_one_and_update(
+            {"_id": user_id},
+            {"$inc": {"token_version": 1}},
+            projection={"token_version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+        if not user:
+            raise UserNotFoundException()
+
+        user_token_version_cache.set(user_id, user["token_version"])
+
+        return user["token_version"]
+
     async def update(self, object_id, update_object_data):
         raise NotImplementedError("method update() not implemented for Users.")
     
@@ -113,19 +169,18 @@ class UserRepository(
         if not user:
             raise UserNotFoundException()
 
-        if await Project.find(Project.user_id == user_id).count() > 0:
-            await Project.delete_many(Project.user_id == user_id)
-
-            if await Module.find(Module.user_id == user_id).count() > 0:
-                await Module.delete_many(Module.user_id == user_id)
-
-                if await Device.find(Device.user_id == user_id).count() > 0:
-                    await Device.delete_many(Device.user_id == user_id)
-
-                    if await SensorReading.find(SensorReading.user_id == user_id).count() > 0:
-                        await SensorReading.delete_many(SensorReading.user_id == user_id)
+        await SensorReading.find(SensorReading.user_id == user_id).delete()
+        await Device.find(Device.user_id == user_id).delete()
+        await Module.find(Module.user_id == user_id).delete()
+        await Project.find(Project.user_id == user_id).delete()
 
+        await delete_user_buckets(user_id)
+        await delete_user_rollups(user_id)
+        await delete_user_latest_readings(user_id)
+        await DeviceApiKeyRepository().delete_user_keys(user_id)
         await user.delete()
+        user_token_version_cache.delete(user_id)
+        ownership_index.forget_user(user_id)
 
     async def exists(self, username: str, email: str) -> bool:
         
@@ -0,0 +1,266 @@
+"""
+Retention of sensor readings and their rollups.
+
+A device follows its own RetentionPolicy, then its project's, then the server
+default read from RETENTION_RAW_DAYS, RETENTION_MINUTE_DAYS, RETENTION_HOUR_DAYS
+and RETENTION_DAY_DAYS. Every RETENTION_SWEEP_INTERVAL seconds the sweeper checks,
+per device, that the day rollups account for every numeric reading about to
+expire (rebuilding the days that don't), and only then deletes the expired raw
+readings and rollups in batches. Every process may start a sweeper; a lease
+document in MongoDB lets only one of them sweep at a time. Run a single sweep,
+without taking the lease, with:
+
+    python -m database.retention
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from beanie import PydanticObjectId, init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
+
+from database.models.device_model import Device
+from database.models.module_model import Module
+from database.models.project_model import Project
+from database.models.retention_policy_model import RetentionPolicy
+from database.models.sensor_reading_bucket_model import SensorReadingBucket
+from database.models.sensor_reading_model import SensorReading
+from database.models.sensor_reading_rollup_model import SensorReadingRollup
+from database.reading_buckets import bucket_start, buckets_enabled, delete_device_buckets_before
+from database.reading_rollups import ROLLUP_TIERS, rebuild_device_rollups, rollups_enabled
+
+RETENTION_SWEEPER_ENABLED = os.getenv("RETENTION_SWEEPER_ENABLED", "false").lower() == "true"
+RETENTION_SWEEP_INTERVAL = float(os.getenv("RETENTION_SWEEP_INTERVAL", "3600"))
+RETENTION_DELETE_BATCH_SIZE = int(os.getenv("RETENTION_DELETE_BATCH_SIZE", "5000"))
+# a sweeper that stops renewing its lease for this long is replaced by another process
+RETENTION_LEASE_SECONDS = float(os.getenv("RETENTION_LEASE_SECONDS", str(2 * RETENTION_SWEEP_INTERVAL)))
+RETENTION_LEASE_COLLECTION = "retention_leases"
+
+DAY_SECONDS = 86400
+
+logger = logging.getLogger(__name__)
+
+def optional_days(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+DEFAULT_RETENTION_POLICY = RetentionPolicy(
+    raw_days=optional_days("RETENTION_RAW_DAYS"),
+    minute_days=optional_days("RETENTION_MINUTE_DAYS"),
+    hour_days=optional_days("RETENTION_HOUR_DAYS"),
+    day_days=optional_days("RETENTION_DAY_DAYS")
+)
+
+class RetentionSweeper:
+    """Background task that downsamples and then deletes expired sensor readings."""
+
+    def __init__(
+            self,
+            interval: float = RETENTION_SWEEP_INTERVAL,
+            batch_size: int = RETENTION_DELETE_BATCH_SIZE,
+            default_policy: RetentionPolicy = DEFAULT_RETENTION_POLICY,
+            lease_seconds: float = RETENTION_LEASE_SECONDS
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.default_policy = default_policy
+        self.lease_seconds = lease_seconds
+        self.holder = uuid.uuid4().hex
+        self.worker: Optional[asyncio.Task] = None
+        self.sweeps = 0
+        self.skipped_sweeps = 0
+        self.raw_deleted = 0
+        self.rollups_deleted = 0
+        self.rebuilt_days = 0
+        self.skipped_devices = 0
+        self.last_sweep_at: Optional[datetime] = None
+        self.last_sweep_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.worker is not None and not self.worker.done()
+
+    def start(self):
+        if not self.running:
+            self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    def metrics(self) -> dict:
+        return {
+            "sweeps": self.sweeps,
+            "skipped_sweeps": self.skipped_sweeps,
+            "raw_deleted": self.raw_deleted,
+            "rollups_deleted": self.rollups_deleted,
+            "rebuilt_days": self.rebuilt_days,
+            "skipped_devices": self.skipped_devices,
+            "last_sweep_at": self.last_sweep_at,
+            "last_sweep_ms": self.last_sweep_ms
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                now = datetime.now(timezone.utc)
+                if await self.acquire_lease(now):
+                    await self.sweep(now)
+                else:
+                    self.skipped_sweeps += 1
+            except Exception:
+                logger.exception("Retention sweep failed.")
+            await asyncio.sleep(self.interval)
+
+    async def acquire_lease(self, now: datetime) -> bool:
+        """
+        Takes or renews the lease that lets a single process sweep, so every worker can run
+        a sweeper while only one of them reads and deletes. False while another holds it.
+        """
+        leases = Device.get_motor_collection().database[RETENTION_LEASE_COLLECTION]
+
+        try:
+            await leases.find_one_and_update(
+                {"_id": "retention_sweeper", "$or": [{"holder": self.holder}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"holder": self.holder, "expires_at": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+
+        return True
+
+    async def sweep(self, now: Optional[datetime] = None):
+        """Applies the effective retention policy of every device once."""
+        now = now or datetime.now(timezone.utc)
+        started = time.perf_counter()
+        project_policies: Dict[PydanticObjectId, Optional[RetentionPolicy]] = {}
+
+        async for device in Device.find_all():
+            if device.module_id not in project_policies:
+                project_policies[device.module_id] = await self.project_policy(device.module_id)
+            policy = device.retention or project_policies[device.module_id] or self.default_policy
+            await self.sweep_device(device, policy, now)
+
+        self.sweeps += 1
+        self.last_sweep_at = now
+        self.last_sweep_ms = (time.perf_counter() - started) * 1000
+
+    async def project_policy(self, module_id: PydanticObjectId) -> Optional[RetentionPolicy]:
+        module = await Module.get(module_id)
+        if not module:
+            return None
+        project = await Project.get(module.project_id)
+        return project.retention if project else None
+
+    async def sweep_device(self, device: Device, policy: RetentionPolicy, now: datetime):
+        if policy.raw_days:
+            # day aligned so the rebuilt rollups of the last expiring day are complete
+            cutoff = bucket_start(now - timedelta(days=policy.raw_days), DAY_SECONDS)
+
+            if rollups_enabled():
+                await self.ensure_rollups(device, cutoff)
+                self.raw_deleted += await self.delete_raw_readings(device.id, cutoff)
+            else:
+                # without rollups the readings would be lost instead of downsampled
+                self.skipped_devices += 1
+                logger.warning("Not expiring readings of device %s, rollups are disabled.", device.id)
+
+        for tier, tier_seconds in ROLLUP_TIERS.items():
+            days = policy.tier_days(tier)
+            if not days:
+                continue
+            result = await SensorReadingRollup.get_motor_collection().delete_many({
+                "tier": tier,
+                "device_id": device.id,
+                "bucket_start": {"$lte": now - timedelta(days=days, seconds=tier_seconds)}
+            })
+            self.rollups_deleted += result.deleted_count
+
+    async def ensure_rollups(self, device: Device, cutoff: datetime):
+        """Rebuilds the days before cutoff whose day rollups hold fewer numeric readings than are stored."""
+        stored = await self.count_numeric_readings(device.id, cutoff)
+
+        if not stored:
+            return
+
+        rolled_up = defaultdict(int)
+        rollups = SensorReadingRollup.get_motor_collection().find(
+            {"tier": "day", "device_id": device.id, "bucket_start": {"$lt": cutoff}},
+            projection={"_id": 0, "bucket_start": 1, "reading_count": 1}
+        )
+
+        async for rollup in rollups:
+            rolled_up[bucket_start(rollup["bucket_start"], DAY_SECONDS)] += rollup["reading_count"]
+
+        for day, count in sorted(stored.items()):
+            if rolled_up[day] < count:
+                await rebuild_device_rollups(device, day, day + timedelta(seconds=DAY_SECONDS))
+                self.rebuilt_days += 1
+
+    async def count_numeric_readings(self, device_id: PydanticObjectId, cutoff: datetime) -> Dict[datetime, int]:
+        """Numeric readings of a device stored before cutoff per UTC day, counted by the database."""
+        if buckets_enabled():
+            # buckets never straddle a day, and their headers already count the numeric readings
+            collection = SensorReadingBucket.get_motor_collection()
+            pipeline = [
+                {"$match": {"device_id": device_id, "bucket_start": {"$lt": cutoff}}},
+                {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$bucket_start"}}, "count": {"$sum": "$numeric_count"}}}
+            ]
+        else:
+            collection = SensorReading.get_motor_collection()
+            pipeline = [
+                {"$match": {"device_id": device_id, "created_at": {"$lt": cutoff}, "value": {"$type": "number"}}},
+                {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "count": {"$sum": 1}}}
+            ]
+
+        return {
+            datetime.strptime(row["_id"], "%Y-%m-%d").replace(tzinfo=timezone.utc): row["count"]
+            async for row in collection.aggregate(pipeline)
+            if row["count"]
+        }
+
+    async def delete_raw_readings(self, device_id: PydanticObjectId, cutoff: datetime) -> int:
+        """Deletes the readings of a device created before cutoff, batch_size at a time."""
+        if buckets_enabled():
+            return await delete_device_buckets_before(device_id, cutoff, self.batch_size)
+
+        collection = SensorReading.get_motor_collection()
+        query = {"device_id": device_id, "created_at": {"$lt": cutoff}}
+        deleted = 0
+
+        while True:
+            ids = [reading["_id"] async for reading in collection.find(query, projection={"_id": 1}).limit(self.batch_size)]
+            if not ids:
+                return deleted
+            result = await collection.delete_many({"_id": {"$in": ids}})
+            deleted += result.deleted_count
+
+retention_sweeper = RetentionSweeper() if RETENTION_SWEEPER_ENABLED else None
+
+async def main():
+    from app_secrets import DATABASE_NAME, DATABASE_URL
+    from database.config import DOCUMENT_MODELS
+
+    client = AsyncIOMotorClient(DATABASE_URL)
+    try:
+        await init_beanie(database=client[DATABASE_NAME], document_models=DOCUMENT_MODELS)
+        sweeper = RetentionSweeper()
+        await sweeper.sweep()
+        print(sweeper.metrics())
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
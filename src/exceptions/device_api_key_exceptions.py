@@ -0,0 +1,17 @@
+class InvalidDeviceApiKeyException(Exception):
+    "Exception used for unknown or revoked device API keys."
+
+    def __init__(self, message: str = "Invalid or revoked device API key."):
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+class DeviceApiKeyNotFoundException(Exception):
+    "Exception used for failed device API key search."
+
+    def __init__(self, message: str = "Device API key not found."):
+        self.message = message
+
+    def __str__(self):
+        return self.message
@@ -0,0 +1,26 @@
+class IngestionQueueFullException(Exception):
+    "Exception used when the sensor reading ingestion queue is full."
+
+    def __init__(self, message: str = "Ingestion queue is full, try again later."):
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+class InvalidReadingStreamException(Exception):
+    "Exception used for malformed sensor reading upload streams."
+
+    def __init__(self, message: str = "Malformed reading stream."):
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+class InvalidReadingFrameException(Exception):
+    "Exception used for malformed binary reading frames."
+
+    def __init__(self, message: str = "Malformed reading frame."):
+        self.message = message
+
+    def __str__(self):
+        return self.message
@@ -15,3 +15,21 @@ class UserConflictException(Exception):
 
     def __str__(self):
         return self.message
+
+class InvalidTokenException(Exception):
+    "Exception used for tokens whose user no longer exists or whose version was revoked."
+    
+    def __init__(self, message: str = "Invalid or revoked token."):
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+class PasswordHasherBusyException(Exception):
+    "Exception used when too many password hashes are already queued."
+    
+    def __init__(self, message: str = "Too many login or registration requests, try again later."):
+        self.message = message
+
+    def __str__(self):
+        return self.message
@@ -6,10 +6,16 @@ import uvicorn
 from subprocess import run
 
 from database.config import connect_to_db
+from database.ingestion_queue import sensor_reading_ingestion_queue
+from database.retention import retention_sweeper
+from utils.hash import password_hasher
 from controllers.user_controller import user_router
 from controllers.auth_controller import auth_router
 from controllers.project_controller import project_router
 from controllers.module_controller import module_router
+from controllers.device_controller import device_router
+from controllers.sensor_reading_controller import sensor_reading_router
+from utils.responses import FastJSONResponse
 
 app = FastAPI()
 
@@ -17,10 +23,19 @@ app = FastAPI()
 async def lifespan(app: FastAPI):
     # Setup actions (called during startup)
     await connect_to_db()
+    if sensor_reading_ingestion_queue:
+        sensor_reading_ingestion_queue.start()
+    if retention_sweeper:
+        retention_sweeper.start()
     yield 
     print("Shutting down the app...")
+    if retention_sweeper:
+        await retention_sweeper.stop()
+    if sensor_reading_ingestion_queue:
+        await sensor_reading_ingestion_queue.drain()
+    password_hasher.stop()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +50,8 @@ app.include_router(user_router)
 app.include_router(auth_router)
 app.include_router(project_router)
 app.include_router(module_router)
+app.include_router(device_router)
+app.include_router(sensor_reading_router)
 
 if __name__ == "__main__":
     
@@ -1,5 +1,6 @@
 import logging
 from bson import ObjectId
+import pytest
 import pytest_asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
@@ -11,8 +12,22 @@ from app_secrets import TEST_DATABASE_NAME, TEST_DATABASE_URL
 from database.models.user_model import User
 from database.models.project_model import Project
 from database.models.module_model import Module
+from database.models.device_model import Device
+from database.models.device_api_key_model import DeviceApiKey
+from database.models.sensor_reading_bucket_model import SensorReadingBucket
+from database.models.sensor_reading_rollup_model import SensorReadingRollup
+from database.models.sensor_reading_model import SensorReading
+from database.models.latest_sensor_reading_model import LatestSensorReading
+from database.ownership import ownership_index
+from database.repositories.device_api_key_repository import device_api_key_cache
+from database.repositories.user_repository import user_token_version_cache
+from enums.data_type import DataType
+from enums.device_type import DeviceType
+from enums.measurement_type import MeasurementType
+from enums.measurement_unit import MeasurementUnit
+from utils import auth
 from utils.hash import hash_password, verify_password
-from utils.token import generate_jwt_token
+from utils.token import generate_user_token
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -24,7 +39,7 @@ async def test_db():
 
     await init_beanie(
         database=database,
-        document_models=[User, Project, Module]
+        document_models=[User, Project, Module, Device, SensorReading, SensorReadingBucket, SensorReadingRollup, LatestSensorReading, DeviceApiKey]
     )
 
     try:
@@ -34,6 +49,10 @@ async def test_db():
         for collection in collections:
             await database[collection].delete_many({})  
 
+        user_token_version_cache.clear()
+        device_api_key_cache.clear()
+        ownership_index.clear()
+
         client.close()
 
 @pytest_asyncio.fixture(scope="function")
@@ -68,11 +87,16 @@ async def test_token(test_db, test_user):
     )
 
     if user and verify_password(test_user["password"], user.password):
-        jwt_token = generate_jwt_token({"sub": user.email})
+        jwt_token = generate_user_token(user.id, user.email, user.token_version)
         return {
             "access_token": jwt_token
         }
      
+@pytest.fixture(scope="function")
+def ops_user(monkeypatch, test_user):
+    monkeypatch.setattr(auth, "OPS_USER_EMAILS", {test_user["email"]})
+    return test_user
+
 @pytest_asyncio.fixture(scope="function")
 async def test_project(test_user):
 
@@ -95,6 +119,57 @@ async def test_project(test_user):
         "modules": project.modules
     }
 
+@pytest_asyncio.fixture(scope="function")
+async def test_module(test_user, test_project):
+
+    module = Module(
+        user_id=ObjectId(test_user["id"]),
+        project_id=test_project["id"],
+        name="module",
+        description="my module description"
+    )
+
+    await module.insert()
+    await Project.find_one(Project.id == test_project["id"]).update({"$push": {"modules": module.id}})
+
+    return {
+        "id": module.id,
+        "user_id": module.user_id,
+        "project_id": module.project_id,
+        "name": module.name,
+        "description": module.description,
+        "devices": module.devices
+    }
+
+@pytest_asyncio.fixture(scope="function")
+async def test_device(test_user, test_module):
+
+    device = Device(
+        user_id=ObjectId(test_user["id"]),
+        module_id=test_module["id"],
+        name="device",
+        description="my device description",
+        device_type=DeviceType.SENSOR,
+        data_types=[
+            DataType(
+                measurement_type=MeasurementType.TEMPERATURE,
+                measurement_unit=MeasurementUnit.CELSIUS
+            )
+        ]
+    )
+
+    await device.insert()
+    await Module.find_one(Module.id == test_module["id"]).update({"$push": {"devices": device.id}})
+
+    return {
+        "id": device.id,
+        "user_id": device.user_id,
+        "module_id": device.module_id,
+        "name": device.name,
+        "device_type": device.device_type,
+        "data_types": [data_type.model_dump(mode="json") for data_type in device.data_types]
+    }
+
 
 
 
@@ -1,7 +1,10 @@
+import asyncio
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from database.repositories.user_repository import user_token_version_cache
 from main import app
+from utils.token import decode_jwt_claims, generate_jwt_token
 
 @pytest.mark.asyncio
 async def test_generate_token_with_username(test_user):
@@ -35,4 +38,92 @@ async def test_generate_token_with_email(test_user):
         response = await ac.post("/token", data=login_request)
 
     assert response.status_code == 200
-    assert "access_token" in response.json()
\ No newline at end of file
+    assert "access_token" in response.json()
+
+@pytest.mark.asyncio
+async def test_token_version_cache_invalidated_on_delete(ops_user, test_token):
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        first = await ac.get("/auth-cache-metrics", headers=headers)
+        second = await ac.get("/auth-cache-metrics", headers=headers)
+        await ac.delete("/users/delete", headers=headers)
+        response = await ac.get("/auth-cache-metrics", headers=headers)
+
+    assert first.status_code == 200
+    assert second.json()["user_token_versions"]["hits"] == first.json()["user_token_versions"]["hits"] + 1
+    assert user_token_version_cache.metrics()["size"] == 0
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_reject_token_without_version_claims(test_user):
+
+    legacy_token = generate_jwt_token({"sub": test_user["email"]})
+    unversioned_token = generate_jwt_token({"sub": test_user["email"], "uid": str(test_user["id"])})
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        legacy = await ac.get("/projects/list", headers={"Authorization": f"Bearer {legacy_token}"})
+        unversioned = await ac.get("/projects/list", headers={"Authorization": f"Bearer {unversioned_token}"})
+
+    assert legacy.status_code == 401
+    assert unversioned.status_code == 401
+
+@pytest.mark.asyncio
+async def test_revoke_tokens(test_user):
+
+    login_request = {
+        "username": test_user["username"],
+        "password": test_user["password"]
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        token = (await ac.post("/token", data=login_request)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        listed = await ac.get("/projects/list", headers=headers)
+        revoked = await ac.post("/token/revoke", headers=headers)
+        rejected = await ac.get("/projects/list", headers=headers)
+
+        new_token = (await ac.post("/token", data=login_request)).json()["access_token"]
+        accepted = await ac.get("/projects/list", headers={"Authorization": f"Bearer {new_token}"})
+
+    assert decode_jwt_claims(token)["uid"] == str(test_user["id"])
+    assert listed.status_code == 200
+    assert revoked.status_code == 204
+    assert rejected.status_code == 401
+    assert accepted.status_code == 200
+
+@pytest.mark.asyncio
+async def test_password_hasher_metrics(ops_user, test_token):
+
+    login_request = {
+        "username": ops_user["username"],
+        "password": ops_user["password"]
+    }
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        before = (await ac.get("/password-hasher-metrics", headers=headers)).json()
+        logins = await asyncio.gather(*(ac.post("/token", data=login_request) for _ in range(3)))
+        after = (await ac.get("/password-hasher-metrics", headers=headers)).json()
+
+    assert all(login.status_code == 200 for login in logins)
+    assert after["completed"] == before["completed"] + 3
+    assert after["queue_depth"] == 0 and after["running"] == 0
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from database.models.device_api_key_model import DeviceApiKey
+from database.models.device_model import Device
+from database.models.module_model import Module
+from database.models.project_model import Project
+from database.models.sensor_reading_model import SensorReading
+from database.repositories.device_repository import DeviceRepository
+from main import app
+
+@pytest.mark.asyncio
+async def test_create_devices_in_parallel(test_token, test_project, test_module):
+
+    module_id = str(test_module["id"])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    create_device_json = {
+        "name": "device",
+        "description": "parallel device",
+        "device_type": "sensor",
+        "data_types": [{"measurement_type": "temperature", "measurement_unit": "celsius"}]
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        responses = await asyncio.gather(*(
+            ac.post(f"/devices/create/{module_id}", json=create_device_json, headers=headers)
+            for _ in range(20)
+        ))
+        module = await Module.get(test_module["id"])
+        deleted = await ac.delete(f"/modules/delete/{test_project['id']}/{module_id}", headers=headers)
+
+    created_ids = {response.json()["id"] for response in responses}
+
+    assert all(response.status_code == 201 for response in responses)
+    assert set(map(str, module.devices)) == created_ids
+    assert len(created_ids) == 20
+    assert deleted.status_code == 204
+    assert await Module.get(test_module["id"]) is None
+    assert await Device.find(Device.module_id == test_module["id"]).count() == 0
+    assert test_module["id"] not in (await Project.get(test_project["id"])).modules
+
+@pytest.mark.asyncio
+async def test_delete_device_removes_api_keys(test_token, test_module, test_device):
+
+    device_id = str(test_device["id"])
+    ingest_json = {"readings": [{"device_id": device_id, "data_type": test_device["data_types"][0], "value": 21.5}]}
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        api_key = (await ac.post(f"/devices/api-keys/create/{device_id}", headers=headers, json={"name": "gateway"})).json()["api_key"]
+        accepted = await ac.post("/sensor-readings/ingest", headers={"X-Device-Key": api_key}, json=ingest_json)
+
+        await DeviceRepository().delete(test_device["user_id"], test_module["id"], test_device["id"])
+
+        rejected = await ac.post("/sensor-readings/ingest", headers={"X-Device-Key": api_key}, json=ingest_json)
+
+    assert accepted.status_code == 201
+    assert rejected.status_code == 401
+    assert await DeviceApiKey.find(DeviceApiKey.device_id == test_device["id"]).count() == 0
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 0
+    assert test_device["id"] not in (await Module.get(test_module["id"])).devices
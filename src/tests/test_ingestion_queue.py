@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from controllers.sensor_reading_controller import sensor_reading_repository
+from database.ingestion_queue import SensorReadingIngestionQueue
+from database.models.sensor_reading_model import SensorReading
+from main import app
+from utils import auth
+
+def make_readings(test_device, count):
+    return [
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=test_device["id"],
+            data_type=test_device["data_types"][0],
+            value=value
+        )
+        for value in range(count)
+    ]
+
+async def wait_for_flushes(queue, flush_count, timeout=1.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while queue.flush_count < flush_count and loop.time() < deadline:
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_queue_flushes_full_batches(test_device):
+
+    queue = SensorReadingIngestionQueue(batch_size=3, flush_interval=10)
+    queue.start()
+
+    for reading in make_readings(test_device, 3):
+        queue.submit(reading)
+
+    await wait_for_flushes(queue, 1)
+    metrics = queue.metrics()
+    await queue.drain()
+
+    assert metrics["flush_count"] == 1
+    assert metrics["flushed"] == 3
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 3
+
+@pytest.mark.asyncio
+async def test_queue_flushes_partial_batch_after_interval(test_device):
+
+    queue = SensorReadingIngestionQueue(batch_size=100, flush_interval=0.05)
+    queue.start()
+
+    for reading in make_readings(test_device, 2):
+        queue.submit(reading)
+
+    await wait_for_flushes(queue, 1)
+    metrics = queue.metrics()
+    await queue.drain()
+
+    assert metrics["flush_count"] == 1
+    assert metrics["flushed"] == 2
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 2
+
+@pytest.mark.asyncio
+async def test_drain_flushes_collected_batch(test_device):
+
+    queue = SensorReadingIngestionQueue(batch_size=3, flush_interval=10)
+    queue.start()
+
+    # the worker picks up the reading and waits for the batch to fill
+    queue.submit(make_readings(test_device, 1)[0])
+    await asyncio.sleep(0.01)
+
+    await queue.drain()
+
+    assert not queue.running
+    assert queue.metrics()["flush_count"] == 1
+    assert queue.metrics()["flushed"] == 1
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 1
+
+@pytest.mark.asyncio
+async def test_drain_flushes_queued_readings(test_device):
+
+    queue = SensorReadingIngestionQueue(batch_size=3, flush_interval=10)
+    queue.start()
+
+    # submitted without yielding, so every reading is still queued when drain() starts
+    for reading in make_readings(test_device, 5):
+        queue.submit(reading)
+
+    await queue.drain()
+
+    assert not queue.running
+    assert queue.metrics()["queue_depth"] == 0
+    assert queue.metrics()["flushed"] == 5
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 5
+
+@pytest.mark.asyncio
+async def test_drain_while_worker_is_collecting(test_device):
+
+    queue = SensorReadingIngestionQueue(batch_size=3, flush_interval=10)
+    queue.start()
+    readings = make_readings(test_device, 5)
+
+    queue.submit(readings[0])
+    await asyncio.sleep(0.01)
+
+    # wakes the worker's pending get() in the same step drain() cancels it
+    for reading in readings[1:]:
+        queue.submit(reading)
+
+    drain = asyncio.ensure_future(queue.drain())
+    done, _ = await asyncio.wait({drain}, timeout=1)
+
+    assert drain in done
+    assert not queue.running
+    assert queue.metrics()["flushed"] == 5
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 5
+
+@pytest.mark.asyncio
+async def test_create_reading_when_queue_is_full(monkeypatch, test_token, test_device):
+
+    queue = SensorReadingIngestionQueue(max_size=1)
+    monkeypatch.setattr(sensor_reading_repository, "ingestion_queue", queue)
+
+    device_id = str(test_device["id"])
+    reading = {"device_id": device_id, "data_type": test_device["data_types"][0], "value": 21.5}
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        accepted = await ac.post(f"/sensor-readings/create/{device_id}", json=reading, headers=headers)
+        rejected = await ac.post(f"/sensor-readings/create/{device_id}", json=reading, headers=headers)
+
+    await queue.drain()
+
+    assert accepted.status_code == 201
+    assert rejected.status_code == 503
+    assert queue.metrics()["rejected"] == 1
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 1
+
+@pytest.mark.asyncio
+async def test_ingestion_metrics_are_limited_to_operators(monkeypatch, test_user, test_token):
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        forbidden = await ac.get("/sensor-readings/ingestion-metrics", headers=headers)
+        monkeypatch.setattr(auth, "OPS_USER_EMAILS", {test_user["email"]})
+        allowed = await ac.get("/sensor-readings/ingestion-metrics", headers=headers)
+
+    assert forbidden.status_code == 403
+    assert allowed.status_code == 200
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from controllers.sensor_reading_controller import sensor_reading_repository
+from database import reading_buckets
+from database.models.sensor_reading_bucket_model import SensorReadingBucket
+from database.models.sensor_reading_model import SensorReading
+from database.retention import RetentionSweeper
+from main import app
+
+PRESSURE = {"measurement_type": "pressure", "measurement_unit": "bar"}
+
+@pytest.fixture(autouse=True)
+def bucket_storage(monkeypatch):
+    monkeypatch.setattr(reading_buckets, "SENSOR_READINGS_STORAGE", "buckets")
+
+def make_reading(test_device, value, created_at, data_type=None):
+    return SensorReading(
+        user_id=test_device["user_id"],
+        device_id=test_device["id"],
+        data_type=data_type or test_device["data_types"][0],
+        value=value,
+        created_at=created_at
+    )
+
+@pytest.mark.asyncio
+async def test_append_updates_bucket_header(test_device):
+
+    created_at = datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+
+    await sensor_reading_repository.insert_batch([
+        make_reading(test_device, value, created_at + timedelta(minutes=minute))
+        for minute, value in enumerate([20.5, 18, 22])
+    ])
+    await sensor_reading_repository.insert_batch([
+        make_reading(test_device, 25, created_at + timedelta(minutes=3)),
+        make_reading(test_device, "offline", created_at + timedelta(minutes=4))
+    ])
+
+    buckets = await SensorReadingBucket.find(SensorReadingBucket.device_id == test_device["id"]).to_list()
+
+    assert len(buckets) == 1
+    assert buckets[0].bucket_start.replace(tzinfo=timezone.utc) == created_at
+    assert buckets[0].values == [20.5, 18, 22, 25, "offline"]
+    assert buckets[0].reading_count == 5
+    assert buckets[0].numeric_count == 4
+    assert buckets[0].sum == 85.5
+    assert buckets[0].min == 18
+    assert buckets[0].max == 25
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 0
+
+@pytest.mark.asyncio
+async def test_range_read_across_two_buckets(test_token, test_module, test_device):
+
+    device_id = test_device["id"]
+    created_at = datetime(2024, 5, 1, 10, 58, tzinfo=timezone.utc)
+
+    # 10:58 to 11:02, split across the 10:00 and 11:00 buckets
+    await sensor_reading_repository.insert_batch([
+        make_reading(test_device, minute, created_at + timedelta(minutes=minute))
+        for minute in range(5)
+    ])
+
+    assert await SensorReadingBucket.find(SensorReadingBucket.device_id == device_id).count() == 2
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+    params = {"start": "2024-05-01T10:59:00Z", "end": "2024-05-01T11:02:00Z"}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        device_page = await ac.get(f"/sensor-readings/list/{device_id}", headers=headers, params=params)
+        descending_page = await ac.get(f"/sensor-readings/list/{device_id}", headers=headers, params={**params, "order": "desc"})
+        module_page = await ac.get(f"/sensor-readings/list/module/{test_module['id']}", headers=headers, params=params)
+
+    assert device_page.status_code == 200
+    assert [reading["value"] for reading in device_page.json()["items"]] == [1, 2, 3]
+    assert [reading["value"] for reading in descending_page.json()["items"]] == [3, 2, 1]
+    assert module_page.status_code == 200
+    assert [reading["value"] for reading in module_page.json()["devices"][0]["readings"]] == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_multiple_data_types_in_one_window(test_token, test_module, test_device):
+
+    device_id = test_device["id"]
+    created_at = datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+
+    await sensor_reading_repository.insert_batch([
+        make_reading(test_device, value, created_at + timedelta(seconds=value), None if value % 2 else PRESSURE)
+        for value in (1, 3, 2, 4)
+    ])
+
+    buckets = await SensorReadingBucket.find(SensorReadingBucket.device_id == device_id).to_list()
+
+    assert len(buckets) == 2
+    assert {bucket.bucket_start.replace(tzinfo=timezone.utc) for bucket in buckets} == {created_at}
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        module_page = await ac.get(f"/sensor-readings/list/module/{test_module['id']}", headers=headers, params={"date": "2024-05-01"})
+        pressure_page = await ac.get(
+            f"/sensor-readings/list/module/{test_module['id']}",
+            headers=headers,
+            params={"date": "2024-05-01", "measurement_type": "pressure"}
+        )
+        latest = await ac.get(f"/sensor-readings/latest/module/{test_module['id']}", headers=headers)
+
+    assert [reading["value"] for reading in module_page.json()["devices"][0]["readings"]] == [1, 2, 3, 4]
+    assert [reading["value"] for reading in pressure_page.json()["devices"][0]["readings"]] == [2, 4]
+    assert latest.status_code == 200
+    assert sorted(
+        (reading["data_type"]["measurement_type"], reading["value"])
+        for reading in latest.json()[0]["readings"]
+    ) == [("pressure", 4), ("temperature", 3)]
+
+@pytest.mark.asyncio
+async def test_aggregate_bucketed_readings(test_token, test_device):
+
+    device_id = test_device["id"]
+    created_at = datetime(2024, 5, 1, 10, 59, 30, tzinfo=timezone.utc)
+
+    # 30s bins are finer than every rollup tier, so the buckets are unwound
+    await sensor_reading_repository.insert_batch([
+        make_reading(test_device, value, created_at + timedelta(seconds=15 * value))
+        for value in range(4)
+    ])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.get(
+            f"/sensor-readings/aggregate/{device_id}",
+            headers=headers,
+            params={"interval": "30s", "date": "2024-05-01"}
+        )
+
+    assert response.status_code == 200
+    assert [bucket["count"] for bucket in response.json()] == [2, 2]
+    assert [bucket["sum"] for bucket in response.json()] == [1, 5]
+
+@pytest.mark.asyncio
+async def test_retention_counts_bucketed_readings_per_day(test_device):
+
+    created_at = datetime(2024, 4, 1, 22, tzinfo=timezone.utc)
+
+    # appended around the write path, so no rollups exist yet
+    await reading_buckets.append_readings([
+        reading_buckets.encode_reading(make_reading(test_device, value, created_at + timedelta(hours=hours)))
+        for hours, value in enumerate([20.5, 21, 22, "offline"])
+    ])
+
+    counts = await RetentionSweeper().count_numeric_readings(test_device["id"], datetime(2024, 5, 1, tzinfo=timezone.utc))
+
+    assert counts == {datetime(2024, 4, 1, tzinfo=timezone.utc): 2, datetime(2024, 4, 2, tzinfo=timezone.utc): 1}
@@ -0,0 +1,788 @@
+from datetime import date, datetime, timedelta, timezone
+import json
+import pytest
+from beanie import PydanticObjectId
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+
+from controllers.sensor_reading_controller import sensor_reading_repository
+from database import reading_buckets
+from database.models.sensor_reading_model import SensorReading
+from database.models.sensor_reading_rollup_model import SensorReadingRollup
+from database.ownership import ownership_index
+from database.reading_rollups import rebuild_rollups, rollup_segments
+from database import reading_writes
+from database.retention import RetentionSweeper
+from main import app
+from utils.binary_frames import READING_RECORD, encode_reading_frame
+from utils.helper_functions import validate_time_range
+
+@pytest.mark.asyncio
+async def test_create_sensor_readings_batch(test_token, test_device):
+
+    device_id = str(test_device["id"])
+    data_type = test_device["data_types"][0]
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    create_reading_batch_json = {
+        "readings": [
+            {"device_id": device_id, "data_type": data_type, "value": 21.5},
+            {"device_id": device_id, "data_type": data_type, "value": 22.0},
+            {
+                "device_id": device_id,
+                "data_type": {"measurement_type": "pressure", "measurement_unit": "bar"},
+                "value": 1.2
+            }
+        ]
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.post(f"/sensor-readings/create-batch/{device_id}", headers=headers, json=create_reading_batch_json)
+
+    assert response.status_code == 201
+    assert response.json()["inserted"] == 2
+    assert response.json()["rejected"] == 1
+    assert response.json()["results"][0]["id"] is not None
+    assert response.json()["results"][2]["error"] is not None
+
+@pytest.mark.asyncio
+async def test_create_batch_when_derived_update_fails(monkeypatch, test_token, test_device):
+
+    async def failing_update(readings, failed):
+        raise RuntimeError("rollup write failed")
+
+    monkeypatch.setattr(reading_writes, "update_derived_readings", failing_update)
+
+    device_id = str(test_device["id"])
+    reading = {"device_id": device_id, "data_type": test_device["data_types"][0], "value": 21.5}
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.post(f"/sensor-readings/create-batch/{device_id}", headers=headers, json={"readings": [reading, reading]})
+
+    assert response.status_code == 201
+    assert response.json()["inserted"] == 2
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 2
+
+@pytest.mark.asyncio
+async def test_stream_sensor_readings(test_token, test_device):
+
+    device_id = str(test_device["id"])
+    data_type = test_device["data_types"][0]
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}",
+        "Content-Type": "application/x-ndjson"
+    }
+
+    async def ndjson_body():
+        for value in range(5):
+            yield json.dumps({"device_id": device_id, "data_type": data_type, "value": value}).encode() + b"\n"
+        yield b'{"device_id": "' + device_id.encode() + b'", "value": 1}\n'
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.post(f"/sensor-readings/stream/{device_id}", headers=headers, content=ndjson_body())
+
+    assert response.status_code == 201
+    assert response.json()["received"] == 6
+    assert response.json()["inserted"] == 5
+    assert response.json()["rejected"] == 1
+    assert response.json()["errors"][0]["index"] == 5
+
+
+@pytest.mark.asyncio
+async def test_create_sensor_readings_binary(test_token, test_device):
+
+    device_id = str(test_device["id"])
+    created_at = datetime.now(timezone.utc)
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}",
+        "Content-Type": "application/octet-stream"
+    }
+
+    frame = encode_reading_frame([(0, created_at, 21.5), (0, created_at, 22.5), (3, created_at, 1.0)])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.post(f"/sensor-readings/binary/{device_id}", headers=headers, content=frame)
+
+    assert response.status_code == 201
+    assert response.json()["inserted"] == 2
+    assert response.json()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_binary_frame_rejects_bad_timestamps_and_values(test_token, test_device):
+
+    device_id = str(test_device["id"])
+    created_at = datetime.now(timezone.utc)
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}",
+        "Content-Type": "application/octet-stream"
+    }
+
+    frame = (
+        encode_reading_frame([(0, created_at, 21.5)])
+        + READING_RECORD.pack(0, 10 ** 15, 1.0)
+        + encode_reading_frame([(0, created_at, float("nan")), (0, created_at, float("inf")), (0, created_at, 22.5)])
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.post(f"/sensor-readings/binary/{device_id}", headers=headers, content=frame)
+
+    assert response.status_code == 201
+    assert response.json()["inserted"] == 2
+    assert [(error["index"], error["error"]) for error in response.json()["errors"]] == [
+        (1, "Timestamp out of range."),
+        (2, "Value must be a finite number."),
+        (3, "Value must be a finite number.")
+    ]
+
+@pytest.mark.asyncio
+async def test_ingest_sensor_readings_with_device_api_key(test_token, test_device):
+
+    device_id = str(test_device["id"])
+    data_type = test_device["data_types"][0]
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    ingest_json = {
+        "readings": [
+            {"device_id": device_id, "data_type": data_type, "value": 21.5}
+        ]
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        key_response = await ac.post(f"/devices/api-keys/create/{device_id}", headers=headers, json={"name": "gateway"})
+        api_key = key_response.json()["api_key"]
+        key_id = key_response.json()["id"]
+
+        response = await ac.post("/sensor-readings/ingest", headers={"X-Device-Key": api_key}, json=ingest_json)
+        await ac.delete(f"/devices/api-keys/revoke/{device_id}/{key_id}", headers=headers)
+        revoked_response = await ac.post("/sensor-readings/ingest", headers={"X-Device-Key": api_key}, json=ingest_json)
+
+    assert key_response.status_code == 201
+    assert response.status_code == 201
+    assert response.json()["inserted"] == 1
+    assert revoked_response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_list_sensor_readings_by_date(test_token, test_device):
+
+    device_id = test_device["id"]
+    data_type = test_device["data_types"][0]
+
+    readings = [
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=data_type,
+            value=value,
+            created_at=created_at
+        )
+        for value, created_at in [
+            (1, datetime(2024, 5, 1, 23, 59, tzinfo=timezone.utc)),
+            (2, datetime(2024, 5, 2, 0, 0, tzinfo=timezone.utc)),
+            (3, datetime(2024, 5, 2, 23, 59, tzinfo=timezone.utc)),
+            (4, datetime(2024, 5, 3, 0, 0, tzinfo=timezone.utc))
+        ]
+    ]
+    await SensorReading.insert_many(readings)
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.get(f"/sensor-readings/list/{device_id}", headers=headers, params={"date": "2024-05-02"})
+
+    assert response.status_code == 200
+    assert [reading["value"] for reading in response.json()["items"]] == [2, 3]
+
+@pytest.mark.asyncio
+async def test_reading_range_query_uses_index(test_db):
+
+    device_id = PydanticObjectId()
+    start, end = validate_time_range(day=date(2024, 5, 2))
+
+    explain = await SensorReading.get_motor_collection().find(
+        sensor_reading_repository.range_query(device_id, start, end)
+    ).sort([("created_at", 1), ("_id", 1)]).explain()
+
+    winning_plan = explain["queryPlanner"]["winningPlan"]
+    input_stage = winning_plan.get("inputStage", winning_plan)
+
+    assert input_stage["stage"] == "IXSCAN"
+    assert input_stage["keyPattern"] == {"device_id": 1, "created_at": 1, "_id": 1}
+
+@pytest.mark.asyncio
+async def test_list_sensor_readings_with_cursor(test_token, test_device):
+
+    device_id = test_device["id"]
+    data_type = test_device["data_types"][0]
+    created_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+    await SensorReading.insert_many([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=data_type,
+            value=value,
+            created_at=created_at
+        )
+        for value in range(5)
+    ])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    values = []
+    params = {"limit": 2, "order": "desc"}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        while True:
+            response = await ac.get(f"/sensor-readings/list/{device_id}", headers=headers, params=params)
+            assert response.status_code == 200
+            values += [reading["value"] for reading in response.json()["items"]]
+            if not response.json()["next_cursor"]:
+                break
+            params["cursor"] = response.json()["next_cursor"]
+
+    assert sorted(values) == [0, 1, 2, 3, 4]
+
+@pytest.mark.asyncio
+async def test_list_sensor_readings_with_cursor_and_start(test_token, test_device):
+
+    device_id = test_device["id"]
+    created_at = datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+
+    await SensorReading.insert_many([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=test_device["data_types"][0],
+            value=value,
+            created_at=created_at + timedelta(minutes=value)
+        )
+        for value in range(5)
+    ])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        first = await ac.get(f"/sensor-readings/list/{device_id}", headers=headers, params={"date": "2024-05-01", "limit": 2})
+        second = await ac.get(
+            f"/sensor-readings/list/{device_id}",
+            headers=headers,
+            params={"date": "2024-05-01", "limit": 2, "cursor": first.json()["next_cursor"]}
+        )
+
+    assert [reading["value"] for reading in first.json()["items"]] == [0, 1]
+    assert second.status_code == 200
+    assert [reading["value"] for reading in second.json()["items"]] == [2, 3]
+
+@pytest.mark.asyncio
+async def test_list_sensor_readings_columnar(test_token, test_device):
+
+    device_id = test_device["id"]
+    data_type = test_device["data_types"][0]
+
+    await sensor_reading_repository.insert_batch([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=data_type,
+            value=value,
+            created_at=datetime(2024, 5, 1, value, tzinfo=timezone.utc)
+        )
+        for value in range(3)
+    ])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.get(
+            f"/sensor-readings/list/{device_id}",
+            headers=headers,
+            params={"format": "columnar", "limit": 2}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["series"] == [{
+        "data_type": data_type,
+        "timestamps": [1714521600000, 1714525200000],
+        "values": [0, 1]
+    }]
+    assert response.json()["next_cursor"]
+
+@pytest.mark.asyncio
+async def test_export_sensor_readings_csv(test_token, test_device):
+
+    device_id = test_device["id"]
+    data_type = test_device["data_types"][0]
+
+    await SensorReading.insert_many([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=data_type,
+            value=value,
+            created_at=datetime(2024, 5, 1, value, tzinfo=timezone.utc)
+        )
+        for value in range(3)
+    ])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.get(f"/sensor-readings/export/{device_id}", headers=headers, params={"format": "csv"})
+
+    rows = response.text.strip().splitlines()
+
+    assert response.status_code == 200
+    assert rows[0] == "created_at,measurement_type,measurement_unit,value"
+    assert [row.split(",")[-1] for row in rows[1:]] == ["0", "1", "2"]
+
+@pytest.mark.asyncio
+async def test_aggregate_sensor_readings(test_token, test_device):
+
+    device_id = test_device["id"]
+    data_type = test_device["data_types"][0]
+
+    # written through the repository so the rollup tiers are kept up to date
+    await sensor_reading_repository.insert_batch([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=data_type,
+            value=value,
+            created_at=datetime(2024, 5, 1, value // 2, tzinfo=timezone.utc)
+        )
+        for value in range(4)
+    ])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.get(
+            f"/sensor-readings/aggregate/{device_id}",
+            headers=headers,
+            params={"interval": "1h", "date": "2024-05-01"}
+        )
+
+    assert response.status_code == 200
+    assert [bucket["count"] for bucket in response.json()] == [2, 2]
+    assert response.json()[1]["min"] == 2
+    assert response.json()[1]["last"] == 3
+
+@pytest.mark.asyncio
+async def test_retention_sweep_downsamples_before_expiring(test_token, test_project, test_device):
+
+    device_id = test_device["id"]
+    data_type = test_device["data_types"][0]
+    now = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.put(
+            f"/projects/retention/{test_project['id']}",
+            headers=headers,
+            json={"retention": {"raw_days": 30}}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["retention"]["raw_days"] == 30
+
+    # inserted around the write path, so the sweeper has to build the rollups itself
+    await SensorReading.insert_many([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=data_type,
+            value=value,
+            created_at=created_at
+        )
+        for value, created_at in [
+            (1, datetime(2024, 4, 1, 10, tzinfo=timezone.utc)),
+            (3, datetime(2024, 4, 1, 11, tzinfo=timezone.utc)),
+            (5, datetime(2024, 5, 31, tzinfo=timezone.utc))
+        ]
+    ])
+
+    sweeper = RetentionSweeper()
+    await sweeper.sweep(now)
+
+    remaining = await SensorReading.find(SensorReading.device_id == device_id).to_list()
+    day_rollup = await SensorReadingRollup.find_one({"tier": "day", "device_id": device_id, "bucket_start": datetime(2024, 4, 1)})
+
+    assert [reading.value for reading in remaining] == [5]
+    assert day_rollup.reading_count == 2
+    assert day_rollup.sum == 4
+    assert sweeper.raw_deleted == 2
+    assert sweeper.rebuilt_days == 1
+
+    # a full backfill only replaces the rollups of days that still have raw readings
+    await rebuild_rollups(device_id)
+
+    day_rollups = await SensorReadingRollup.find({"tier": "day", "device_id": device_id}).sort("+bucket_start").to_list()
+
+    assert [(rollup.bucket_start, rollup.sum) for rollup in day_rollups] == [(datetime(2024, 4, 1), 4), (datetime(2024, 5, 31), 5)]
+
+@pytest.mark.asyncio
+async def test_rebuild_rollups_skips_current_day(test_device):
+
+    device_id = test_device["id"]
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # inserted around the write path, so only a rebuild could fold them in
+    await SensorReading.insert_many([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=test_device["data_types"][0],
+            value=value,
+            created_at=created_at
+        )
+        for value, created_at in [(1, today - timedelta(hours=12)), (2, today)]
+    ])
+
+    await rebuild_rollups(device_id)
+
+    day_rollups = await SensorReadingRollup.find({"tier": "day", "device_id": device_id}).to_list()
+
+    assert [(rollup.bucket_start, rollup.sum) for rollup in day_rollups] == [((today - timedelta(days=1)).replace(tzinfo=None), 1)]
+
+@pytest.mark.asyncio
+async def test_retention_lease_lets_one_sweeper_run(test_db):
+
+    now = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+    first = RetentionSweeper(lease_seconds=60)
+    second = RetentionSweeper(lease_seconds=60)
+
+    assert await first.acquire_lease(now)
+    assert not await second.acquire_lease(now + timedelta(seconds=30))
+    assert await first.acquire_lease(now + timedelta(seconds=30))
+    assert not await second.acquire_lease(now + timedelta(seconds=60))
+    # the first sweeper stopped renewing
+    assert await second.acquire_lease(now + timedelta(seconds=90))
+    assert not await first.acquire_lease(now + timedelta(seconds=90))
+
+@pytest.mark.asyncio
+async def test_aggregate_unaligned_range_after_expiry(test_token, test_project, test_device):
+
+    device_id = test_device["id"]
+    data_type = test_device["data_types"][0]
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    await sensor_reading_repository.insert_batch([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=data_type,
+            value=value,
+            created_at=created_at
+        )
+        for value, created_at in [
+            (1, datetime(2024, 4, 1, 10, tzinfo=timezone.utc)),
+            (3, datetime(2024, 4, 1, 11, tzinfo=timezone.utc)),
+            (5, datetime(2024, 5, 31, 10, tzinfo=timezone.utc)),
+            (7, datetime(2024, 5, 31, 10, 30, tzinfo=timezone.utc))
+        ]
+    ])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        await ac.put(f"/projects/retention/{test_project['id']}", headers=headers, json={"retention": {"raw_days": 30}})
+        await RetentionSweeper().sweep(datetime(2024, 6, 1, 12, tzinfo=timezone.utc))
+
+        # the expired April readings only live on in the rollups
+        response = await ac.get(
+            f"/sensor-readings/aggregate/{device_id}",
+            headers=headers,
+            params={"interval": "1d", "start": "2024-03-31T06:30:00Z", "end": "2024-06-01T06:30:00Z"}
+        )
+
+    assert await SensorReading.find(SensorReading.device_id == device_id).count() == 2
+    assert response.status_code == 200
+    assert [(bucket["count"], bucket["sum"], bucket["first"], bucket["last"]) for bucket in response.json()] == [(2, 4, 1, 3), (2, 12, 5, 7)]
+
+def test_rollup_segments_of_unaligned_range():
+
+    start = datetime(2024, 3, 31, 6, 30, tzinfo=timezone.utc)
+    end = datetime(2024, 6, 1, 6, 30, 30, tzinfo=timezone.utc)
+
+    assert rollup_segments(86400, start, end) == [
+        ("minute", start, datetime(2024, 3, 31, 7, tzinfo=timezone.utc)),
+        ("hour", datetime(2024, 3, 31, 7, tzinfo=timezone.utc), datetime(2024, 4, 1, tzinfo=timezone.utc)),
+        ("day", datetime(2024, 4, 1, tzinfo=timezone.utc), datetime(2024, 6, 1, tzinfo=timezone.utc)),
+        ("hour", datetime(2024, 6, 1, tzinfo=timezone.utc), datetime(2024, 6, 1, 6, tzinfo=timezone.utc)),
+        ("minute", datetime(2024, 6, 1, 6, tzinfo=timezone.utc), datetime(2024, 6, 1, 6, 30, tzinfo=timezone.utc)),
+        (None, datetime(2024, 6, 1, 6, 30, tzinfo=timezone.utc), end)
+    ]
+    assert rollup_segments(30, start, end) == [(None, start, end)]
+    assert rollup_segments(3600, None, None) == [("hour", None, None)]
+    assert rollup_segments(86400, start, end, "Europe/Berlin") == [
+        ("minute", start, datetime(2024, 6, 1, 6, 30, tzinfo=timezone.utc)),
+        (None, datetime(2024, 6, 1, 6, 30, tzinfo=timezone.utc), end)
+    ]
+
+@pytest.mark.asyncio
+async def test_latest_readings_of_project(test_token, test_project, test_device):
+
+    device_id = test_device["id"]
+    data_type = test_device["data_types"][0]
+
+    await sensor_reading_repository.insert_batch([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=data_type,
+            value=value,
+            created_at=datetime(2024, 5, 1, hour, tzinfo=timezone.utc)
+        )
+        for value, hour in [(2, 10), (3, 12), (1, 8)]
+    ])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.get(
+            f"/sensor-readings/latest/project/{test_project['id']}",
+            headers=headers
+        )
+
+    assert response.status_code == 200
+    assert [device["device_id"] for device in response.json()] == [str(device_id)]
+    assert response.json()[0]["readings"][0]["value"] == 3
+    assert response.json()[0]["readings"][0]["data_type"] == data_type
+
+@pytest.mark.asyncio
+async def test_list_module_sensor_readings(test_token, test_module, test_device):
+
+    device_id = test_device["id"]
+    data_type = test_device["data_types"][0]
+
+    await sensor_reading_repository.insert_batch([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=data_type,
+            value=value,
+            created_at=datetime(2024, 5, 1, value, tzinfo=timezone.utc)
+        )
+        for value in range(3)
+    ])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        response = await ac.get(
+            f"/sensor-readings/list/module/{test_module['id']}",
+            headers=headers,
+            params={"date": "2024-05-01", "measurement_type": data_type["measurement_type"], "limit": 2}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["truncated"] is True
+    assert [device["device_id"] for device in response.json()["devices"]] == [str(device_id)]
+    assert [reading["value"] for reading in response.json()["devices"][0]["readings"]] == [0, 1]
+
+@pytest.mark.asyncio
+async def test_ownership_index_serves_device_checks(test_token, test_device):
+
+    device_id = str(test_device["id"])
+    reading = {"device_id": device_id, "data_type": test_device["data_types"][0], "value": 21.5}
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        first = await ac.post(f"/sensor-readings/create/{device_id}", json=reading, headers=headers)
+        warm = ownership_index.metrics()
+        second = await ac.post(f"/sensor-readings/create/{device_id}", json=reading, headers=headers)
+        hot = ownership_index.metrics()
+
+    assert first.status_code == 201 and second.status_code == 201
+    assert hot["hits"] == warm["hits"] + 1
+    assert hot["misses"] == warm["misses"]
+
+@pytest.mark.asyncio
+async def test_list_bucketed_readings_of_two_data_types(monkeypatch, test_token, test_device):
+
+    monkeypatch.setattr(reading_buckets, "SENSOR_READINGS_STORAGE", "buckets")
+
+    device_id = test_device["id"]
+    temperature = test_device["data_types"][0]
+    pressure = {"measurement_type": "pressure", "measurement_unit": "bar"}
+    created_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+    await sensor_reading_repository.insert_batch([
+        SensorReading(
+            user_id=test_device["user_id"],
+            device_id=device_id,
+            data_type=temperature if value % 2 else pressure,
+            value=value,
+            created_at=created_at + timedelta(seconds=value)
+        )
+        for value in (1, 3, 2, 4)
+    ])
+
+    headers = {
+        "Authorization": f"Bearer {test_token['access_token']}"
+    }
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        for order, expected in (("asc", [1, 2, 3, 4]), ("desc", [4, 3, 2, 1])):
+            pages = []
+            params = {"limit": 2, "order": order}
+            while True:
+                response = await ac.get(f"/sensor-readings/list/{device_id}", headers=headers, params=params)
+                assert response.status_code == 200
+                pages.append([reading["value"] for reading in response.json()["items"]])
+                if not response.json()["next_cursor"]:
+                    break
+                params["cursor"] = response.json()["next_cursor"]
+
+            assert [value for page in pages for value in page] == expected
+            assert pages[0] == expected[:2]
+
+        export = await ac.get(f"/sensor-readings/export/{device_id}", headers=headers, params={"format": "ndjson"})
+
+    assert [json.loads(line)["value"] for line in export.text.splitlines()] == [1, 2, 3, 4]
+
+@pytest.mark.asyncio
+async def test_websocket_acknowledges_flushes_and_invalid_frames(test_token, test_device):
+
+    device_id = str(test_device["id"])
+    reading = {"data_type": test_device["data_types"][0], "value": 21.5}
+
+    with TestClient(app).websocket_connect(f"/sensor-readings/ws/{device_id}?token={test_token['access_token']}") as websocket:
+        websocket.send_text(json.dumps([reading, reading]))
+        flushed = websocket.receive_json()
+        websocket.send_text("not a reading")
+        invalid = websocket.receive_json()
+
+    assert flushed == {"ack": {"received": 2, "inserted": 2, "rejected": 0}, "errors": []}
+    assert invalid == {"ack": {"received": 3, "inserted": 2, "rejected": 1}, "errors": [{"error": "Invalid reading frame."}]}
+
+@pytest.mark.asyncio
+async def test_websocket_writes_buffered_readings_on_disconnect(test_token, test_device):
+
+    device_id = str(test_device["id"])
+    reading = {"data_type": test_device["data_types"][0], "value": 21.5}
+
+    with TestClient(app).websocket_connect(f"/sensor-readings/ws/{device_id}?token={test_token['access_token']}") as websocket:
+        websocket.send_text(json.dumps(reading))
+
+    assert await SensorReading.find(SensorReading.device_id == test_device["id"]).count() == 1
+
+@pytest.mark.asyncio
+async def test_websocket_rejects_bad_token(test_device):
+
+    with TestClient(app).websocket_connect(f"/sensor-readings/ws/{test_device['id']}?token=invalid") as websocket:
+        with pytest.raises(WebSocketDisconnect) as disconnect:
+            websocket.receive_json()
+
+    assert disconnect.value.code == 1008
+
+@pytest.mark.asyncio
+async def test_websocket_closes_on_write_error(monkeypatch, test_token, test_device):
+
+    async def failing_write(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(sensor_reading_repository, "create_many_for_device", failing_write)
+
+    device_id = str(test_device["id"])
+    reading = {"data_type": test_device["data_types"][0], "value": 21.5}
+
+    with TestClient(app).websocket_connect(f"/sensor-readings/ws/{device_id}?token={test_token['access_token']}") as websocket:
+        websocket.send_text(json.dumps(reading))
+        with pytest.raises(WebSocketDisconnect) as disconnect:
+            websocket.receive_json()
+
+    assert disconnect.value.code == 1011
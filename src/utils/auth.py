@@ -1,13 +1,63 @@
-from fastapi import Depends
-from fastapi.security import OAuth2PasswordBearer
-from utils.token import decode_jwt_token
-from database.models.user_model import User
+import os
+from fastapi import Depends, HTTPException, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from utils.token import decode_jwt_claims
+from database.models.device_api_key_model import DevicePrincipal
+from database.models.user_model import UserPrincipal
+from database.repositories.device_api_key_repository import DeviceApiKeyRepository
+from database.repositories.user_repository import UserRepository
+from exceptions.device_api_key_exceptions import InvalidDeviceApiKeyException
+from exceptions.user_exceptions import InvalidTokenException
+
+# comma separated emails of the operators allowed to read the process-wide metrics routes
+OPS_USER_EMAILS = {email.strip() for email in os.getenv("OPS_USER_EMAILS", "").split(",") if email.strip()}
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
+device_api_key_scheme = APIKeyHeader(name="X-Device-Key")
+device_api_key_repository = DeviceApiKeyRepository()
+user_repository = UserRepository()
+
+async def get_principal_from_token(token: str) -> UserPrincipal:
+    """
+    Builds the principal from the token's claims, checking only its token version.
+    Tokens issued before the uid/ver claims existed cannot be revoked, so they are
+    rejected and their users have to log in again.
+    """
+    claims = decode_jwt_claims(token)
+
+    if "uid" not in claims or "ver" not in claims:
+        raise InvalidTokenException()
+
+    principal = UserPrincipal(id=claims["uid"], email=claims["sub"], token_version=claims["ver"])
+    await user_repository.verify_token_version(principal.id, principal.token_version)
+    return principal
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> UserPrincipal:
+    try:
+        return await get_principal_from_token(token)
+    except InvalidTokenException as err:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(err)
+        )
+
+async def get_ops_principal(user: UserPrincipal = Depends(get_current_principal)) -> UserPrincipal:
+    """The principal of an operator; metrics routes report on every tenant, so other users get 403."""
+    if user.email not in OPS_USER_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed."
+        )
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    email = decode_jwt_token(token)
-    user = await User.find_one({"email": email})
     return user
+
+async def get_current_device(api_key: str = Depends(device_api_key_scheme)) -> DevicePrincipal:
+    try:
+        return await device_api_key_repository.resolve(api_key)
+    except InvalidDeviceApiKeyException as err:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(err)
+        )
     
     
\ No newline at end of file
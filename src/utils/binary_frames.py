@@ -0,0 +1,40 @@
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional, Tuple
+
+from exceptions.sensor_reading_exceptions import InvalidReadingFrameException
+
+# One record per sample, little endian:
+#   uint8   index of the data type in the device's declared data_types
+#   int64   timestamp in epoch milliseconds (UTC)
+#   float64 value
+READING_RECORD = struct.Struct("<Bqd")
+
+# epoch milliseconds representable as a datetime (years 1 to 9999)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MIN_TIMESTAMP_MS = (datetime.min.replace(tzinfo=timezone.utc) - EPOCH) // timedelta(milliseconds=1)
+MAX_TIMESTAMP_MS = (datetime.max.replace(tzinfo=timezone.utc) - EPOCH) // timedelta(milliseconds=1)
+
+def decode_reading_frame(payload: bytes) -> Iterator[Tuple[int, Optional[datetime], float]]:
+    """
+    Decodes a binary reading frame into (data type index, created_at, value) tuples.
+    created_at is None for timestamps outside the datetime range, so callers can reject
+    that record alone.
+    """
+    if len(payload) % READING_RECORD.size:
+        raise InvalidReadingFrameException(
+            f"Frame size must be a multiple of {READING_RECORD.size} bytes."
+        )
+
+    for data_type_index, timestamp_ms, value in READING_RECORD.iter_unpack(payload):
+        if not MIN_TIMESTAMP_MS <= timestamp_ms <= MAX_TIMESTAMP_MS:
+            yield data_type_index, None, value
+            continue
+        yield data_type_index, EPOCH + timedelta(milliseconds=timestamp_ms), value
+
+def encode_reading_frame(records: Iterator[Tuple[int, datetime, float]]) -> bytes:
+    """Encodes (data type index, created_at, value) tuples into a binary reading frame."""
+    return b"".join(
+        READING_RECORD.pack(data_type_index, int(created_at.timestamp() * 1000), value)
+        for data_type_index, created_at, value in records
+    )
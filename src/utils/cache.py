@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after a fixed time to live."""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        self.entries.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable, Any], bool]):
+        """Drops every entry for which predicate(key, value) is true."""
+        for key in [key for key, (_, value) in self.entries.items() if predicate(key, value)]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+
+    def metrics(self) -> dict:
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
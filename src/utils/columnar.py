@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MILLISECOND = timedelta(milliseconds=1)
+
+def epoch_ms(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // MILLISECOND
+
+def columnar_series(documents: Iterable[dict]) -> List[dict]:
+    """
+    Splits raw reading documents into one {data_type, timestamps, values} series per data type.
+
+    Timestamps are epoch milliseconds, in the order of the documents.
+    """
+    series = {}
+
+    for document in documents:
+        data_type = document["data_type"]
+        key = (data_type["measurement_type"], data_type["measurement_unit"])
+        column = series.get(key)
+
+        if column is None:
+            column = series[key] = {"data_type": data_type, "timestamps": [], "values": []}
+
+        column["timestamps"].append(epoch_ms(document["created_at"]))
+        column["values"].append(document["value"])
+
+    return list(series.values())
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+EXPORT_CHUNK_ROWS = 1000
+CSV_COLUMNS = ["created_at", "measurement_type", "measurement_unit", "value"]
+
+def isoformat_utc(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+async def iter_csv(documents: AsyncIterator[dict], chunk_rows: int = EXPORT_CHUNK_ROWS) -> AsyncIterator[str]:
+    """Formats reading documents as CSV, yielding the header first and then chunks of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+
+    buffer.seek(0)
+    buffer.truncate()
+    rows = 0
+
+    async for document in documents:
+        writer.writerow([
+            isoformat_utc(document["created_at"]),
+            document["data_type"]["measurement_type"],
+            document["data_type"]["measurement_unit"],
+            document["value"]
+        ])
+        rows += 1
+
+        if rows >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+
+    if rows:
+        yield buffer.getvalue()
+
+async def iter_ndjson(documents: AsyncIterator[dict], chunk_rows: int = EXPORT_CHUNK_ROWS) -> AsyncIterator[str]:
+    """Formats reading documents as NDJSON, one reading per line, in chunks of rows."""
+    lines = []
+
+    async for document in documents:
+        lines.append(json.dumps({
+            "created_at": isoformat_utc(document["created_at"]),
+            "data_type": document["data_type"],
+            "value": document["value"]
+        }, default=str))
+
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
@@ -1,7 +1,98 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 from passlib.hash import pbkdf2_sha256
 
+from exceptions.user_exceptions import PasswordHasherBusyException
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "256"))
+
 def hash_password(plain_password: str) -> str:
     return pbkdf2_sha256.hash(plain_password)
 
 def verify_password(plain_password: str, hash: str) -> bool:
-    return pbkdf2_sha256.verify(plain_password, hash)
\ No newline at end of file
+    return pbkdf2_sha256.verify(plain_password, hash)
+
+class PasswordHasher:
+    """
+    Runs password hashing on a bounded thread pool so it never blocks the event loop.
+    pbkdf2 releases the GIL inside hashlib, so the workers hash in parallel with the
+    loop; calls beyond the worker count queue up to max_pending, then are rejected.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    async def hash(self, plain_password: str) -> str:
+        return await self._run(hash_password, plain_password)
+
+    async def verify(self, plain_password: str, hash: str) -> bool:
+        return await self._run(verify_password, plain_password, hash)
+
+    def stop(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_capacity": self.max_pending,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.total_wait_ms / self.completed if self.completed else 0.0,
+            "max_wait_ms": self.max_wait_ms,
+            "avg_hash_ms": self.total_run_ms / self.completed if self.completed else 0.0
+        }
+
+    async def _run(self, function: Callable, *args):
+        with self.lock:
+            if self.queued + self.running >= self.workers + self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusyException()
+
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        if not self.executor:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+
+        submitted_at = time.perf_counter()
+
+        def timed():
+            started_at = time.perf_counter()
+            with self.lock:
+                self.queued -= 1
+                self.running += 1
+                wait_ms = (started_at - submitted_at) * 1000
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            try:
+                return function(*args)
+            finally:
+                with self.lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_run_ms += (time.perf_counter() - started_at) * 1000
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+
+password_hasher = PasswordHasher()
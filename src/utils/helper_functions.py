@@ -1,9 +1,134 @@
+import base64
+from datetime import date, datetime, time, timedelta, timezone
+import json
+import re
+from typing import AsyncIterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from beanie import PydanticObjectId
 from fastapi import HTTPException
 
+from enums.measurement_type import MeasurementType
+from enums.measurement_unit import MeasurementUnit
+from exceptions.sensor_reading_exceptions import InvalidReadingStreamException
+
+MAX_NDJSON_LINE_LENGTH = 64 * 1024
+
 def validate_object_id(object_id: str) -> PydanticObjectId:
     """Validates if informed object id is valid."""
     try:
         return PydanticObjectId(object_id)
     except Exception:
-        raise HTTPException(status_code=400, detail="Invalid ID format")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+
+def validate_time_range(
+        day: Optional[date] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        tz: str = "UTC"
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Translates the reading list filters into a half-open [start, end) range in UTC.
+
+    Calendar dates are whole days in the tz time zone (end_date is inclusive) and
+    naive datetimes are read in tz as well. Either bound may be None.
+    """
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid time zone")
+
+    def start_of_day(value: date) -> datetime:
+        return datetime.combine(value, time.min, tzinfo=zone)
+
+    def to_utc(value: datetime) -> datetime:
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=zone)
+        return value.astimezone(timezone.utc)
+
+    range_start = range_end = None
+
+    if day:
+        range_start, range_end = start_of_day(day), start_of_day(day + timedelta(days=1))
+    else:
+        if start_date:
+            range_start = start_of_day(start_date)
+        if end_date:
+            range_end = start_of_day(end_date + timedelta(days=1))
+        if start:
+            range_start = start
+        if end:
+            range_end = end
+
+    range_start = to_utc(range_start) if range_start else None
+    range_end = to_utc(range_end) if range_end else None
+
+    if range_start and range_end and range_start >= range_end:
+        raise HTTPException(status_code=400, detail="Start of range must be before its end")
+
+    return range_start, range_end
+
+INTERVAL_UNITS = {"s": ("second", 1), "m": ("minute", 60), "h": ("hour", 3600), "d": ("day", 86400)}
+
+def validate_interval(interval: str) -> Tuple[str, int, int]:
+    """Parses an aggregation interval such as 1m, 15m, 1h or 1d into ($dateTrunc unit, bin size, seconds)."""
+    match = re.fullmatch(r"(\d+)([smhd])", interval or "")
+
+    if not match or int(match.group(1)) == 0:
+        raise HTTPException(status_code=400, detail="Invalid interval, use a number followed by s, m, h or d")
+    
+    bin_size = int(match.group(1))
+    unit, unit_seconds = INTERVAL_UNITS[match.group(2)]
+
+    return unit, bin_size, bin_size * unit_seconds
+
+def data_type_filters(
+        measurement_type: Optional[MeasurementType] = None,
+        measurement_unit: Optional[MeasurementUnit] = None
+) -> Optional[List[dict]]:
+    """Turns optional measurement_type/measurement_unit query parameters into a data type filter."""
+    data_type_filter = {}
+    if measurement_type:
+        data_type_filter["measurement_type"] = measurement_type.value
+    if measurement_unit:
+        data_type_filter["measurement_unit"] = measurement_unit.value
+    return [data_type_filter] if data_type_filter else None
+
+def encode_cursor(created_at: datetime, object_id: str) -> str:
+    """Opaque keyset pagination cursor for the (created_at, id) of the last item of a page."""
+    # Motor returns naive UTC datetimes, the cursor always carries the offset
+    created_at = created_at.replace(tzinfo=timezone.utc) if created_at.tzinfo is None else created_at.astimezone(timezone.utc)
+    payload = json.dumps({"t": created_at.isoformat(), "id": object_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def validate_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decodes a cursor created by encode_cursor into a UTC aware datetime and an id."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = datetime.fromisoformat(payload["t"])
+        object_id = str(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # cursors issued before they carried an offset hold naive UTC datetimes
+    if created_at.tzinfo is None:
+        return created_at.replace(tzinfo=timezone.utc), object_id
+
+    return created_at.astimezone(timezone.utc), object_id
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], max_line_length: int = MAX_NDJSON_LINE_LENGTH) -> AsyncIterator[bytes]:
+    """Splits a chunked byte stream into non-empty NDJSON lines without buffering the whole body."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line
+        if len(buffer) > max_line_length:
+            raise InvalidReadingStreamException(f"Line exceeds {max_line_length} bytes.")
+    buffer = buffer.strip()
+    if buffer:
+        yield buffer
\ No newline at end of file
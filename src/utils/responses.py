@@ -0,0 +1,20 @@
+from typing import Any
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+def encode_object_id(value: Any) -> str:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    Default response class of the app, rendered by orjson.
+
+    orjson handles datetimes, str enums (MeasurementType, MeasurementUnit, ...) and
+    nested dicts natively; ObjectIds left in raw documents are rendered as strings.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=encode_object_id, option=orjson.OPT_NON_STR_KEYS)
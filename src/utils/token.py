@@ -2,6 +2,7 @@ from datetime import datetime, timedelta, timezone
 import jwt
 
 from app_secrets import JWT_SECRET_KEY, ALGORITHM, EXPIRATION_TIME
+from exceptions.user_exceptions import InvalidTokenException
 
 def generate_jwt_token(data: dict) -> str:
     data_to_encode = data.copy()
@@ -9,8 +10,18 @@ def generate_jwt_token(data: dict) -> str:
     token = jwt.encode(data_to_encode, JWT_SECRET_KEY, algorithm=ALGORITHM)
     return token
 
+def generate_user_token(user_id: str, email: str, token_version: int) -> str:
+    """Token whose claims identify the user without a lookup: email in sub, id in uid, token version in ver."""
+    return generate_jwt_token({"sub": email, "uid": str(user_id), "ver": token_version})
+
+def decode_jwt_claims(encoded_token: str) -> dict:
+    try:
+        return jwt.decode(encoded_token, JWT_SECRET_KEY, algorithms=["HS256"])
+    except jwt.PyJWTError:
+        raise InvalidTokenException()
+
 def decode_jwt_token(encoded_token: str) -> str:
-    decoded_data = jwt.decode(encoded_token, JWT_SECRET_KEY, algorithms=["HS256"])
+    decoded_data = decode_jwt_claims(encoded_token)
     return decoded_data["sub"] # returns email encoded on payload
 
 